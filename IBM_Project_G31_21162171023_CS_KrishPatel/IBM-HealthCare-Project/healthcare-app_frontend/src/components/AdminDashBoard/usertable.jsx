@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Modal, Button, TextField, FormControl, InputLabel, Select, MenuItem } from '@mui/material';
-import axiosInstance from '../../utils/axiosInstance';
+import axiosInstance, { getAllPages } from '../../utils/axiosInstance';
 
 const UserTable = () => {
     const [users, setUsers] = useState([]);
@@ -9,8 +9,7 @@ const UserTable = () => {
 
     const fetchUsers = async () => {
         try {
-            const response = await axiosInstance.get('/admin/users/');
-            setUsers(response.data);
+            setUsers(await getAllPages('/admin/users/'));
         } catch (error) {
             console.error('Error fetching users:', error);
         }
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { FaUserMd, FaSearch, FaEllipsisV } from 'react-icons/fa';
 import { FiClock, FiCalendar, FiUser, FiSettings } from 'react-icons/fi';
-import axiosInstance from '../utils/axiosInstance';
+import axiosInstance, { getAllPages } from '../utils/axiosInstance';
 import { toast } from 'react-toastify';
 import 'react-datepicker/dist/react-datepicker.css';
 import { Bar } from 'react-chartjs-2';
@@ -60,16 +60,16 @@ export default function DoctorDashboardPage() {
   const fetchAppointments = async () => {
     const auth_token = localStorage.getItem('auth_token');
     try {
-      const response = await axiosInstance.get(`/doctor-appointments/`, {
+      const data = await getAllPages(`/doctor-appointments/`, {
         headers: {
           Authorization: `Bearer ${auth_token}`,
         },
       });
   
-      setAppointments(response.data);
+      setAppointments(data);
   
-      const totalAppointments = response.data.length;
-      const completedAppointments = response.data.filter(
+      const totalAppointments = data.length;
+      const completedAppointments = data.filter(
         (app) => app.status === 'Completed'
       ).length;
       const pendingAppointments = totalAppointments - completedAppointments;
@@ -85,7 +85,7 @@ export default function DoctorDashboardPage() {
       startOfWeek.setDate(startOfWeek.getDate() - startOfWeek.getDay() + 1); // Monday
       const appointmentsPerDay = [0, 0, 0, 0, 0, 0, 0]; // Mon to Sun
   
-      response.data.forEach((app) => {
+      data.forEach((app) => {
         const appDate = new Date(app.appointment_date);
         const dayIndex = appDate.getDay(); // 0 (Sun) to 6 (Sat)
   
@@ -23,6 +23,7 @@ import {
 import { MdLocalHospital, MdAccountCircle } from 'react-icons/md';
 import { toast } from 'react-toastify';
 import _ from 'lodash';
+import { getAllPages } from '../utils/axiosInstance';
 
 // Base API URL and configuration
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:8000/api';
@@ -260,8 +261,7 @@ const DoctorFinder = () => {
   
   const fetchUserSavedDoctors = async () => {
     try {
-      const response = await axiosInstance.get(`/saved-doctors/`);
-      setSavedDoctors(response.data.doctors || []);
+      setSavedDoctors(await getAllPages(`/saved-doctors/`, {}, (data) => data.doctors));
     } catch (error) {
       console.error('Error fetching saved doctors:', error);
       setSavedDoctors([]);
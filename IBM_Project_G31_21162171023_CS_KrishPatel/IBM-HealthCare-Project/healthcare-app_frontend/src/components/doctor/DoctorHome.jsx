@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import axiosInstance from '../../utils/axiosInstance';
+import { getAllPages } from '../../utils/axiosInstance';
 import { toast } from 'react-hot-toast';
 
 const DoctorHome = () => {
@@ -11,8 +11,7 @@ const DoctorHome = () => {
     setLoading(true);
     setError(null);
     try {
-      const response = await axiosInstance.get('/doctor-appointments/');
-      setAppointments(response.data);
+      setAppointments(await getAllPages('/doctor-appointments/'));
     } catch (err) {
       setError('Failed to load appointments. Please try again later.');
       toast.error('Failed to load appointments.');
@@ -9,7 +9,7 @@ import { Swiper, SwiperSlide } from 'swiper/react';
 import 'swiper/css';
 import 'swiper/css/pagination';
 import { toast } from 'react-hot-toast';
-import axiosInstance from '../../utils/axiosInstance';
+import axiosInstance, { getAllPages } from '../../utils/axiosInstance';
 import _ from 'lodash';
 
 // Set the base API URL with fallback options
@@ -102,11 +102,11 @@ export default function UserHome() {
 
   const fetchAppointments = async () => {
     try {
-      const response = await axiosInstance.get('/user-appointments/');
-      if (response.data) {
+      const appointments = await getAllPages('/user-appointments/');
+      if (appointments) {
         // Filter to keep only upcoming appointments
         const now = new Date();
-        const upcomingAppts = response.data.filter(appt => 
+        const upcomingAppts = appointments.filter(appt => 
           new Date(appt.appointment_date) > now
         );
         setUpcomingAppointments(upcomingAppts);
@@ -202,10 +202,10 @@ export default function UserHome() {
   const memoizedFetchAppointments = useMemo(() => {
     return _.debounce(async () => {
       try {
-        const response = await axiosInstance.get('/user-appointments/');
-        if (response.data) {
-          setUpcomingAppointments(response.data);
-          localStorage.setItem('cached_appointments', JSON.stringify({ data: response.data, timestamp: Date.now() }));
+        const appointments = await getAllPages('/user-appointments/');
+        if (appointments) {
+          setUpcomingAppointments(appointments);
+          localStorage.setItem('cached_appointments', JSON.stringify({ data: appointments, timestamp: Date.now() }));
         } else {
           setUpcomingAppointments([]);
         }
@@ -261,21 +261,21 @@ export default function UserHome() {
           if (Date.now() - timestamp < 60 * 1000) {
             setUpcomingAppointments(data);
           } else {
-            const response = await axiosInstance.get('/user-appointments/');
-            if (response.data) {
-              setUpcomingAppointments(response.data);
+            const appointments = await getAllPages('/user-appointments/');
+            if (appointments) {
+              setUpcomingAppointments(appointments);
               localStorage.setItem('cached_appointments', JSON.stringify({
-                data: response.data,
+                data: appointments,
                 timestamp: Date.now()
               }));
             }
           }
         } else {
-          const response = await axiosInstance.get('/user-appointments/');
-          if (response.data) {
-            setUpcomingAppointments(response.data);
+          const appointments = await getAllPages('/user-appointments/');
+          if (appointments) {
+            setUpcomingAppointments(appointments);
             localStorage.setItem('cached_appointments', JSON.stringify({
-              data: response.data,
+              data: appointments,
               timestamp: Date.now()
             }));
           }
@@ -93,4 +93,19 @@ axiosInstance.interceptors.response.use(
   }
 );
 
+// Paginated endpoints return one page at a time and link to the next one
+// in a `Link: <url>; rel="next"` header. Follow those links and concatenate
+// the pages; `select` picks the list out of each response body.
+export const getAllPages = async (url, config = {}, select = (data) => data) => {
+  const items = [];
+  let nextUrl = url;
+  while (nextUrl) {
+    const response = await axiosInstance.get(nextUrl, config);
+    items.push(...(select(response.data) || []));
+    const match = /<([^>]+)>;\s*rel="next"/.exec(response.headers.link || '');
+    nextUrl = match ? match[1] : null;
+  }
+  return items;
+};
+
 export default axiosInstance;
\ No newline at end of file
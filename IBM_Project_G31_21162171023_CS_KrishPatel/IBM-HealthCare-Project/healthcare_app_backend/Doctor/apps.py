@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class DoctorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Doctor'
     label = 'Doctor'  # Explicitly set the app label
-    verbose_name = 'Doctor Management'
\ No newline at end of file
+    verbose_name = 'Doctor Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401  Registers cache invalidation and search receivers
+        from .catalog import refresh_specialization_counts
+        post_migrate.connect(refresh_specialization_counts, sender=self)
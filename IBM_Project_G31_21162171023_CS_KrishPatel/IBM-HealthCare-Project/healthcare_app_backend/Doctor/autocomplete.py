@@ -0,0 +1,138 @@
+"""
+In-memory typeahead over condition and specialization names.
+
+Terms come from COMMON_CONDITIONS and the Specialization/Condition catalogs
+and are kept in a sorted array, so a prefix lookup is two binary searches
+plus a top-k pass over the matching slice. Terms are ranked by how often
+users searched for them (SearchQueryCount plus SearchEvent), then by how
+many doctors and hospitals use them.
+
+Refreshing happens inline: at most every AUTOCOMPLETE_REFRESH_SECONDS one
+request per process reads the generations from the cache. If they moved,
+that request also reloads the two small catalog tables (doctor/hospital
+generations) or reads the new searches (search generation); every other
+request is served from memory alone. New searches are read from
+AUTOCOMPLETE_SEARCH_OVERLAP_SECONDS behind the newest timestamp seen, and
+event ids already counted in that window are skipped, so events committed
+out of id order are neither missed nor counted twice.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from healthcare_app_backend.cache_generations import DOCTOR, HOSPITAL, SEARCH, get_generations
+from hospital.models import Condition
+from user_management.models import SearchEvent, SearchQueryCount
+from .models import COMMON_CONDITIONS, Specialization
+from .search import normalize
+
+
+class _Term:
+    __slots__ = ('label', 'kind', 'usage', 'searches')
+
+    def __init__(self, label, kind):
+        self.label = label
+        self.kind = kind
+        self.usage = 0
+        self.searches = 0
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._terms = {}          # normalized text -> _Term
+        self._keys = []           # sorted normalized texts
+        self._searches = {}       # normalized query -> search count
+        self._search_watermark = None  # newest SearchEvent timestamp seen
+        self._seen_events = {}         # event id -> timestamp, within the overlap window
+        self._catalog_version = None
+        self._search_version = None
+        self._checked_at = None
+
+    def _load_catalog(self):
+        terms = {}
+        for specialty, conditions in COMMON_CONDITIONS.items():
+            terms.setdefault(specialty, _Term(specialty.title(), 'specialization'))
+            for condition in conditions:
+                terms.setdefault(condition, _Term(condition, 'condition'))
+        for name, count in Specialization.objects.values_list('name', 'doctor_count'):
+            term = terms.setdefault(normalize(name), _Term(name, 'specialization'))
+            term.label, term.usage = name, count
+        for name, doctors, hospitals in Condition.objects.values_list('name', 'doctor_count', 'hospital_count'):
+            term = terms.setdefault(name, _Term(name, 'condition'))
+            term.usage += doctors + hospitals
+        for text, term in terms.items():
+            term.searches = self._searches.get(text, 0)
+        self._terms = terms
+        self._keys = sorted(terms)
+
+    def _count_search(self, query, count):
+        text = normalize(query)
+        self._searches[text] = self._searches.get(text, 0) + count
+        if text in self._terms:
+            self._terms[text].searches = self._searches[text]
+
+    def _load_searches(self):
+        overlap = timedelta(seconds=getattr(settings, 'AUTOCOMPLETE_SEARCH_OVERLAP_SECONDS', 60))
+        events = SearchEvent.objects.order_by()
+        if self._search_watermark is None:
+            # First load: pruned counts and events before the overlap window
+            # are aggregated; the window itself is read event by event below
+            for query, count in SearchQueryCount.objects.values_list('query', 'count'):
+                self._count_search(query, count)
+            latest = events.aggregate(latest=Max('timestamp'))['latest'] or timezone.now()
+            older = events.filter(timestamp__lt=latest - overlap).values_list('query').annotate(count=Count('id'))
+            for query, count in older:
+                self._count_search(query, count)
+            self._search_watermark = latest
+
+        recent = events.filter(timestamp__gte=self._search_watermark - overlap)
+        for event_id, query, timestamp in recent.values_list('id', 'query', 'timestamp'):
+            if event_id in self._seen_events:
+                continue
+            self._seen_events[event_id] = timestamp
+            self._search_watermark = max(self._search_watermark, timestamp)
+            self._count_search(query, 1)
+        horizon = self._search_watermark - overlap
+        self._seen_events = {
+            event_id: timestamp for event_id, timestamp in self._seen_events.items() if timestamp >= horizon
+        }
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        interval = getattr(settings, 'AUTOCOMPLETE_REFRESH_SECONDS', 5)
+        if not force and self._checked_at is not None and now - self._checked_at < interval:
+            return
+        with self._lock:
+            generations = get_generations(DOCTOR, HOSPITAL, SEARCH)
+            catalog_version = (generations[DOCTOR], generations[HOSPITAL])
+            if generations[SEARCH] != self._search_version:
+                self._load_searches()
+                self._search_version = generations[SEARCH]
+            if catalog_version != self._catalog_version:
+                self._load_catalog()
+                self._catalog_version = catalog_version
+            self._checked_at = now
+
+    def suggest(self, prefix, limit=10):
+        """Top `limit` terms starting with `prefix`, most popular first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.refresh()
+        keys, terms = self._keys, self._terms
+        lo = bisect_left(keys, prefix)
+        hi = bisect_right(keys, prefix + '\uffff', lo)
+        best = heapq.nsmallest(
+            limit, keys[lo:hi], key=lambda text: (-terms[text].searches, -terms[text].usage, text)
+        )
+        return [{'text': terms[text].label, 'type': terms[text].kind} for text in best]
+
+
+suggestion_index = SuggestionIndex()
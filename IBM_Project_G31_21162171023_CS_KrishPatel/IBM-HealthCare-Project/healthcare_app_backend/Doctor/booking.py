@@ -0,0 +1,49 @@
+"""
+Appointment booking and conflict detection.
+
+Conflicts are found with a range scan on the (doctor, appointment_date)
+index, so a check costs O(log n) in the doctor's appointment count. Booking
+runs the check and the insert in one transaction while holding
+`SELECT ... FOR UPDATE` on the doctor's row, so concurrent bookings for the
+same doctor are serialized and a double booking cannot be committed. SQLite
+ignores FOR UPDATE but allows a single writer at a time, so a racing second
+booking fails with "database is locked" instead of double booking.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from user_management.models import Appointment
+from .models import Doctor
+
+APPOINTMENT_DURATION = timedelta(minutes=30)
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def conflicting_appointments(doctor_id, when):
+    """Appointments for the doctor that start within one slot of `when`"""
+    return Appointment.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date__range=(when - APPOINTMENT_DURATION, when + APPOINTMENT_DURATION)
+    )
+
+
+def book(doctor_id, user, when, reason=''):
+    """Create an appointment, raising BookingConflict if the slot is taken"""
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    with transaction.atomic():
+        # The doctor row is the per-doctor lock for bookings
+        Doctor.objects.select_for_update().filter(pk=doctor_id).values_list('pk', flat=True).first()
+        if conflicting_appointments(doctor_id, when).exists():
+            raise BookingConflict('Doctor already has an appointment scheduled during this time')
+        return Appointment.objects.create(
+            doctor_id=doctor_id,
+            user=user,
+            appointment_date=when,
+            reason=reason
+        )
@@ -0,0 +1,44 @@
+"""
+Specialization catalog with usage counts.
+
+Counts are adjusted incrementally by Doctor.signals on every doctor write,
+so reading the catalog is a single scan of the small, indexed
+`specializations` table instead of a DISTINCT over all doctors.
+"""
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F
+
+from .models import Doctor, Specialization
+
+
+def adjust_specialization(name, delta):
+    if not name:
+        return
+    if delta > 0:
+        Specialization.objects.bulk_create([Specialization(name=name)], ignore_conflicts=True)
+    Specialization.objects.filter(name=name).update(doctor_count=F('doctor_count') + delta)
+
+
+def refresh_specialization_counts(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Rebuild every count from the doctors table; also usable as a post_migrate hook"""
+    counts = dict(
+        Doctor.objects.using(using).order_by().values_list('specialization').annotate(count=Count('id'))
+    )
+    specializations = Specialization.objects.using(using)
+    specializations.bulk_create(
+        [Specialization(name=name) for name in counts], ignore_conflicts=True
+    )
+    for specialization in specializations.all():
+        count = counts.get(specialization.name, 0)
+        if specialization.doctor_count != count:
+            specialization.doctor_count = count
+            specialization.save(using=using, update_fields=['doctor_count'])
+
+
+def specialization_catalog():
+    """Specializations offered by at least one doctor, most common first"""
+    return list(
+        Specialization.objects.filter(doctor_count__gt=0)
+        .order_by('-doctor_count', 'name')
+        .values_list('name', flat=True)
+    )
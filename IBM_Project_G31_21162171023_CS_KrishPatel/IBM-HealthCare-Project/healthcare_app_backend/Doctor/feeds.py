@@ -0,0 +1,110 @@
+"""
+Per-user appointment feeds.
+
+A user's appointments are cached as one list of (appointment_date, id,
+serialized appointment) entries, sorted by date, under a key made of the
+user id, the user's feed version and the doctor/hospital generations (the
+serialized rows embed doctor and hospital fields). Listing pages are sliced
+from that list, so a repeat load costs no database queries.
+
+Writes go through: when a booking or cancellation commits, the entry is
+serialized once and inserted into (or removed from) the cached list, which
+is stored under a new feed version. If no feed is cached, or another write
+for the same user is in flight, the version is just moved on and the next
+read rebuilds the feed from the database.
+"""
+import time
+from bisect import insort
+
+from django.core.cache import cache
+from django.db import transaction
+
+from healthcare_app_backend.cache_generations import DOCTOR, HOSPITAL, versioned_key
+from user_management.models import Appointment
+from .serializers import AppointmentSerializer
+
+FEED_TIMEOUT = 60 * 60 * 6  # 6 hours; versions make every write visible at once
+LOCK_TIMEOUT = 10
+
+
+def _version_key(user_id):
+    return f"appointment_feed_version:{user_id}"
+
+
+def _feed_key(user_id, version):
+    return versioned_key(f"appointment_feed:{user_id}:{version}", DOCTOR, HOSPITAL)
+
+
+def _next_version(current=0):
+    # Millisecond timestamps, so a version lost to eviction never comes back
+    # smaller than one it replaced
+    return max(int(time.time() * 1000), (current or 0) + 1)
+
+
+def _entry(appointment):
+    return appointment.appointment_date, appointment.pk, dict(AppointmentSerializer(appointment).data)
+
+
+def _entry_key(entry):
+    return entry[0], entry[1]
+
+
+def _feed_queryset():
+    return AppointmentSerializer.setup_queryset(Appointment.objects.all())
+
+
+def _current_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), _next_version(), timeout=FEED_TIMEOUT)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def appointment_feed(user_id):
+    """The user's feed entries, oldest first, built from the database on a miss"""
+    key = _feed_key(user_id, _current_version(user_id))
+    entries = cache.get(key)
+    if entries is None:
+        entries = [
+            _entry(appointment)
+            for appointment in _feed_queryset().filter(user_id=user_id).order_by('appointment_date', 'id')
+        ]
+        cache.set(key, entries, timeout=FEED_TIMEOUT)
+    return entries
+
+
+def _write_through(user_id, appointment_id, deleted=False):
+    lock_key = f"appointment_feed_lock:{user_id}"
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        # A concurrent write holds the feed; make it rebuild instead
+        cache.delete(_version_key(user_id))
+        return
+    try:
+        version = cache.get(_version_key(user_id))
+        entries = cache.get(_feed_key(user_id, version)) if version is not None else None
+        new_version = _next_version(version)
+        if entries is not None:
+            entries = [entry for entry in entries if entry[1] != appointment_id]
+            appointment = None if deleted else _feed_queryset().filter(pk=appointment_id).first()
+            if appointment is not None:
+                insort(entries, _entry(appointment), key=_entry_key)
+            if cache.get(_version_key(user_id)) != version:
+                return
+            cache.set(_feed_key(user_id, new_version), entries, timeout=FEED_TIMEOUT)
+        # Bumped even without a cached feed, so a rebuild that read the
+        # database before this write committed is stored under a dead key
+        cache.set(_version_key(user_id), new_version, timeout=FEED_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def appointment_saved(appointment):
+    user_id, appointment_id = appointment.user_id, appointment.pk
+    transaction.on_commit(lambda: _write_through(user_id, appointment_id))
+
+
+def appointment_deleted(appointment):
+    # Read now: delete() clears the instance's pk before the commit
+    user_id, appointment_id = appointment.user_id, appointment.pk
+    transaction.on_commit(lambda: _write_through(user_id, appointment_id, deleted=True))
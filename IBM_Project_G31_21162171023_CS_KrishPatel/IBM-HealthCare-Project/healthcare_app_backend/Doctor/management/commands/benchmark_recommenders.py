@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Doctor.models import COMMON_CONDITIONS
+from recommendation_system.benchmark import DEFAULT_SIZES, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the recommenders on synthetic catalogs and write the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+            help="Comma separated catalog sizes (number of doctors)"
+        )
+        parser.add_argument('--repeat', type=int, default=50, help="Recommendation calls per stage")
+        parser.add_argument('--n-estimators', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+        parser.add_argument('--baseline', help="JSON report of an earlier run to compare against")
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help="Fail when a stage's p50 grows by more than this fraction over the baseline"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers")
+
+        report = run_benchmarks(
+            sizes, COMMON_CONDITIONS, repeat=options['repeat'], n_estimators=options['n_estimators'],
+            seed=options['seed'], progress=lambda message: self.stderr.write(f"Benchmarking {message}")
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare(baseline, report, options['max_regression'])
+            for size, stage, before, after in regressions:
+                self.stderr.write(f"{stage} at {size} doctors: p50 {before:.2f} ms -> {after:.2f} ms")
+            if regressions:
+                raise CommandError(f"{len(regressions)} stages regressed beyond {options['max_regression']:.0%}")
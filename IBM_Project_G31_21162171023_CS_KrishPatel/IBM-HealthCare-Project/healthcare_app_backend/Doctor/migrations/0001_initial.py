@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 07:13
+#
+# The schema the app had before it kept migrations. Databases created from
+# those models apply this with `manage.py migrate Doctor --fake-initial`.
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('hospital', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Doctor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('mobile_number', models.CharField(max_length=10, validators=[django.core.validators.RegexValidator(code='invalid_mobile', message='Mobile number must be exactly 10 digits.', regex='^\\d{10}$')])),
+                ('specialization', models.CharField(default='General', max_length=100)),
+                ('experience_years', models.PositiveIntegerField(default=0)),
+                ('availability', models.TextField(default='10 AM - 7 PM')),
+                ('consultation_fee_inr', models.PositiveIntegerField(default=500)),
+                ('patients_treated', models.PositiveIntegerField(default=0)),
+                ('rating', models.FloatField(default=4.0)),
+                ('conditions_treated', models.JSONField(blank=True, default=list)),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doctors', to='hospital.hospital')),
+            ],
+            options={
+                'db_table': 'doctors',
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-19 07:14
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '0001_initial'),
+        ('hospital', '0002_condition_hospital_doctor_count_cache'),
+    ]
+
+    # Search documents, condition links and specialization counts are
+    # backfilled by the app's post_migrate hooks.
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='conditions',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='doctors', to='hospital.condition'),
+        ),
+        migrations.CreateModel(
+            name='DoctorSearchDocument',
+            fields=[
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='Doctor.doctor')),
+                ('specialization', models.CharField(max_length=100)),
+                ('hospital_name', models.CharField(blank=True, max_length=200)),
+                ('document', models.TextField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'db_table': 'doctor_search_documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='Specialization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('doctor_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'specializations',
+                'indexes': [models.Index(fields=['-doctor_count', 'name'], name='specializat_doctor__998b65_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorDaySlots',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('free_mask', models.BigIntegerField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_slots', to='Doctor.doctor')),
+            ],
+            options={
+                'db_table': 'doctor_day_slots',
+                'unique_together': {('doctor', 'date')},
+            },
+        ),
+    ]
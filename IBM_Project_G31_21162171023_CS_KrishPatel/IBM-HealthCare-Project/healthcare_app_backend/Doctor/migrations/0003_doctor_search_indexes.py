@@ -0,0 +1,61 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+from Doctor.search import build_document, normalize
+
+SEARCH_INDEXES = {
+    'doctor_search_vector_gin': 'search_vector',
+    'doctor_search_document_trgm': 'document gin_trgm_ops',
+    'doctor_search_specialization_trgm': 'specialization gin_trgm_ops',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, column in SEARCH_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON doctor_search_documents USING gin ({column})"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SEARCH_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def backfill_search_documents(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Doctor = apps.get_model('Doctor', 'Doctor')
+    DoctorSearchDocument = apps.get_model('Doctor', 'DoctorSearchDocument')
+    doctors = Doctor.objects.using(db).filter(search_document__isnull=True).select_related('hospital')
+    documents = []
+    for doctor in doctors.iterator(chunk_size=2000):
+        hospital_name = normalize(doctor.hospital.name) if doctor.hospital_id else ''
+        documents.append(DoctorSearchDocument(
+            doctor_id=doctor.pk,
+            specialization=normalize(doctor.specialization),
+            hospital_name=hospital_name,
+            document=build_document(doctor, hospital_name),
+        ))
+    DoctorSearchDocument.objects.using(db).bulk_create(documents, batch_size=1000)
+    if schema_editor.connection.vendor == 'postgresql':
+        DoctorSearchDocument.objects.using(db).filter(search_vector__isnull=True).update(
+            search_vector=SearchVector('document', config='simple')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '0002_doctor_conditions_doctorsearchdocument_and_more'),
+        ('hospital', '0002_condition_hospital_doctor_count_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import RegexValidator
-from hospital.models import Hospital
+from hospital.models import Condition, Hospital
 
 COMMON_CONDITIONS = {
     'pulmonology': ['asthma', 'copd', 'bronchitis', 'pneumonia'],
@@ -32,6 +33,7 @@ class Doctor(models.Model):
     patients_treated = models.PositiveIntegerField(default=0)
     rating = models.FloatField(default=4.0)
     conditions_treated = models.JSONField(default=list, blank=True)
+    conditions = models.ManyToManyField(Condition, related_name='doctors', blank=True, editable=False)
     
     # Hospital relationship - allowing multiple doctors per hospital
     hospital = models.ForeignKey(
@@ -72,3 +74,60 @@ class Doctor(models.Model):
                 self.conditions_treated = list(set(self.conditions_treated + conditions))
             
         super().save(*args, **kwargs)
+
+
+class Specialization(models.Model):
+    """Catalog of doctor specializations, with counts maintained by Doctor.signals"""
+    name = models.CharField(max_length=100, unique=True)
+    doctor_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'specializations'
+        indexes = [
+            models.Index(fields=['-doctor_count', 'name']),  # Catalog reads by frequency
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class DoctorDaySlots(models.Model):
+    """
+    Free 30-minute slots of one doctor on one day, as a bitmap: bit i set
+    means the slot starting i * 30 minutes after local midnight is free.
+    Materialized on demand and kept current by Doctor.slots.
+    """
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='day_slots')
+    date = models.DateField()
+    free_mask = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'doctor_day_slots'
+        unique_together = ['doctor', 'date']
+
+    def __str__(self):
+        return f"Slots for doctor {self.doctor_id} on {self.date}"
+
+
+class DoctorSearchDocument(models.Model):
+    """
+    Normalized, denormalized search text for a doctor, kept in sync by
+    Doctor.signals. On PostgreSQL `search_vector` has a GIN index and the text
+    columns have pg_trgm GIN indexes (created by migration 0003_doctor_search_indexes).
+    """
+    doctor = models.OneToOneField(
+        Doctor,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    specialization = models.CharField(max_length=100)
+    hospital_name = models.CharField(max_length=200, blank=True)
+    document = models.TextField()  # specialization, conditions and hospital name
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        db_table = 'doctor_search_documents'
+
+    def __str__(self):
+        return f"Search document for doctor {self.doctor_id}"
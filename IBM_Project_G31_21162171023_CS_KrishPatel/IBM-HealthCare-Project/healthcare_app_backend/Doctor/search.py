@@ -0,0 +1,131 @@
+"""
+Doctor text search over the DoctorSearchDocument table.
+
+On PostgreSQL a search is answered from GIN indexes: a `tsvector` index for
+word matches and pg_trgm indexes for substring matches, so it never scans
+the doctors table; the extension and indexes are created by migration
+Doctor 0003. Other databases (SQLite in tests and local development)
+use InMemorySearchEngine, a pure-Python trigram index over the same
+documents that is rebuilt whenever the doctor or hospital generation moves.
+"""
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q, Value
+
+from healthcare_app_backend.cache_generations import DOCTOR, HOSPITAL, get_generations
+from .models import Doctor, DoctorSearchDocument
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('document', 'specialization')
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace, matching how documents are stored"""
+    return re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+
+
+def build_document(doctor, hospital_name):
+    conditions = doctor.conditions_treated or []
+    if isinstance(conditions, str):
+        conditions = conditions.split(',')
+    parts = [doctor.specialization, *conditions, hospital_name]
+    return normalize(' '.join(str(part) for part in parts if part))
+
+
+def index_doctor(doctor, using=DEFAULT_DB_ALIAS):
+    """Create or refresh the search document for one doctor"""
+    hospital_name = normalize(doctor.hospital.name) if doctor.hospital_id else ''
+    document = build_document(doctor, hospital_name)
+    fields = {
+        'specialization': normalize(doctor.specialization),
+        'hospital_name': hospital_name,
+        'document': document,
+    }
+    if connections[using].vendor == 'postgresql':
+        fields['search_vector'] = SearchVector(Value(document), config='simple')
+    DoctorSearchDocument.objects.using(using).update_or_create(doctor=doctor, defaults=fields)
+
+
+def index_doctors(doctors):
+    for doctor in doctors.select_related('hospital').iterator():
+        index_doctor(doctor, using=doctors.db)
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PostgresSearchEngine:
+    def search(self, query, field='document'):
+        query = normalize(query)
+        if not query:
+            return Doctor.objects.all()
+        # Stored text is already lowercase, so a case-sensitive LIKE can use
+        # the trigram index (UPPER(...) LIKE from icontains could not)
+        lookup = Q(**{f'search_document__{field}__contains': query})
+        if field == 'document':
+            lookup |= Q(search_document__search_vector=SearchQuery(query, config='simple'))
+        return Doctor.objects.filter(lookup)
+
+
+class InMemorySearchEngine:
+    """Pure-Python trigram index, for databases without pg_trgm"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._texts = {}
+        self._grams = {}
+
+    def _refresh(self):
+        version = tuple(get_generations(DOCTOR, HOSPITAL).values())
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            texts = {field: {} for field in SEARCH_FIELDS}
+            grams = {field: defaultdict(set) for field in SEARCH_FIELDS}
+            for row in DoctorSearchDocument.objects.values('doctor_id', *SEARCH_FIELDS).iterator():
+                for field in SEARCH_FIELDS:
+                    texts[field][row['doctor_id']] = row[field]
+                    for gram in _trigrams(row[field]):
+                        grams[field][gram].add(row['doctor_id'])
+            self._texts, self._grams, self._version = texts, grams, version
+
+    def matching_ids(self, query, field='document'):
+        self._refresh()
+        texts = self._texts[field]
+        query_grams = _trigrams(query)
+        if query_grams:
+            candidates = set.intersection(*(self._grams[field].get(gram, set()) for gram in query_grams))
+        else:
+            candidates = texts.keys()
+        return [doctor_id for doctor_id in candidates if query in texts[doctor_id]]
+
+    def search(self, query, field='document'):
+        query = normalize(query)
+        if not query:
+            return Doctor.objects.all()
+        return Doctor.objects.filter(pk__in=self.matching_ids(query, field))
+
+
+_engines = {}
+
+
+def get_search_engine():
+    vendor = connection.vendor
+    if vendor not in _engines:
+        _engines[vendor] = PostgresSearchEngine() if vendor == 'postgresql' else InMemorySearchEngine()
+    return _engines[vendor]
+
+
+def search_doctors(query, field='document'):
+    """Doctors whose search `field` ('document' or 'specialization') matches `query`"""
+    return get_search_engine().search(query, field)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.core.validators import RegexValidator
 from hospital.models import Hospital
+from healthcare_app_backend.serializer_joins import JoinPlanningMixin
 from user_management.models import Appointment
 from .models import Doctor
 
@@ -79,7 +80,7 @@ class DoctorRegistrationSerializer(serializers.ModelSerializer):
         validated_data['hospital'] = hospital
         return Doctor.objects.create(**validated_data)
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(JoinPlanningMixin, serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.name', read_only=True)
     user_name = serializers.CharField(source='user.name', read_only=True)
     hospital_name = serializers.CharField(source='doctor.hospital.name', read_only=True)
@@ -0,0 +1,102 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from healthcare_app_backend.cache_generations import DOCTOR, SEARCH, bump_generation
+from hospital.models import Hospital
+from user_management.models import Appointment, SearchEvent
+from .catalog import adjust_specialization
+from .feeds import appointment_deleted, appointment_saved
+from .models import Doctor
+from .search import index_doctor, index_doctors, normalize
+from .slots import apply_booking, invalidate_doctor_slots, release_booking
+
+
+@receiver(pre_save, sender=Doctor)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    """Snapshot the stored values that denormalized data is derived from"""
+    previous = None
+    if instance.pk and not raw:
+        previous = Doctor.objects.filter(pk=instance.pk).values(
+            'hospital_id', 'specialization', 'availability'
+        ).first()
+    previous = previous or {}
+    instance._previous_hospital_id = previous.get('hospital_id')
+    instance._previous_specialization = previous.get('specialization')
+    instance._previous_availability = previous.get('availability')
+
+
+@receiver(post_save, sender=Doctor)
+def update_specialization_catalog(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_specialization', None)
+    if raw or previous == instance.specialization:
+        return
+    adjust_specialization(instance.specialization, 1)
+    adjust_specialization(previous, -1)
+
+
+@receiver(post_delete, sender=Doctor)
+def release_specialization(sender, instance, **kwargs):
+    adjust_specialization(instance.specialization, -1)
+
+
+@receiver(post_save, sender=Doctor)
+def reschedule_slots(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created and getattr(instance, '_previous_availability', None) != instance.availability:
+        invalidate_doctor_slots(instance.pk)
+
+
+@receiver(post_save, sender=Appointment)
+def update_slots_on_booking(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        apply_booking(instance)
+    else:
+        # The previous date is unknown, so rebuild every materialized day
+        invalidate_doctor_slots(instance.doctor_id)
+
+
+@receiver(post_delete, sender=Appointment)
+def update_slots_on_cancellation(sender, instance, **kwargs):
+    release_booking(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def update_feed_on_booking(sender, instance, raw=False, **kwargs):
+    if not raw:
+        appointment_saved(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+def update_feed_on_cancellation(sender, instance, **kwargs):
+    appointment_deleted(instance)
+
+
+# Registered before the invalidation receiver so the search document is
+# current by the time the new generation becomes visible.
+@receiver(post_save, sender=Doctor)
+def update_search_document(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        index_doctor(instance, using=using)
+
+
+@receiver(post_save, sender=Hospital)
+def update_hospital_search_documents(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    stale = Doctor.objects.using(using).filter(hospital=instance).exclude(
+        search_document__hospital_name=normalize(instance.name)
+    )
+    index_doctors(stale)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_doctor_listings(sender, instance, **kwargs):
+    bump_generation(DOCTOR)
+
+
+@receiver(post_save, sender=SearchEvent)
+def invalidate_search_popularity(sender, instance, created=False, **kwargs):
+    if created:
+        bump_generation(SEARCH)
@@ -0,0 +1,241 @@
+"""
+Slot-based availability.
+
+A doctor's free-text `availability` ("10 AM - 7 PM", "Mon-Fri 9:30 AM - 5 PM,
+Sat 10 AM - 1 PM") is parsed into a weekly schedule of working-slot bitmaps.
+Free slots per doctor per day are materialized in DoctorDaySlots as
+`working & ~booked`, where a slot counts as booked under the same +/-30
+minute rule that Doctor.booking uses to reject conflicts. Bookings clear
+their bits in place; cancellations and schedule changes drop the affected
+rows, which are rebuilt on the next read.
+"""
+import heapq
+import logging
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from user_management.models import Appointment
+from .booking import APPOINTMENT_DURATION
+from .models import Doctor, DoctorDaySlots
+
+logger = logging.getLogger(__name__)
+
+SLOT_MINUTES = int(APPOINTMENT_DURATION.total_seconds() // 60)
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DEFAULT_AVAILABILITY = "10 AM - 7 PM"
+
+_DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+_DAY = r'(mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?'
+_DAYS_RE = re.compile(rf'\b{_DAY}(?:\s*(?:-|–|to)\s*{_DAY})?', re.I)
+_TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?m?\.?'
+_WINDOW_RE = re.compile(rf'{_TIME}\s*(?:-|–|to)\s*{_TIME}', re.I)
+
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+    return hour * 60 + minute
+
+
+def _window_mask(start, end):
+    """Bits for the slots that fit entirely within [start, end) minutes"""
+    mask = 0
+    for i in range(SLOTS_PER_DAY):
+        if start <= i * SLOT_MINUTES and (i + 1) * SLOT_MINUTES <= end:
+            mask |= 1 << i
+    return mask
+
+
+def _parse_days(text):
+    days = set()
+    for first, last in _DAYS_RE.findall(text):
+        start = _DAY_NAMES.index(first.lower())
+        end = _DAY_NAMES.index(last.lower()) if last else start
+        span = (end - start) % 7
+        days.update((start + offset) % 7 for offset in range(span + 1))
+    return days
+
+
+@lru_cache(maxsize=1024)
+def parse_weekly_schedule(availability):
+    """
+    Parse an availability string into a 7-tuple of working-slot bitmaps,
+    Monday first. Parts without day names apply to every day; an
+    unparseable string falls back to DEFAULT_AVAILABILITY.
+    """
+    week = [0] * 7
+    found = False
+    for part in re.split(r'[,;\n]', availability or ''):
+        days = _parse_days(part) or set(range(7))
+        for h1, m1, mer1, h2, m2, mer2 in _WINDOW_RE.findall(_DAYS_RE.sub(' ', part)):
+            start = _minutes(h1, m1, mer1 or mer2)
+            end = _minutes(h2, m2, mer2)
+            if not mer1 and mer2 and start > end:  # "9-5 PM"
+                start = _minutes(h1, m1, 'a')
+            if end <= start:
+                continue
+            found = True
+            for day in days:
+                week[day] |= _window_mask(start, end)
+    if not found:
+        if availability != DEFAULT_AVAILABILITY:
+            logger.warning(f"Unparseable availability {availability!r}, using {DEFAULT_AVAILABILITY!r}")
+            return parse_weekly_schedule(DEFAULT_AVAILABILITY)
+    return tuple(week)
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+def _blocked_by(appointment_date, day):
+    """Bits of `day` that an appointment at `appointment_date` makes unbookable"""
+    offset = (appointment_date - _midnight(day)).total_seconds() / 60
+    first = max(0, -(-(offset - SLOT_MINUTES) // SLOT_MINUTES))
+    last = min(SLOTS_PER_DAY - 1, (offset + SLOT_MINUTES) // SLOT_MINUTES)
+    mask = 0
+    for i in range(int(first), int(last) + 1):
+        mask |= 1 << i
+    return mask
+
+
+def _affected_days(appointment_date):
+    local = timezone.localtime(appointment_date)
+    return sorted({
+        (local - APPOINTMENT_DURATION).date(),
+        (local + APPOINTMENT_DURATION).date(),
+    })
+
+
+def _stored_masks(doctor_ids, days):
+    return {
+        (doctor_id, day): mask
+        for doctor_id, day, mask in DoctorDaySlots.objects.filter(
+            doctor_id__in=doctor_ids, date__in=days
+        ).values_list('doctor_id', 'date', 'free_mask')
+    }
+
+
+def _materialize(doctors, days):
+    """
+    Return {(doctor_id, date): free_mask} for every doctor and day (a sorted
+    list of dates), computing and storing the rows that do not exist yet.
+    Stored rows are read without locks; only doctors with missing rows are
+    locked while theirs are built.
+    """
+    masks = _stored_masks([doctor.pk for doctor in doctors], days)
+    missing = [doctor for doctor in doctors if any((doctor.pk, day) not in masks for day in days)]
+    if not missing:
+        return masks
+
+    doctor_ids = [doctor.pk for doctor in missing]
+    with transaction.atomic():
+        # Same per-doctor locks as booking (taken in pk order), so no booking
+        # lands between reading the appointments and storing the bitmaps.
+        list(Doctor.objects.select_for_update().filter(pk__in=doctor_ids).order_by('pk').values_list('pk'))
+        masks.update(_stored_masks(doctor_ids, days))  # Rows another request built meanwhile
+        booked = {
+            (doctor.pk, day): 0 for doctor in missing for day in days if (doctor.pk, day) not in masks
+        }
+        if not booked:
+            return masks
+
+        appointments = Appointment.objects.filter(
+            doctor_id__in={doctor_id for doctor_id, _ in booked},
+            appointment_date__range=(
+                _midnight(days[0]) - APPOINTMENT_DURATION,
+                _midnight(days[-1] + timedelta(days=1)) + APPOINTMENT_DURATION,
+            )
+        ).values_list('doctor_id', 'appointment_date')
+        for doctor_id, appointment_date in appointments:
+            for day in _affected_days(appointment_date):
+                if (doctor_id, day) in booked:
+                    booked[doctor_id, day] |= _blocked_by(appointment_date, day)
+
+        availability = {doctor.pk: doctor.availability for doctor in missing}
+        rows = [
+            DoctorDaySlots(
+                doctor_id=doctor_id, date=day,
+                free_mask=parse_weekly_schedule(availability[doctor_id])[day.weekday()] & ~mask
+            )
+            for (doctor_id, day), mask in booked.items()
+        ]
+        DoctorDaySlots.objects.bulk_create(rows, ignore_conflicts=True)
+        DoctorDaySlots.objects.filter(doctor_id__in=doctor_ids, date__lt=timezone.localdate()).delete()
+        masks.update(((row.doctor_id, row.date), row.free_mask) for row in rows)
+        return masks
+
+
+def _day_slots(day, mask):
+    midnight = _midnight(day)
+    return (midnight + timedelta(minutes=i * SLOT_MINUTES) for i in range(SLOTS_PER_DAY) if mask >> i & 1)
+
+
+def free_slots(doctor, start, days):
+    """{date: [slot start datetimes]} of free slots from `start` for `days` days"""
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    masks = _materialize([doctor], dates)
+
+    now = timezone.now()
+    return {
+        day: [slot for slot in _day_slots(day, masks[doctor.pk, day]) if slot > now]
+        for day in dates
+    }
+
+
+def earliest_free_slots(doctors, start, end, limit=10, per_doctor=1):
+    """
+    The `limit` earliest free slots in [start, end) across `doctors`, at most
+    `per_doctor` each, as (slot, doctor) pairs. Ties go to the doctor listed
+    first. Every doctor's slots are already in time order, so one heap merge
+    over lazy per-doctor streams finds the answer without sorting them all.
+    """
+    start = max(start, timezone.now())
+    if not doctors or start >= end:
+        return []
+    first_day, last_day = timezone.localtime(start).date(), timezone.localtime(end).date()
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+    masks = _materialize(doctors, days)
+
+    def stream(rank, doctor):
+        for day in days:
+            for slot in _day_slots(day, masks[doctor.pk, day]):
+                if start <= slot < end:
+                    yield slot, rank, doctor
+
+    taken = {}
+    results = []
+    for slot, _, doctor in heapq.merge(*(stream(rank, doctor) for rank, doctor in enumerate(doctors))):
+        if taken.get(doctor.pk, 0) >= per_doctor:
+            continue
+        taken[doctor.pk] = taken.get(doctor.pk, 0) + 1
+        results.append((slot, doctor))
+        if len(results) >= min(limit, per_doctor * len(doctors)):
+            break
+    return results
+
+
+def apply_booking(appointment):
+    """Clear the slots a new appointment blocks in any materialized rows"""
+    for day in _affected_days(appointment.appointment_date):
+        blocked = _blocked_by(appointment.appointment_date, day)
+        DoctorDaySlots.objects.filter(doctor_id=appointment.doctor_id, date=day).update(
+            free_mask=F('free_mask').bitand(~blocked)
+        )
+
+
+def release_booking(appointment):
+    """Drop the rows a cancelled appointment touched; they are rebuilt on read"""
+    DoctorDaySlots.objects.filter(
+        doctor_id=appointment.doctor_id, date__in=_affected_days(appointment.appointment_date)
+    ).delete()
+
+
+def invalidate_doctor_slots(doctor_id):
+    DoctorDaySlots.objects.filter(doctor_id=doctor_id).delete()
@@ -1,3 +1,589 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from unittest import mock, skipUnless
 
-# Create your tests here. 
\ No newline at end of file
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from healthcare_app_backend import tracing
+from healthcare_app_backend.cache_backends import TieredCache
+from healthcare_app_backend.db_router import ReplicaPinMiddleware, _pin_key
+from healthcare_app_backend.pagination import KeysetPagination
+from recommendation_system import benchmark
+from recommendation_system.doctor_recommender import DoctorRecommender
+from hospital.models import Condition, Hospital
+from user_management.models import SearchEvent, SearchQueryCount, User, UserSearch
+from . import views
+from .autocomplete import suggestion_index
+from .booking import book
+from .catalog import refresh_specialization_counts, specialization_catalog
+from .models import COMMON_CONDITIONS, Doctor, DoctorDaySlots, Specialization
+from .search import search_doctors
+from .serializers import AppointmentSerializer
+from .slots import earliest_free_slots, parse_weekly_schedule
+
+
+def create_hospital(**kwargs):
+    defaults = dict(
+        name='City Hospital', specialization='General', address='Ahmedabad',
+        latitude=23.02, longitude=72.57, available_beds=10, diseases_treated=[]
+    )
+    defaults.update(kwargs)
+    with mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None)):
+        return Hospital.objects.create(**defaults)
+
+
+def bad_cursor(*values):
+    """A well-formed cursor whose values have the wrong types"""
+    return KeysetPagination().encode_cursor(list(values))
+
+
+def create_doctor(hospital, **kwargs):
+    defaults = dict(name='Test Doctor', mobile_number='9000000000', specialization='Cardiology')
+    defaults.update(kwargs)
+    return Doctor.objects.create(hospital=hospital, **defaults)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        params = {'OPTIONS': {'SHARED_ALIAS': 'shared', 'L1_TIMEOUT': 60}}
+        # Two caches over the same L2 stand in for two worker processes
+        self.worker_a = TieredCache(None, params)
+        self.worker_b = TieredCache(None, params)
+
+    def test_write_on_one_worker_is_seen_by_the_other(self):
+        self.worker_a.set('doctors_all', ['old'])
+        self.assertEqual(self.worker_b.get('doctors_all'), ['old'])
+
+        self.worker_b.set('doctors_all', ['new'])
+        self.assertEqual(self.worker_a.get('doctors_all'), ['new'])
+
+    def test_delete_on_one_worker_clears_the_other(self):
+        self.worker_a.set('doctors_all', ['old'])
+        self.assertEqual(self.worker_b.get('doctors_all'), ['old'])
+
+        self.worker_a.delete('doctors_all')
+        self.assertIsNone(self.worker_b.get('doctors_all'))
+
+    def test_hit_is_served_from_local_tier(self):
+        self.worker_a.set('doctors_all', ['cached'])
+        caches['shared'].set('doctors_all', ('stale-token', ['from l2']))
+        self.assertEqual(self.worker_a.get('doctors_all'), ['cached'])
+
+
+class ListAllDoctorsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        hospital = create_hospital()
+        self.doctors = [
+            create_doctor(hospital, name=f'Doctor {i}', mobile_number=f'900000000{i}')
+            for i in range(5)
+        ]
+
+    def test_pages_follow_cursor_with_one_query_each(self):
+        # The total is counted once, then cached with the pages
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/list-all-doctors/?limit=3')
+        first = response.json()
+        self.assertEqual([d['id'] for d in first['doctors']], [d.id for d in self.doctors[:3]])
+        self.assertEqual(first['doctors'][0]['hospital']['name'], 'City Hospital')
+        self.assertEqual((first['count'], first['page_count']), (5, 3))
+        self.assertNotIn('next', first)  # the next page is only in the Link header
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response['Link'][1:].split('>')[0])
+        second = response.json()
+        self.assertEqual([d['id'] for d in second['doctors']], [d.id for d in self.doctors[3:]])
+        self.assertEqual((second['count'], second['page_count']), (5, 2))
+        self.assertFalse(response.has_header('Link'))
+
+    def test_cursor_with_wrong_value_types_is_rejected(self):
+        response = self.client.get('/api/list-all-doctors/', {'cursor': bad_cursor('x', 'y')})
+        self.assertEqual(response.status_code, 400)
+
+    def test_doctors_cursor_with_wrong_value_types_is_rejected(self):
+        response = self.client.get('/api/doctors/', {'cursor': bad_cursor('x', 'y')})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+    def test_field_selection(self):
+        data = self.client.get('/api/list-all-doctors/?fields=id,name').json()
+        self.assertEqual(set(data['doctors'][0]), {'id', 'name'})
+
+    def test_conditional_get_until_a_doctor_changes(self):
+        response = self.client.get('/api/list-all-doctors/')
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get('/api/list-all-doctors/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.doctors[0].rating = 5.0
+        self.doctors[0].save()
+        self.assertEqual(self.client.get('/api/list-all-doctors/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stream_returns_every_doctor(self):
+        response = self.client.get('/api/list-all-doctors/?stream=1&limit=2')
+        doctors = json.loads(b''.join(response.streaming_content))['doctors']
+        self.assertEqual(len(doctors), 5)
+        self.assertEqual(doctors[0]['hospital']['name'], 'City Hospital')
+
+
+class DoctorSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hospital = create_hospital(name='Sunrise Clinic')
+        self.cardiologist = create_doctor(self.hospital, name='Heart', specialization='Cardiology')
+        self.dermatologist = create_doctor(self.hospital, name='Skin', specialization='Dermatology')
+
+    def test_search_document_follows_doctor_and_hospital(self):
+        self.assertEqual(
+            set(search_doctors('arrhythmia')), {self.cardiologist}
+        )
+        self.assertEqual(set(search_doctors('sunrise')), {self.cardiologist, self.dermatologist})
+
+        self.hospital.name = 'Moonlight Clinic'
+        with mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None)):
+            self.hospital.save()
+        self.assertFalse(search_doctors('sunrise').exists())
+        self.assertEqual(search_doctors('moonlight').count(), 2)
+
+    def test_specialization_filter_uses_search_field(self):
+        response = self.client.get('/api/doctors/?specialization=derma')
+        self.assertEqual([d['id'] for d in response.json()], [self.dermatologist.id])
+
+
+class CatalogTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.hospital = create_hospital(diseases_treated=['asthma'])
+
+    def test_catalogs_follow_doctor_writes(self):
+        first = create_doctor(self.hospital, specialization='Dermatology', conditions_treated=['rash'])
+        create_doctor(self.hospital, specialization='Neurology', conditions_treated=['rash'])
+        create_doctor(self.hospital, specialization='Neurology')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(specialization_catalog(), ['Neurology', 'Dermatology'])
+        self.assertEqual(Condition.objects.get(name='rash').doctor_count, 2)
+
+        first.specialization = 'Neurology'
+        first.conditions_treated = []
+        first.save()
+        self.assertEqual(specialization_catalog(), ['Neurology'])
+        self.assertEqual(Condition.objects.get(name='rash').doctor_count, 1)
+
+        first.delete()
+        self.assertEqual(Specialization.objects.get(name='Neurology').doctor_count, 2)
+        self.assertEqual(self.client.get('/api/specialization-options/').json(), ['Neurology'])
+
+    def test_hospital_delete_releases_conditions(self):
+        self.assertEqual(Condition.objects.get(name='asthma').hospital_count, 1)
+        self.hospital.delete()
+        self.assertEqual(Condition.objects.get(name='asthma').hospital_count, 0)
+
+    def test_refresh_uses_the_given_database(self):
+        create_doctor(self.hospital, specialization='Neurology')
+        Specialization.objects.using('replica').create(name='Neurology', doctor_count=5)
+        refresh_specialization_counts(using='replica')
+        self.assertEqual(Specialization.objects.using('replica').get(name='Neurology').doctor_count, 0)
+        self.assertEqual(Specialization.objects.get(name='Neurology').doctor_count, 1)
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_SECONDS=0)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        suggestion_index.__init__()
+        hospital = create_hospital()
+        create_doctor(hospital, specialization='Cardiology')
+
+    def test_prefix_suggestions_ranked_by_searches(self):
+        response = self.client.get('/api/autocomplete/?q=Ar')
+        self.assertEqual(
+            [s['text'] for s in response.json()['suggestions']], ['arrhythmia', 'arthritis']
+        )
+
+        user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999'
+        )
+        SearchEvent.objects.create(query='Arthritis')
+
+        suggestions = self.client.get('/api/autocomplete/?q=ar').json()['suggestions']
+        self.assertEqual(suggestions[0], {'text': 'arthritis', 'type': 'condition'})
+
+    def test_repeat_searches_count_towards_popularity(self):
+        user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post('/api/save-search/', {'query': 'Arthritis'})
+        client.post('/api/save-search/', {'query': 'Arrhythmia'})
+        self.client.get('/api/autocomplete/?q=ar')
+        client.post('/api/save-search/', {'query': 'Arthritis'})  # Reuses the saved row
+
+        self.assertEqual(UserSearch.objects.filter(user=user).count(), 2)
+        suggestions = self.client.get('/api/autocomplete/?q=ar').json()['suggestions']
+        self.assertEqual(suggestions[0], {'text': 'arthritis', 'type': 'condition'})
+
+    def test_events_committed_out_of_id_order_are_counted_once(self):
+        SearchEvent.objects.create(id=100, query='Arrhythmia')
+        self.client.get('/api/autocomplete/?q=ar')
+        # Lower ids becoming visible after a higher one, as with concurrent commits
+        SearchEvent.objects.create(id=50, query='Arthritis')
+        SearchEvent.objects.create(id=51, query='Arthritis')
+        self.client.get('/api/autocomplete/?q=ar')
+        SearchEvent.objects.create(id=101, query='Asthma')
+
+        suggestions = self.client.get('/api/autocomplete/?q=ar').json()['suggestions']
+        self.assertEqual(suggestions[0], {'text': 'arthritis', 'type': 'condition'})
+        self.assertEqual(suggestion_index._searches['arthritis'], 2)
+        self.assertEqual(suggestion_index._searches['arrhythmia'], 1)
+
+    def test_pruned_counts_are_loaded_with_recent_events(self):
+        SearchQueryCount.objects.create(query='Arrhythmia', count=2)
+        SearchEvent.objects.create(query='Arthritis')
+        SearchEvent.objects.create(query='Arrhythmia')
+
+        suggestions = self.client.get('/api/autocomplete/?q=ar').json()['suggestions']
+        self.assertEqual(suggestions[0], {'text': 'arrhythmia', 'type': 'condition'})
+        self.assertEqual(suggestion_index._searches['arrhythmia'], 3)
+
+    def test_lookup_skips_database(self):
+        suggestion_index.refresh(force=True)
+        with self.settings(AUTOCOMPLETE_REFRESH_SECONDS=60), self.assertNumQueries(0):
+            suggestions = suggestion_index.suggest('card')
+        self.assertEqual(suggestions[0], {'text': 'Cardiology', 'type': 'specialization'})
+
+
+class BookingTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor(create_hospital())
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999', is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, when):
+        return self.client.post(
+            '/api/book-appointment/', {'doctor_id': self.doctor.id, 'appointment_date': when}
+        )
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self.book('2030-01-01T10:00:00Z').status_code, 201)
+        self.assertEqual(self.book('2030-01-01T10:20:00Z').status_code, 400)
+        self.assertEqual(self.book('2030-01-01T10:31:00Z').status_code, 201)
+
+        response = self.client.get(
+            '/api/check-appointment-conflict/',
+            {'doctor_id': self.doctor.id, 'appointment_date': '2030-01-01T09:45:00Z'}
+        )
+        self.assertTrue(response.data['has_conflict'])
+
+    def test_feed_is_updated_write_through(self):
+        cache.clear()
+        self.assertEqual(self.client.get('/api/user-appointments/').data, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book('2030-01-02T10:00:00Z')
+            self.book('2030-01-01T10:00:00Z')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/user-appointments/', {'limit': 1})
+        self.assertEqual(response.data[0]['appointment_date'], '2030-01-01T10:00:00Z')
+        self.assertEqual(response.data[0]['hospital_name'], 'City Hospital')
+
+        with self.assertNumQueries(0):
+            response = self.client.get(response['Link'][1:].split('>')[0])
+        self.assertEqual(response.data[0]['appointment_date'], '2030-01-02T10:00:00Z')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.appointments.order_by('appointment_date').first().delete()
+        response = self.client.get('/api/user-appointments/')
+        self.assertEqual([a['appointment_date'] for a in response.data], ['2030-01-02T10:00:00Z'])
+
+    def test_user_appointments_cursor_with_wrong_value_types_is_rejected(self):
+        response = self.client.get('/api/user-appointments/', {'cursor': bad_cursor('notadate', 1)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_appointment_listing_query_count_is_constant(self):
+        self.assertEqual(AppointmentSerializer.required_joins(), (('doctor__hospital', 'user'), ()))
+        for day in range(1, 6):
+            other = create_doctor(create_hospital(name=f'Hospital {day}'), mobile_number=f'900000000{day}')
+            book(other.id, self.user, parse_datetime(f'2030-01-0{day}T10:00:00Z'))
+
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/user-appointments/')
+        self.assertEqual(
+            [a['hospital_name'] for a in response.data], [f'Hospital {day}' for day in range(1, 6)]
+        )
+
+
+class SlotAvailabilityTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor(create_hospital(), availability='Mon-Fri 10 AM - 12 PM')
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999', is_active=True
+        )
+
+    def free_times(self, day):
+        response = self.client.get(f'/api/doctor-slots/{self.doctor.id}/', {'start': day, 'days': 1})
+        return [slot[11:16] for slot in response.json()['days'][0]['free_slots']]
+
+    def test_weekly_schedule_parsing(self):
+        schedule = parse_weekly_schedule('Mon-Fri 9:30 AM - 11 AM, Sat 9-11')
+        self.assertEqual(schedule[0], 0b111 << 19)
+        self.assertEqual(schedule[5], 0b1111 << 18)
+        self.assertEqual(schedule[6], 0)
+
+    def test_bookings_update_materialized_slots(self):
+        # 2030-01-07 is a Monday, 2030-01-06 a Sunday
+        self.assertEqual(self.free_times('2030-01-06'), [])
+        self.assertEqual(self.free_times('2030-01-07'), ['10:00', '10:30', '11:00', '11:30'])
+
+        appointment = book(self.doctor.id, self.user, parse_datetime('2030-01-07T11:30:00Z'))
+        self.assertEqual(DoctorDaySlots.objects.get(date='2030-01-07').free_mask, 0b11 << 20)
+        self.assertEqual(self.free_times('2030-01-07'), ['10:00', '10:30'])
+
+        appointment.delete()
+        self.assertEqual(self.free_times('2030-01-07'), ['10:00', '10:30', '11:00', '11:30'])
+
+    def test_earliest_slots_merge_across_doctors(self):
+        hospital = self.doctor.hospital
+        early = create_doctor(hospital, name='Early', availability='9 AM - 10 AM')
+        late = create_doctor(hospital, name='Late', availability='1 PM - 2 PM')
+        start, end = parse_datetime('2030-01-07T00:00:00Z'), parse_datetime('2030-01-09T00:00:00Z')
+        book(early.id, self.user, parse_datetime('2030-01-07T09:00:00Z'))
+
+        with mock.patch('Doctor.slots.timezone.now', return_value=start):
+            slots = earliest_free_slots([late, self.doctor, early], start, end, limit=3)
+        self.assertEqual(
+            [(slot.isoformat(), doctor.name) for slot, doctor in slots],
+            [
+                ('2030-01-07T10:00:00+00:00', 'Test Doctor'),
+                ('2030-01-07T13:00:00+00:00', 'Late'),
+                ('2030-01-08T09:00:00+00:00', 'Early'),
+            ]
+        )
+
+
+    def test_materialized_slots_are_read_without_locking(self):
+        start, end = parse_datetime('2030-01-07T00:00:00Z'), parse_datetime('2030-01-09T00:00:00Z')
+        other = create_doctor(self.doctor.hospital, name='Other', mobile_number='9000000002')
+        with mock.patch('Doctor.slots.timezone.now', return_value=start):
+            earliest_free_slots([self.doctor], start, end)
+            # Only the doctor without rows is locked and built
+            with CaptureQueriesContext(connection) as queries:
+                earliest_free_slots([self.doctor, other], start, end)
+            locks = [q['sql'] for q in queries if q['sql'].startswith('SELECT "doctors"."id"')]
+            self.assertEqual(len(locks), 1)
+            self.assertIn(f'IN ({other.pk})', locks[0])
+            with self.assertNumQueries(1):
+                earliest_free_slots([self.doctor, other], start, end)
+
+    @mock.patch('Doctor.views._location_recommender', (None, None))
+    def test_location_recommender_is_refitted_only_after_changes(self):
+        cache.clear()
+        with mock.patch('Doctor.views._fit_location_recommender', side_effect=lambda: object()) as fit:
+            first = views.get_location_recommender()
+            self.assertIs(views.get_location_recommender(), first)
+            self.assertEqual(fit.call_count, 1)
+
+            self.doctor.rating = 4.5
+            self.doctor.save()
+            self.assertIsNot(views.get_location_recommender(), first)
+            self.assertEqual(fit.call_count, 2)
+
+
+
+class DoctorAppointmentsTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor(create_hospital(), mobile_number='9000000001')
+        self.doctor_user = User.objects.create_user(
+            email='doctor@example.com', password='secret123', name='Doctor',
+            mobile_number='9000000001', role='doctor', is_active=True
+        )
+        patient = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999', is_active=True
+        )
+        for when in ('2020-01-01T10:00:00Z', '2030-01-01T10:00:00Z', '2030-01-02T10:00:00Z'):
+            book(self.doctor.id, patient, parse_datetime(when))
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor_user)
+
+    def test_unlinked_doctor_is_linked_on_first_request(self):
+        response = self.client.get('/api/doctor-appointments/')
+        self.assertEqual([a['status'] for a in response.data], ['Past', 'Upcoming', 'Upcoming'])
+        self.assertEqual(response.data[0]['user_email'], 'patient@example.com')
+        self.doctor_user.refresh_from_db()
+        self.assertEqual(self.doctor_user.doctor_profile_id, self.doctor.id)
+
+        # Linked: doctor id from the user row, then one query for the page
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/doctor-appointments/', {'from': '2030-01-02'})
+        self.assertEqual(len(response.data), 1)
+
+    def test_shared_mobile_number_is_not_linked(self):
+        create_doctor(self.doctor.hospital, name='Namesake', mobile_number='9000000001')
+        with self.assertLogs('Doctor.views', 'WARNING'):
+            response = self.client.get('/api/doctor-appointments/')
+        self.assertEqual(response.status_code, 409)
+        self.doctor_user.refresh_from_db()
+        self.assertIsNone(self.doctor_user.doctor_profile_id)
+
+        response = self.client.get(f'/api/doctor-profile/{self.doctor_user.email}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Doctor.objects.filter(mobile_number='9000000001').count(), 2)
+
+    def test_cursor_with_wrong_value_types_is_rejected(self):
+        response = self.client.get('/api/doctor-appointments/', {'cursor': bad_cursor('notadate', 1)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+
+    def test_counts_per_status(self):
+        response = self.client.get('/api/doctor-appointments/counts/')
+        self.assertEqual(response.data, {'total': 3, 'upcoming': 2, 'past': 1})
+
+        response = self.client.get('/api/doctor-appointments/counts/', {'status': 'past'})
+        self.assertEqual(response.data['total'], 1)
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tracing.reset()
+        create_doctor(create_hospital())
+
+    def test_requests_are_counted_and_exported(self):
+        miss = self.client.get('/api/doctors/')
+        hit = self.client.get('/api/doctors/')
+        self.assertIn('desc="1 queries"', miss['Server-Timing'])
+        self.assertIn('desc="0 queries"', hit['Server-Timing'])
+
+        metrics = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            'healthcare_http_requests_total{method="GET",route="api/doctors/",status="200"} 2\n', metrics
+        )
+        self.assertIn('healthcare_cache_lookups_total{result="l1"}', metrics)
+        self.assertIn('healthcare_http_request_db_queries_bucket{method="GET",route="api/doctors/",le="1"} 2\n', metrics)
+
+    async def test_async_requests_are_traced(self):
+        async def view(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(tracing.TracingMiddleware(view)))
+
+        response = await self.async_client.get('/api/doctors/')
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_sampled_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(TRACING={'PROFILE_SAMPLE_RATE': 1.0, 'PROFILE_DIR': directory}):
+                self.client.get('/api/doctors/')
+            self.assertEqual(len([f for f in os.listdir(directory) if f.endswith('.prof')]), 1)
+
+
+class RecommenderBenchmarkTests(TestCase):
+    def test_synthetic_catalog(self):
+        doctors, hospitals = benchmark.generate_catalog(400, COMMON_CONDITIONS, seed=7)
+        self.assertEqual((len(doctors), len(hospitals)), (400, 20))
+        self.assertEqual(doctors, benchmark.generate_catalog(400, COMMON_CONDITIONS, seed=7)[0])
+        for doctor in doctors:
+            self.assertTrue(8.0 <= doctor['latitude'] <= 35.5 and 68.0 <= doctor['longitude'] <= 97.5)
+            self.assertTrue(set(COMMON_CONDITIONS[doctor['specialization'].lower()]) <= set(doctor['conditions_treated']))
+
+    # NLTK corpora may be missing, so the text preprocessing is stubbed out
+    @mock.patch('recommendation_system.doctor_recommender.word_tokenize', str.split)
+    @mock.patch('recommendation_system.doctor_recommender.WordNetLemmatizer',
+                mock.Mock(return_value=mock.Mock(lemmatize=lambda token: token)))
+    @mock.patch('recommendation_system.doctor_recommender.stopwords', mock.Mock(words=lambda language: ['the', 'a']))
+    def test_doctor_recommender_ranks_a_synthetic_catalog(self):
+        doctors, _ = benchmark.generate_catalog(300, COMMON_CONDITIONS, seed=3)
+
+        recommender = DoctorRecommender(n_estimators=10)
+        recommender.fit(doctors)
+        results = recommender.recommend_doctors('asthma', limit=5)
+        self.assertEqual(len(results), 5)
+        scores = [r['relevance_score'] for r in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertTrue(all('asthma' in r['matched_conditions'] for r in results[:1]))
+
+        pulmonologists = recommender.recommend_doctors('asthma', specialization='Pulmonology', limit=3)
+        self.assertTrue(pulmonologists)
+        self.assertEqual({r['specialization'] for r in pulmonologists}, {'Pulmonology'})
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'1000': {'fit': benchmark.summarize([0.10, 0.10])}}}
+        current = {'results': {'1000': {'fit': benchmark.summarize([0.13, 0.13])}}}
+        self.assertEqual(benchmark.compare(baseline, current, 0.5), [])
+        self.assertEqual(len(benchmark.compare(baseline, current, 0.2)), 1)
+
+
+@skipUnless('replica' in settings.DATABASES, "needs a second database alias named 'replica'")
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        # Written to the primary only, so the replica looks like it lags
+        self.doctor = create_doctor(create_hospital())
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999', is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_stay_on_primary_after_writes(self):
+        detail = f'/api/doctor_details/{self.doctor.id}/'
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+        # The doctor generation just moved, so the listing reads the primary
+        self.assertEqual(len(self.client.get('/api/doctors/').json()), 1)
+
+        response = self.client.post(
+            '/api/book-appointment/', {'doctor_id': self.doctor.id, 'appointment_date': '2030-01-01T10:00:00Z'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(detail).status_code, 200)
+
+    @mock.patch('healthcare_app_backend.db_router._recently_changed', return_value=False)
+    def test_async_listing_keeps_pinned_bearer_users_on_primary(self, _changed):
+        self.assertEqual(self.client.get('/api/doctors/').json(), [])  # replica
+
+        cache.clear()  # Drop the cached listing
+        cache.set(_pin_key(self.user.pk), True)
+        token = AccessToken.for_user(self.user)
+        client = APIClient()
+        response = client.get('/api/doctors/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(len(response.json()), 1)
+
+    def test_async_middleware_pins_writers(self):
+        async def view(request):
+            await sync_to_async(User.objects.filter(pk=self.user.pk).update)(name='Renamed')
+            return HttpResponse()
+
+        middleware = ReplicaPinMiddleware(view)
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        request.user = AnonymousUser()
+        async_to_sync(middleware)(request)
+        self.assertTrue(cache.get(_pin_key(self.user.pk)))
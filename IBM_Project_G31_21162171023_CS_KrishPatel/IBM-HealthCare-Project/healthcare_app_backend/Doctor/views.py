@@ -1,25 +1,44 @@
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.cache import cache
 from .models import Doctor
 from .serializers import DoctorSerializer, DoctorRegistrationSerializer, AppointmentSerializer
+from .autocomplete import suggestion_index
+from .booking import APPOINTMENT_DURATION, BookingConflict, book, conflicting_appointments
+from .catalog import specialization_catalog
+from .feeds import appointment_feed
+from .search import search_doctors
+from .slots import SLOT_MINUTES, earliest_free_slots, free_slots
 from hospital.models import Hospital
-from django.db.models import Q, F, ExpressionWrapper, FloatField
+from hospital.conditions import condition_filter, normalize_conditions
+from django.db.models import Q, F, Case, CharField, Count, ExpressionWrapper, FloatField, Value, When
 from django.shortcuts import render
 import logging
 import pandas as pd
 import os
+import threading
 from rest_framework.views import APIView
 from user_management.models import Appointment, User
 from user_management.permissions import IsUser
 from datetime import datetime, timedelta
 from django.utils import timezone
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from user_management.authentication import CachedJWTAuthentication, invalidate_cached_user
 from rest_framework.permissions import IsAuthenticated
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from healthcare_app_backend.async_views import async_api_view
+from healthcare_app_backend.cache_generations import DOCTOR, HOSPITAL, get_generations, last_modified, versioned_key
+from healthcare_app_backend.db_router import read_from_replica
+from healthcare_app_backend.tracing import traced
+from healthcare_app_backend.streaming import StreamingJSONResponse, dumps, wants_stream
+from healthcare_app_backend.pagination import KeysetPagination
+import hashlib
 
 # Import the recommender components
 from recommendation_system.doctor_recommender import DoctorRecommender
@@ -34,8 +53,59 @@ from recommendation_system.utils import (
 logger = logging.getLogger(__name__)
 recommender = None
 recommender_available = True
+_location_recommender = (None, None)  # (doctor/hospital generations it was fitted at, recommender)
+_location_recommender_lock = threading.Lock()
+
+def _fit_location_recommender():
+    """A LocationBasedDoctorRecommender fitted on every doctor, or None if there are none"""
+    doctors_data = Doctor.objects.select_related('hospital').all()
+    if not doctors_data:
+        return None
+
+    # Prepare data for the recommender
+    doctors_list = []
+    for doc in doctors_data:
+        doc_data = {
+            'id': doc.id,
+            'name': doc.name,
+            'specialization': doc.specialization,
+            'experience_years': doc.experience_years,
+            'rating': doc.rating,
+            'patients_treated': doc.patients_treated,
+            'conditions_treated': doc.conditions_treated,
+            'consultation_fee_inr': doc.consultation_fee_inr,
+            'latitude': float(doc.hospital.latitude),
+            'longitude': float(doc.hospital.longitude),
+            'hospital': {
+                'name': doc.hospital.name,
+                'address': doc.hospital.address,
+                'latitude': float(doc.hospital.latitude),
+                'longitude': float(doc.hospital.longitude)
+            }
+        }
+        doctors_list.append(doc_data)
+
+    # Train the recommender with all doctors
+    location_recommender = LocationBasedDoctorRecommender()
+    location_recommender.fit(doctors_list)
+    return location_recommender
+
+def get_location_recommender():
+    """
+    The location recommender fitted on the current doctors, refitted only
+    after a doctor or hospital change bumps their generations
+    """
+    global _location_recommender
+    generations = get_generations(DOCTOR, HOSPITAL)
+    version = (generations[DOCTOR], generations[HOSPITAL])
+    if _location_recommender[0] != version:
+        with _location_recommender_lock:
+            if _location_recommender[0] != version:  # Another thread may have refitted meanwhile
+                _location_recommender = (version, _fit_location_recommender())
+    return _location_recommender[1]
 
 @api_view(['GET'])
+@read_from_replica()
 def recommend_nearest_doctors(request):
     """
     Recommend nearest doctors based on user's latitude and longitude.
@@ -64,39 +134,9 @@ def recommend_nearest_doctors(request):
         )
 
     try:
-        # Initialize location-based recommender
-        location_recommender = LocationBasedDoctorRecommender()
-        
-        # Get all doctors data for training
-        doctors_data = Doctor.objects.select_related('hospital').all()
-        if not doctors_data:
+        location_recommender = get_location_recommender()
+        if location_recommender is None:
             return Response({'error': 'No doctors available in the system'}, status=status.HTTP_404_NOT_FOUND)
-            
-        # Prepare data for the recommender
-        doctors_list = []
-        for doc in doctors_data:
-            doc_data = {
-                'id': doc.id,
-                'name': doc.name,
-                'specialization': doc.specialization,
-                'experience_years': doc.experience_years,
-                'rating': doc.rating,
-                'patients_treated': doc.patients_treated,
-                'conditions_treated': doc.conditions_treated,
-                'consultation_fee_inr': doc.consultation_fee_inr,
-                'latitude': float(doc.hospital.latitude),
-                'longitude': float(doc.hospital.longitude),
-                'hospital': {
-                    'name': doc.hospital.name,
-                    'address': doc.hospital.address,
-                    'latitude': float(doc.hospital.latitude),
-                    'longitude': float(doc.hospital.longitude)
-                }
-            }
-            doctors_list.append(doc_data)
-            
-        # Train the recommender with all doctors
-        location_recommender.fit(doctors_list)
         
         # Get recommendations
         recommendations = location_recommender.recommend_doctors(
@@ -120,6 +160,87 @@ def recommend_nearest_doctors(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+def earliest_available_doctors(request):
+    """
+    Earliest free appointment slots across the doctors near the user who
+    treat `condition`, within [`start`, `end`) (ISO 8601, default: now to
+    the end of tomorrow). Candidates come from the location-based
+    recommender; `per_doctor` caps how many slots each doctor contributes.
+    """
+    condition = request.GET.get('condition', '').strip()
+    try:
+        user_latitude = float(request.GET['user_latitude'])
+        user_longitude = float(request.GET['user_longitude'])
+        max_distance = float(request.GET.get('max_distance_km', 20.0))
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+        per_doctor = min(max(int(request.GET.get('per_doctor', 1)), 1), 10)
+        start = parse_datetime(request.GET['start']) if request.GET.get('start') else timezone.now()
+        end = parse_datetime(request.GET['end']) if request.GET.get('end') else (
+            timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=2), datetime.min.time()))
+        )
+        if start is None or end is None:
+            raise ValueError
+    except KeyError:
+        return Response({'error': 'User location not provided'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'error': 'Invalid query parameters'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if timezone.is_naive(start):
+        start = timezone.make_aware(start)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end)
+    if end - start > timedelta(days=7):
+        return Response({'error': 'The time window cannot exceed 7 days'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        location_recommender = get_location_recommender()
+        if location_recommender is None:
+            return Response({'error': 'No doctors available in the system'}, status=status.HTTP_404_NOT_FOUND)
+
+        candidates = location_recommender.recommend_doctors(
+            user_latitude=user_latitude,
+            user_longitude=user_longitude,
+            query=condition,
+            limit=100,
+            max_distance_km=max_distance
+        )
+        if condition:
+            matching = set(search_doctors(condition).values_list('id', flat=True))
+            candidates = [c for c in candidates if c['id'] in matching]
+
+        doctors = Doctor.objects.only('id', 'name', 'specialization', 'availability').in_bulk(
+            [c['id'] for c in candidates]
+        )
+        ranked = [doctors[c['id']] for c in candidates if c['id'] in doctors]
+        by_id = {c['id']: c for c in candidates}
+
+        slots = earliest_free_slots(ranked, start, end, limit=limit, per_doctor=per_doctor)
+        return Response({
+            'slots': [
+                {
+                    'start_time': slot,
+                    'doctor': {
+                        'id': doctor.id,
+                        'name': doctor.name,
+                        'specialization': doctor.specialization,
+                        'distance_km': by_id[doctor.id]['distance_km'],
+                        'hospital': by_id[doctor.id]['hospital']
+                    }
+                }
+                for slot, doctor in slots
+            ],
+            'count': len(slots)
+        })
+
+    except Exception as e:
+        logger.error(f"Error in earliest_available_doctors: {str(e)}")
+        return Response(
+            {'error': 'Failed to find available doctors', 'detail': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@traced('recommender.load')
 def get_recommender():
     """Get or initialize the recommender model"""
     global recommender
@@ -143,55 +264,88 @@ def get_recommender():
             recommender_available = False
     return recommender
 
-@api_view(['GET'])
-def get_doctors(request):
+def _doctor_listing(specialization, conditions):
+    doctors = search_doctors(specialization, field='specialization')
+    return doctors.filter(condition_filter('conditions_treated', conditions))
+
+@async_api_view(['GET'])
+@read_from_replica(DOCTOR)
+async def get_doctors(request):
     """
-    Get all doctors or filter by specialization
+    Get doctors, optionally filtered by specialization and by exact
+    `condition` names (comma separated, all must match), one keyset page at a
+    time (`limit`/`cursor`, next page in the Link header). Pass `stream=1` to
+    stream the full list straight from the database instead.
     """
     specialization = request.GET.get('specialization', '').strip().lower()
-    
+    conditions = normalize_conditions(request.GET.get('condition', ''))
+    fields = (
+        "id", "name", "specialization", "experience_years",
+        "availability", "consultation_fee_inr", "rating", "patients_treated"
+    )
+
+    if wants_stream(request):
+        doctors = await sync_to_async(_doctor_listing)(specialization, conditions)
+        return StreamingJSONResponse(doctors.order_by('id').values(*fields))
+
+    paginator = KeysetPagination('id', model=Doctor)
+    page_key = paginator.page_key(request)
+    paginator.decode_cursor(request)
+
     # Check cache first
-    cache_key = f"doctors_{specialization}" if specialization else "doctors_all"
-    cached_data = cache.get(cache_key)
+    cache_key = await sync_to_async(versioned_key)(
+        f"doctors_{specialization or 'all'}:{','.join(conditions)}:{page_key}", DOCTOR
+    )
+    cached_data = await cache.aget(cache_key)
 
     if cached_data:
-        return JsonResponse(cached_data, safe=False)
+        doctor_list, next_cursor = cached_data
+        paginator.restore(request, next_cursor)
+        return paginator.add_link_header(JsonResponse(doctor_list, safe=False))
 
     # Filter doctors based on specialization query
-    if specialization:
-        doctors = Doctor.objects.filter(specialization__icontains=specialization)
-    else:
-        doctors = Doctor.objects.all()
-
-    doctor_list = list(doctors.values(
-        "id", "name", "specialization", "experience_years", 
-        "availability", "consultation_fee_inr", "rating", "patients_treated"
-    ))
+    doctors = await sync_to_async(_doctor_listing)(specialization, conditions)
+    doctor_list = await sync_to_async(paginator.paginate_queryset)(doctors.values(*fields), request)
 
     # Store result in cache
-    cache.set(cache_key, doctor_list, timeout=300)  # Cache for 5 minutes
+    await cache.aset(cache_key, (doctor_list, paginator.next_cursor), timeout=settings.LISTING_CACHE_TIMEOUT)
 
-    return JsonResponse(doctor_list, safe=False)
+    return paginator.add_link_header(JsonResponse(doctor_list, safe=False))
 
 @api_view(['GET'])
+@read_from_replica(DOCTOR)
 def get_specialization_options(request):
     """
-    Fetches a list of unique specializations offered by doctors.
+    Fetches the specializations offered by doctors, most common first.
     """
-    cache_key = "specialization_options"
+    cache_key = versioned_key("specialization_options", DOCTOR)
     cached_data = cache.get(cache_key)
 
     if cached_data:
         return JsonResponse(cached_data, safe=False)
 
-    # Fetch unique specializations
-    specializations = Doctor.objects.values_list("specialization", flat=True).distinct()
-    unique_specializations = sorted(set(specializations))
+    # Read from the materialized catalog rather than DISTINCT over all doctors
+    specializations = specialization_catalog()
 
-    cache.set(cache_key, unique_specializations, timeout=600)  # Cache for 10 minutes
-    return JsonResponse(unique_specializations, safe=False)
+    cache.set(cache_key, specializations, timeout=settings.LISTING_CACHE_TIMEOUT)
+    return JsonResponse(specializations, safe=False)
 
 @api_view(['GET'])
+def autocomplete(request):
+    """
+    Typeahead suggestions for conditions and specializations starting with
+    `q`, most searched first. Served from an in-memory index.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+
+    suggestions = suggestion_index.suggest(request.GET.get('q', ''), limit)
+    return JsonResponse({"suggestions": suggestions})
+
+@api_view(['GET'])
+@read_from_replica()
 def doctor_details_view(request, id):
     """
     Get detailed information about a specific doctor
@@ -227,10 +381,11 @@ def doctor_details_view(request, id):
         return JsonResponse({"error": "Doctor not found"}, status=404)
 
     except Exception as e:
-        print(f"Error: {e}")  # Debugging
+        logger.error(f"Error fetching doctor details: {str(e)}")
         return JsonResponse({"error": "Something went wrong!"}, status=500)
 
 @api_view(['GET'])
+@read_from_replica()
 def recommend_doctors(request):
     """
     Recommend doctors based on query condition using ML model
@@ -257,10 +412,7 @@ def recommend_doctors(request):
 
         # If no recommendations from model, fallback to DB query
         if not recommendations:
-            doctors = Doctor.objects.select_related('hospital').filter(
-                Q(conditions_treated__icontains=query) |
-                Q(specialization__icontains=query)
-            )[:limit]
+            doctors = search_doctors(query).select_related('hospital')[:limit]
             serializer = DoctorSerializer(doctors, many=True)
             recommendations = serializer.data
 
@@ -276,28 +428,106 @@ def recommend_doctors(request):
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Columns exposed by list_all_doctors, matching DoctorSerializer's output
+DOCTOR_LIST_FIELDS = (
+    'id', 'name', 'mobile_number', 'specialization', 'experience_years',
+    'availability', 'consultation_fee_inr', 'patients_treated', 'rating',
+    'conditions_treated', 'hospital'
+)
+HOSPITAL_LIST_FIELDS = ('id', 'name', 'address', 'latitude', 'longitude', 'available_beds', 'specialization')
+def _doctor_list_columns(fields):
+    columns = [f for f in fields if f != 'hospital']
+    if 'id' not in columns:
+        columns.append('id')
+    if 'hospital' in fields:
+        columns += [f'hospital__{f}' for f in HOSPITAL_LIST_FIELDS]
+    return columns
+
+
+def _shape_doctor_row(row, fields):
+    """Turn a flat values() row into DoctorSerializer's nested shape."""
+    doctor = {f: row[f] for f in fields if f != 'hospital'}
+    if 'hospital' in fields:
+        doctor['hospital'] = {f: row[f'hospital__{f}'] for f in HOSPITAL_LIST_FIELDS}
+    return doctor
+
+
+def _doctor_total():
+    """Number of doctors, cached until a doctor changes"""
+    cache_key = versioned_key("doctor_total_count", DOCTOR)
+    total = cache.get(cache_key)
+    if total is None:
+        total = Doctor.objects.count()
+        cache.set(cache_key, total, timeout=settings.LISTING_CACHE_TIMEOUT)
+    return total
+
+
+def _build_doctor_page(fields, request, paginator):
+    """Serialize one page of doctors (joined with their hospital) straight to JSON bytes."""
+    rows = paginator.paginate_queryset(Doctor.objects.values(*_doctor_list_columns(fields)), request)
+    doctors = [_shape_doctor_row(row, fields) for row in rows]
+    return dumps({
+        'doctors': doctors,
+        'count': _doctor_total(),
+        'page_count': len(doctors),
+    })
+
+
 @api_view(['GET'])
-@cache_page(60 * 5)  # Cache for 5 minutes
+@read_from_replica(DOCTOR, HOSPITAL)
 def list_all_doctors(request):
-    """List all doctors in the database"""
+    """
+    List doctors with keyset pagination.
+
+    Query params: `limit` (default 100, max 1000), `cursor` (the next page
+    is in the Link header) and `fields` (comma-separated subset of
+    DOCTOR_LIST_FIELDS). `count` is the total number of doctors and
+    `page_count` the number on this page. Pages are cached as ready-to-send JSON bytes under
+    the Doctor/Hospital generations, which also provide the ETag and
+    Last-Modified used for conditional GETs.
+
+    `stream=1` skips pagination and caching and streams every doctor, for
+    exports that need the whole catalog.
+    """
+    requested = request.GET.get('fields')
+    fields = [f for f in requested.split(',') if f in DOCTOR_LIST_FIELDS] if requested else list(DOCTOR_LIST_FIELDS)
+    if not fields:
+        return Response({'error': f"fields must be a subset of {', '.join(DOCTOR_LIST_FIELDS)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    paginator = KeysetPagination('id', model=Doctor)
+    page_key = paginator.page_key(request)
+    paginator.decode_cursor(request)  # Reject malformed cursors before touching the cache
+
+    if wants_stream(request):
+        doctors = Doctor.objects.order_by('id').values(*_doctor_list_columns(fields))
+        return StreamingJSONResponse(
+            doctors, transform=lambda row: _shape_doctor_row(row, fields),
+            prefix=b'{"doctors":', suffix=b'}'
+        )
+
     try:
-        cache_key = 'all_doctors_list'
-        cached_doctors = cache.get(cache_key)
-        
-        if cached_doctors:
-            return Response(cached_doctors)
+        cache_key = versioned_key(f"all_doctors_list:{page_key}:{','.join(fields)}", DOCTOR, HOSPITAL)
+        etag = quote_etag(hashlib.md5(cache_key.encode()).hexdigest())
+        modified = last_modified(DOCTOR, HOSPITAL)
 
-        doctors = Doctor.objects.select_related('hospital').all()
-        doctor_count = doctors.count()
-        
-        serializer = DoctorSerializer(doctors, many=True)
-        response_data = {
-            'doctors': serializer.data,
-            'count': doctor_count
-        }
-        
-        cache.set(cache_key, response_data, timeout=60 * 5)
-        return Response(response_data)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=int(modified.timestamp())
+        )
+        if not_modified is not None:
+            return not_modified
+
+        cached = cache.get(cache_key)
+        if cached is None:
+            body = _build_doctor_page(fields, request, paginator)
+            cache.set(cache_key, (body, paginator.next_cursor), timeout=settings.LISTING_CACHE_TIMEOUT)
+        else:
+            body, next_cursor = cached
+            paginator.restore(request, next_cursor)
+
+        response = paginator.add_link_header(HttpResponse(body, content_type='application/json'))
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified.timestamp())
+        return response
     except Exception as e:
         logger.error(f"Error listing doctors: {str(e)}")
         return Response({
@@ -315,20 +545,24 @@ def manage_doctor_profile(request, email=None):
         return JsonResponse({"error": "Email is required"}, status=400)
     
     try:
-        # Find the doctor by matching the mobile number
-        # This assumes doctor's name format is "FirstName LastName" from user model
         user = User.objects.get(email=email, role='doctor')
         
-        # Look for the doctor with the same mobile number
-        try:
-            doctor = Doctor.objects.get(mobile_number=user.mobile_number)
-        except Doctor.DoesNotExist:
+        # Follow the user's linked doctor profile
+        doctor_id = _doctor_id_for(user)
+        if doctor_id is not None:
+            doctor = Doctor.objects.get(pk=doctor_id)
+        elif Doctor.objects.filter(mobile_number=user.mobile_number).exists():
+            # Matching profiles exist but none can be linked safely; don't add another
+            return JsonResponse({"error": AMBIGUOUS_PROFILE_ERROR}, status=409)
+        else:
             # If doctor doesn't exist but user is a doctor, create doctor profile
             doctor = Doctor.objects.create(
                 name=user.name,
                 mobile_number=user.mobile_number,
                 specialization="General"
             )
+            User.objects.filter(pk=user.pk).update(doctor_profile=doctor)
+            invalidate_cached_user(user.pk)
         
         if request.method == 'GET':
             # Return doctor profile details
@@ -338,12 +572,7 @@ def manage_doctor_profile(request, email=None):
         elif request.method == 'PUT':
             serializer = DoctorSerializer(doctor, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
-                # Clear related cache keys
-                cache.delete(f"doctors_all")
-                cache.delete(f"doctors_{doctor.specialization.lower()}")
-                cache.delete("specialization_options")
-                
+                serializer.save()  # Doctor post_save signal invalidates the listing caches
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -386,7 +615,7 @@ class DoctorRegistrationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def book_appointment(request):
     """
@@ -397,22 +626,16 @@ def book_appointment(request):
         appointment_date = request.data.get('appointment_date')
         reason = request.data.get('reason', '')
         
-        # Debugging logs
-        import traceback
-        print("book_appointment called with data:", request.data)
-        
         # Validate input
         if not doctor_id or not appointment_date:
-            print("Validation failed: Missing doctor_id or appointment_date")
             return Response({
                 'error': 'Doctor ID and appointment date are required'
             }, status=status.HTTP_400_BAD_REQUEST)
             
         # Get the doctor
         try:
-            doctor = Doctor.objects.get(id=doctor_id)
+            doctor = Doctor.objects.select_related('hospital').get(id=doctor_id)
         except Doctor.DoesNotExist:
-            print("Doctor not found for id:", doctor_id)
             return Response({
                 'error': 'Doctor not found'
             }, status=status.HTTP_404_NOT_FOUND)
@@ -421,157 +644,207 @@ def book_appointment(request):
         try:
             appointment_datetime = datetime.fromisoformat(appointment_date.replace('Z', '+00:00'))
         except ValueError:
-            print("Invalid appointment date format:", appointment_date)
             return Response({
                 'error': 'Invalid appointment date format. Use ISO 8601 format.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        time_buffer = timedelta(minutes=30)
-        
-        # Adjust conflict check to exclude the current appointment if updating
-        conflicting_appointments = Appointment.objects.filter(
-            doctor=doctor,
-            appointment_date__range=[
-                appointment_datetime - time_buffer,
-                appointment_datetime + time_buffer
-            ]
-        ).exists()
-        
-        # If conflict exists, check if it's the same appointment (for update scenarios)
-        if conflicting_appointments:
-            # Instead of blocking, allow if the conflict is with the same appointment (optional)
-            # Here, assuming this is a new booking, so block
-            print("Conflicting appointment exists for doctor id:", doctor_id)
-            return Response({
-                'error': 'Doctor already has an appointment scheduled during this time'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
         # Use authenticated user only
         user = request.user
         
         # Check if user is authenticated and active
         if not user or not user.is_authenticated or not user.is_active:
-            print("User not authenticated or inactive:", user)
             return Response({
                 'error': 'User must be logged in and active to book an appointment'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Create appointment
-        appointment = Appointment.objects.create(
-            doctor=doctor,
-            user=user,
-            appointment_date=appointment_date,
-            reason=reason
-        )
+        # Conflict check and insert happen atomically under a per-doctor lock
+        try:
+            appointment = book(doctor.id, user, appointment_datetime, reason)
+        except BookingConflict as e:
+            logger.info(f"Booking conflict for doctor {doctor_id} at {appointment_datetime.isoformat()}")
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        appointment.doctor = doctor  # already joined with its hospital
         serializer = AppointmentSerializer(appointment)
-        print("Appointment created successfully:", serializer.data)
+        logger.debug(f"Appointment {appointment.id} booked with doctor {doctor.id}")
         return Response(serializer.data, status=status.HTTP_201_CREATED)
         
     except Exception as e:
-        print("Exception in book_appointment:", str(e))
-        traceback.print_exc()
+        logger.exception(f"Error in book_appointment: {str(e)}")
         return Response({
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
+AMBIGUOUS_PROFILE_ERROR = (
+    'Several doctor profiles match your mobile number. Please ask an administrator to link yours.'
+)
+
+def _doctor_id_for(user):
+    """
+    Doctor id linked to a 'doctor' user. Users created before the link
+    existed are matched on mobile number once and linked for next time.
+    Doctor mobile numbers are not unique: when several doctors share the
+    number, or its doctor is linked to another user, nothing is linked and
+    None is returned.
+    """
+    if user.doctor_profile_id:
+        return user.doctor_profile_id
+    candidates = list(
+        Doctor.objects.filter(mobile_number=user.mobile_number).values_list('id', 'user_account')[:2]
+    )
+    if not candidates:
+        return None
+    if len(candidates) > 1 or candidates[0][1] not in (None, user.pk):
+        logger.warning(
+            f"Not linking doctor user {user.pk}: mobile number {user.mobile_number} "
+            f"matches several doctors or another user's doctor"
+        )
+        return None
+    doctor_id = candidates[0][0]
+    User.objects.filter(pk=user.pk).update(doctor_profile_id=doctor_id)
+    invalidate_cached_user(user.pk)
+    return doctor_id
+
+
+def _doctor_appointment_window(request, doctor_id):
+    """Appointments of a doctor limited by the `from`/`to` (ISO 8601) and `status` filters"""
+    appointments = Appointment.objects.filter(doctor_id=doctor_id)
+    for param, lookup in (('from', 'appointment_date__gte'), ('to', 'appointment_date__lt')):
+        value = request.GET.get(param)
+        if value:
+            try:
+                moment = parse_datetime(value)
+                if moment is None and parse_date(value):
+                    moment = datetime.combine(parse_date(value), datetime.min.time())
+            except ValueError:
+                moment = None
+            if moment is None:
+                raise ValidationError({param: 'Must be an ISO 8601 date or datetime.'})
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            appointments = appointments.filter(**{lookup: moment})
+
+    now = timezone.now()
+    status_filter = request.GET.get('status', '').lower()
+    if status_filter == 'upcoming':
+        appointments = appointments.filter(appointment_date__gt=now)
+    elif status_filter == 'past':
+        appointments = appointments.filter(appointment_date__lte=now)
+    return appointments, now
+
+
+def _resolve_doctor(request):
+    user = request.user
+    if user.role != 'doctor':
+        return None, Response({
+            'error': 'Only doctors can access this endpoint'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    doctor_id = _doctor_id_for(user)
+    if doctor_id is None and Doctor.objects.filter(mobile_number=user.mobile_number).exists():
+        return None, Response({'error': AMBIGUOUS_PROFILE_ERROR}, status=status.HTTP_409_CONFLICT)
+    if doctor_id is None:
+        return None, Response({
+            'error': 'Doctor profile not found. Please complete your doctor profile first.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return doctor_id, None
+
+
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def doctor_appointments(request):
     """
-    Get all appointments for the logged-in doctor
+    Get the logged-in doctor's appointments, one keyset page at a time.
+    Optional filters: `from`/`to` (ISO 8601) and `status` (upcoming|past).
     """
-    try:
-        user = request.user
-        print(f"Fetching appointments for user: {user.email} with role: {user.role}")
-        if user.role != 'doctor':
-            return Response({
-                'error': 'Only doctors can access this endpoint'
-            }, status=status.HTTP_403_FORBIDDEN)
-
-        try:
-            doctor = Doctor.objects.get(mobile_number=user.mobile_number)
-            print(f"Found doctor: {doctor.name} with id: {doctor.id}")
-        except Doctor.DoesNotExist:
-            print(f"No doctor found for user with mobile: {user.mobile_number}")
-            return Response({
-                'error': 'Doctor profile not found. Please complete your doctor profile first.'
-            }, status=status.HTTP_404_NOT_FOUND)
+    doctor_id, error = _resolve_doctor(request)
+    if error:
+        return error
 
-        appointments = Appointment.objects.filter(doctor=doctor).select_related('user').order_by('appointment_date')
-        print(f"Found {appointments.count()} appointments")
+    appointments, now = _doctor_appointment_window(request, doctor_id)
+    # Unpaginated unless `limit`/`cursor` is passed; the dashboard reads the whole list
+    paginator = KeysetPagination('appointment_date', model=Appointment)
+    paginator.get_limit(request)
+    paginator.decode_cursor(request)
 
-        now = timezone.now()
-        appointment_data = []
-
-        for appointment in appointments:
-            is_upcoming = appointment.appointment_date > now
-            data = {
-                'id': appointment.id,
-                'appointment_date': appointment.appointment_date,
-                'reason': appointment.reason,
-                'created_at': appointment.created_at,
-                'user_name': appointment.user.name,  # Using the name field directly
-                'user_email': appointment.user.email,
-                'user_mobile': appointment.user.mobile_number,
-                'status': 'Upcoming' if is_upcoming else 'Past'
-            }
-            appointment_data.append(data)
-
-        print(f"Returning {len(appointment_data)} appointments")
-        return Response(appointment_data)
+    try:
+        # Status and user columns are computed by the database; no model instances
+        appointments = paginator.paginate_queryset(
+            appointments.annotate(
+                status=Case(
+                    When(appointment_date__gt=now, then=Value('Upcoming')),
+                    default=Value('Past'),
+                    output_field=CharField()
+                )
+            ).values(
+                'id', 'appointment_date', 'reason', 'created_at', 'status',
+                user_name=F('user__name'),
+                user_email=F('user__email'),
+                user_mobile=F('user__mobile_number')
+            ),
+            request
+        )
+        return paginator.get_paginated_response(appointments)
 
     except Exception as e:
-        print(f"Error fetching appointments: {str(e)}")
+        logger.error(f"Error fetching appointments: {str(e)}")
         return Response({
             'error': f'Failed to fetch appointments: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def doctor_appointment_counts(request):
+    """Per-status appointment counts for the logged-in doctor, in one aggregate query"""
+    doctor_id, error = _resolve_doctor(request)
+    if error:
+        return error
+
+    appointments, now = _doctor_appointment_window(request, doctor_id)
+    counts = appointments.aggregate(
+        total=Count('id'),
+        upcoming=Count('id', filter=Q(appointment_date__gt=now)),
+        past=Count('id', filter=Q(appointment_date__lte=now))
+    )
+    return Response(counts)
+
 class UserAppointmentsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated, IsUser]
-    
-    @method_decorator(cache_page(60))  # Cache for 1 minute
+
     def get(self, request):
+        paginator = KeysetPagination('-appointment_date')
         try:
-            user = request.user
-            # Generate a cache key unique to this user
-            cache_key = f'user_appointments_{user.id}'
-            cached_appointments = cache.get(cache_key)
-            
-            if cached_appointments:
-                return Response(cached_appointments)
-                
-            appointments = Appointment.objects.filter(user=user).select_related('doctor').order_by('-appointment_date')
-            serializer = AppointmentSerializer(appointments, many=True)
-            
-            # Cache the response
-            cache.set(cache_key, serializer.data, timeout=60)  # Cache for 1 minute
-            
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # Served from the per-user feed, which bookings update write-through
+            appointments = paginator.paginate_sorted(
+                appointment_feed(request.user.id), request, parse=parse_datetime
+            )
+            return paginator.get_paginated_response(appointments)
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Failed to fetch user appointments: {str(e)}")
             return Response({"error": "Failed to fetch user appointments"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-    def post(self, request):
-        # After successful appointment creation, invalidate the cache
-        cache.delete(f'user_appointments_{request.user.id}')
-        cache.delete('all_doctors_list')  # Also invalidate the doctors list cache as availability might have changed
 
 @api_view(['GET'])
+@permission_classes([IsAuthenticated])
 def user_appointments(request):
     """
     Get all appointments for the logged-in user
     """
+    paginator = KeysetPagination('appointment_date')
     try:
-        # Get appointments for the logged-in user
-        appointments = Appointment.objects.filter(user=request.user).order_by('appointment_date')
-        
-        # Serialize and return appointments
-        serializer = AppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
-        
+        appointments = paginator.paginate_sorted(
+            appointment_feed(request.user.id), request, parse=parse_datetime
+        )
+        return paginator.get_paginated_response(appointments)
+    except ValidationError:
+        raise
     except Exception as e:
         return Response({
             'error': str(e)
@@ -596,18 +869,11 @@ def check_appointment_conflict(request):
         
         # Check for appointments within 30 minutes of the requested time
         appointment_datetime = datetime.fromisoformat(appointment_date.replace('Z', '+00:00'))
-        time_buffer = timedelta(minutes=30)
-        
-        conflicting_appointments = Appointment.objects.filter(
-            doctor=doctor,
-            appointment_date__range=[
-                appointment_datetime - time_buffer,
-                appointment_datetime + time_buffer
-            ]
-        ).exists()
+        if timezone.is_naive(appointment_datetime):
+            appointment_datetime = timezone.make_aware(appointment_datetime)
         
         return Response({
-            'has_conflict': conflicting_appointments
+            'has_conflict': conflicting_appointments(doctor.id, appointment_datetime).exists()
         })
         
     except Doctor.DoesNotExist:
@@ -619,6 +885,36 @@ def check_appointment_conflict(request):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+def doctor_free_slots(request, id):
+    """
+    Free appointment slots for a doctor, from `start` (YYYY-MM-DD, default
+    today) for `days` days (default 7, at most 31)
+    """
+    try:
+        start = request.GET.get('start')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else timezone.localdate()
+        days = min(max(int(request.GET.get('days', 7)), 1), 31)
+    except ValueError:
+        return Response({
+            'error': 'start must be YYYY-MM-DD and days an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        doctor = Doctor.objects.only('id', 'availability').get(id=id)
+    except Doctor.DoesNotExist:
+        return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    slots = free_slots(doctor, start, days)
+    return Response({
+        'doctor_id': doctor.id,
+        'slot_minutes': SLOT_MINUTES,
+        'days': [
+            {'date': day, 'free_slots': day_slots}
+            for day, day_slots in slots.items()
+        ]
+    })
+
 @api_view(['GET'])
 def check_doctor_availability(request, id):
     """
@@ -639,7 +935,7 @@ def check_doctor_availability(request, id):
         booked_slots = [
             {
                 'start_time': appointment.appointment_date,
-                'end_time': appointment.appointment_date + timedelta(minutes=30)
+                'end_time': appointment.appointment_date + APPOINTMENT_DURATION
             }
             for appointment in upcoming_appointments
         ]
@@ -649,7 +945,7 @@ def check_doctor_availability(request, id):
             'name': doctor.name,
             'general_availability': doctor.availability,  # The general availability string like "9 AM - 5 PM"
             'booked_slots': booked_slots,  # List of specific time slots that are already booked
-            'consultation_duration': 30,  # Default consultation duration in minutes
+            'consultation_duration': int(APPOINTMENT_DURATION.total_seconds() // 60),  # Consultation duration in minutes
         }
         
         return Response(response_data)
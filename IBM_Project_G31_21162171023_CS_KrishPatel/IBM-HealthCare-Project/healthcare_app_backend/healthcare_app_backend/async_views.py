@@ -0,0 +1,92 @@
+"""
+Async counterparts of DRF's APIView and @api_view.
+
+DRF dispatches synchronously, so under ASGI every DRF view holds a worker
+thread while it waits on the database, SMTP or a geocoding call. These run
+natively on the event loop instead. They cover what the public endpoints
+need from DRF: `request.data` parsed from JSON or form bodies, throttle
+classes, and APIException (e.g. ValidationError) turned into JSON errors.
+Handlers return Django responses (JsonResponse). There is no per-request
+authentication, so use them only for AllowAny endpoints.
+"""
+import json
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, QueryDict
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, Throttled
+
+
+def _parse_data(request):
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return QueryDict()
+    if request.content_type == 'application/json':
+        body = json.loads(request.body or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError('JSON body must be an object')
+        return body
+    return request.POST
+
+
+async def _check_throttles(request, view, throttle_classes):
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, view):
+            raise Throttled(throttle.wait())
+
+
+def _error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    response = JsonResponse(detail, status=exc.status_code, safe=False)
+    wait = getattr(exc, 'wait', None)  # Throttled and other retryable errors
+    if wait is not None:
+        response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+async def _run(handler, request, view, throttle_classes, *args, **kwargs):
+    try:
+        request.data = _parse_data(request)
+    except ValueError:
+        return JsonResponse({'error': 'Malformed request body.'}, status=400)
+    try:
+        await _check_throttles(request, view, throttle_classes)
+        return await handler(request, *args, **kwargs)
+    except APIException as exc:
+        return _error_response(exc)
+
+
+class AsyncAPIView(View):
+    """
+    Class-based async view. Define `async def get/post(self, request)`,
+    plus `throttle_classes` and `throttle_scope` as on an APIView.
+    """
+
+    throttle_classes = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None:
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        return await _run(handler, request, self, self.throttle_classes, *args, **kwargs)
+
+
+def async_api_view(methods, throttle_classes=()):
+    """Function-view form of AsyncAPIView, used like @api_view(['GET'])"""
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            return await _run(view, request, view, throttle_classes, *args, **kwargs)
+        return wrapper
+    return decorator
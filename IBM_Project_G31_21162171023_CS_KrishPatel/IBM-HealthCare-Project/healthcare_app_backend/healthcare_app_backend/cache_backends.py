@@ -0,0 +1,115 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .tracing import record_cache
+
+
+class TieredCache(BaseCache):
+    """
+    Two-tier cache: a small in-process L1 in front of a shared L2 alias
+    (Redis in production, LocMemCache in tests and local development).
+
+    Every write stores the value in L2 together with a random version token,
+    kept under a separate small key. A read fetches only that token from L2
+    and serves the L1 copy when it still matches, so a large value is
+    transferred and unpickled once per worker, while a write or delete on any
+    worker is visible to all of them on their next read.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED_ALIAS', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._local = {}  # full key -> (expires_at, version, value)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    @staticmethod
+    def _version_key(key):
+        return f"{key}:tier_version"
+
+    def _l1_expiry(self, timeout):
+        ttl = self.l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        return time.monotonic() + ttl
+
+    def _store_local(self, full_key, version, value, timeout=DEFAULT_TIMEOUT):
+        with self._lock:
+            if len(self._local) >= self.l1_max_entries:
+                now = time.monotonic()
+                self._local = {k: v for k, v in self._local.items() if v[0] > now}
+                if len(self._local) >= self.l1_max_entries:
+                    self._local.clear()
+            self._local[full_key] = (self._l1_expiry(timeout), version, value)
+
+    def _drop_local(self, full_key):
+        with self._lock:
+            self._local.pop(full_key, None)
+
+    def get(self, key, default=None, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        current = self.shared.get(self._version_key(key), version=version)
+        if current is None:
+            self._drop_local(full_key)
+            record_cache('miss')
+            return default
+
+        entry = self._local.get(full_key)
+        if entry is not None and entry[1] == current and entry[0] > time.monotonic():
+            record_cache('l1')
+            return entry[2]
+
+        stored = self.shared.get(key, version=version)
+        if stored is None:
+            record_cache('miss')
+            return default
+        stored_version, value = stored
+        self._store_local(full_key, stored_version, value)
+        record_cache('l2')
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        token = uuid.uuid4().hex
+        self.shared.set_many(
+            {key: (token, value), self._version_key(key): token},
+            timeout=timeout, version=version
+        )
+        self._store_local(full_key, token, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        token = uuid.uuid4().hex
+        if not self.shared.add(key, (token, value), timeout=timeout, version=version):
+            return False
+        self.shared.set(self._version_key(key), token, timeout=timeout, version=version)
+        self._store_local(full_key, token, value, timeout)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.make_and_validate_key(key, version=version)
+        touched = self.shared.touch(key, timeout=timeout, version=version)
+        self.shared.touch(self._version_key(key), timeout=timeout, version=version)
+        return touched
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        existed = self.shared.delete(self._version_key(key), version=version)
+        self.shared.delete(key, version=version)
+        self._drop_local(full_key)
+        return existed
+
+    def clear(self):
+        self.shared.clear()
+        with self._lock:
+            self._local.clear()
@@ -0,0 +1,63 @@
+"""
+Generation counters for cache invalidation.
+
+Cached listings embed the current generation of every model they depend on
+in their key. Bumping a generation (done by the post_save/post_delete signals
+in the Doctor and hospital apps) makes every dependent key unreachable at
+once, so nothing has to be deleted by hand and TTLs can be long. Bulk
+QuerySet.update()/bulk_create() calls skip those signals and must call
+bump_generation() themselves.
+
+Generations are millisecond timestamps, so a generation key lost to eviction
+comes back larger than any value it replaced and never resurrects old entries.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+DOCTOR = 'doctor'
+HOSPITAL = 'hospital'
+SEARCH = 'search'
+
+
+def _generation_key(tag):
+    return f"generation:{tag}"
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_generations(*tags):
+    """Return {tag: generation} for the given tags, initializing missing ones."""
+    keys = {_generation_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    generations = {}
+    for key, tag in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            cache.add(key, _now_ms(), timeout=None)
+            generation = cache.get(key)
+        generations[tag] = generation
+    return generations
+
+
+def bump_generation(*tags):
+    """Invalidate every cached entry that depends on any of the given tags."""
+    for tag in tags:
+        key = _generation_key(tag)
+        current = cache.get(key) or 0
+        cache.set(key, max(_now_ms(), current + 1), timeout=None)
+
+
+def versioned_key(base, *tags):
+    """Build a cache key for `base` that changes whenever one of `tags` is bumped."""
+    generations = get_generations(*tags)
+    return base + ''.join(f":{tag}{generations[tag]}" for tag in tags)
+
+
+def last_modified(*tags):
+    """Time of the most recent change to any of the given tags."""
+    generation = max(get_generations(*tags).values())
+    return datetime.fromtimestamp(generation / 1000, tz=timezone.utc)
@@ -0,0 +1,8 @@
+"""PostgreSQL backend that records connection setup and pool wait times"""
+from django.db.backends.postgresql import base
+
+from healthcare_app_backend.db_metrics import InstrumentedConnectionMixin
+
+
+class DatabaseWrapper(InstrumentedConnectionMixin, base.DatabaseWrapper):
+    pass
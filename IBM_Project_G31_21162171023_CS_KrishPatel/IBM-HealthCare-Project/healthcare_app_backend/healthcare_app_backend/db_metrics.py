@@ -0,0 +1,41 @@
+"""
+Database connection metrics.
+
+InstrumentedConnectionMixin times every new connection a database wrapper
+opens: the connect and TLS handshake without a pool, the wait for a free
+connection with one. `connection_metrics()` reports the totals per alias
+for this process, with psycopg pool statistics when pooling is enabled.
+"""
+import threading
+import time
+
+from django.db import connections
+
+_lock = threading.Lock()
+_stats = {}  # alias -> {'opened': int, 'wait_seconds_total': float, 'wait_seconds_max': float}
+
+
+def record_connection(alias, seconds):
+    with _lock:
+        stats = _stats.setdefault(alias, {'opened': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0})
+        stats['opened'] += 1
+        stats['wait_seconds_total'] += seconds
+        stats['wait_seconds_max'] = max(stats['wait_seconds_max'], seconds)
+
+
+def connection_metrics():
+    with _lock:
+        metrics = {alias: dict(stats) for alias, stats in _stats.items()}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            metrics.setdefault(alias, {})['pool'] = pool.get_stats()
+    return metrics
+
+
+class InstrumentedConnectionMixin:
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_connection(self.alias, time.perf_counter() - started)
+        return connection
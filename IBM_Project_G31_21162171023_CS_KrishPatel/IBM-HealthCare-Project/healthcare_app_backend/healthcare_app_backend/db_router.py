@@ -0,0 +1,183 @@
+"""
+Primary/replica routing.
+
+Writes always go to the primary (`default`). Reads go to one of the
+DATABASE_REPLICAS only inside `replica_reads()` or a view decorated with
+`@read_from_replica(...)`; everything else keeps reading from the primary.
+Even then a read stays on the primary when:
+
+* the current request has already written something;
+* the user wrote something in the last REPLICA_PIN_SECONDS (read-your-writes);
+* a generation the view depends on (see cache_generations) moved in the last
+  REPLICA_PIN_SECONDS, so a lagging replica cannot refill a listing cache
+  under the new generation with old rows.
+
+ReplicaPinMiddleware tracks writes per request and pins the user. Users
+are recognized from the session or from the DRF authenticators (JWT bearer
+tokens), in sync and async views alike.
+"""
+import inspect
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache_generations import get_generations
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_request_state = ContextVar('db_request_state', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def _pin_key(user_id):
+    return f"db_primary_pin:{user_id}"
+
+
+@contextmanager
+def replica_reads():
+    """Allow the reads in this block to be served by a replica"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _request_user(request):
+    """
+    The authenticated user of a Django request, or None. Views under
+    @async_api_view have not run the DRF authenticators yet, so a bearer
+    token is resolved here the way DRF would.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    drf_request = Request(request)
+    for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator().authenticate(drf_request)
+        except APIException:  # A bad token is the view's to reject
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+def _is_pinned(request):
+    user = _request_user(request)
+    return bool(user and cache.get(_pin_key(user.pk)))
+
+
+def _pin_writer(request):
+    user = _request_user(request)
+    if user is not None:
+        cache.set(_pin_key(user.pk), True, timeout=_pin_seconds())
+
+
+def _recently_changed(tags):
+    if not tags:
+        return False
+    newest = max(get_generations(*tags).values())
+    return time.time() * 1000 - newest < _pin_seconds() * 1000
+
+
+def read_from_replica(*tags):
+    """
+    Serve a read-only view's queries from a replica, unless the user or
+    one of the generation `tags` the response depends on changed recently.
+    Goes under @api_view or @async_api_view.
+    """
+    def should_use_primary(request):
+        return _is_pinned(request) or _recently_changed(tags)
+
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not replica_aliases() or await sync_to_async(should_use_primary)(request):
+                    return await view(request, *args, **kwargs)
+                with replica_reads():
+                    return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not replica_aliases() or should_use_primary(request):
+                return view(request, *args, **kwargs)
+            with replica_reads():
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or not _replica_reads.get():
+            return None
+        state = _request_state.get()
+        if state and state['wrote']:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaPinMiddleware:
+    """Keep a user's reads on the primary for a while after they write"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = {'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state['wrote'] and replica_aliases():
+            _pin_writer(request)
+        return response
+
+    async def __acall__(self, request):
+        state = {'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state['wrote'] and replica_aliases():
+            await sync_to_async(_pin_writer)(request)
+        return response
@@ -0,0 +1,188 @@
+import binascii
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _cursor_default(value):
+    # Keep full microsecond precision; DjangoJSONEncoder would truncate it
+    # and rows sharing the truncated prefix would be skipped.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not a valid cursor value")
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over an indexed (sort_key, id) pair.
+
+    Each page is read with `WHERE (sort_key, id) > cursor ORDER BY sort_key, id
+    LIMIT n`, so the cost of a page does not grow with its position. Cursors
+    are opaque base64 tokens. Every paginated response advertises the next
+    page the same way, in a `Link: <url>; rel="next"` header; there is no
+    header on the last page.
+
+    Pass the `model` being paginated to have cursor values checked against
+    its field types as soon as the cursor is decoded (paginate_queryset
+    falls back to the queryset's model).
+
+    A request without `limit` gets `default_limit` rows (100); `limit` is
+    capped at `max_limit` (1000). Clients that need every row follow the
+    `Link` header until it is absent.
+
+    Usage:
+        paginator = KeysetPagination('-appointment_date')
+        page = paginator.paginate_queryset(queryset, request)
+        ...
+        return paginator.get_paginated_response(data)
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+
+    def __init__(self, ordering='id', default_limit=100, max_limit=1000, model=None):
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.model = model
+        self.next_cursor = None
+        self.request = None
+
+    def get_limit(self, request):
+        limit = request.GET.get(self.limit_query_param, self.default_limit)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': 'Must be an integer.'})
+        return min(max(limit, 1), self.max_limit)
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, default=_cursor_default, separators=(',', ':'))
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.GET.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if not isinstance(position, list) or len(position) != 2:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if self.model is None:
+            return position
+        # Convert to the ordering and pk field types, so a well-formed cursor
+        # with bad values is a 400 rather than an error inside the query
+        opts = self.model._meta
+        try:
+            value = opts.get_field(self.field).to_python(position[0])
+            last_id = opts.pk.to_python(position[1])
+        except (DjangoValidationError, TypeError, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if value is None or last_id is None:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        return [value, last_id]
+
+    def page_key(self, request):
+        """Identifies the requested page, for use in cache keys."""
+        return f"{self.get_limit(request)}:{request.GET.get(self.cursor_query_param, '')}"
+
+    def _position(self, row):
+        if isinstance(row, dict):
+            return [row[self.field], row['id']]
+        return [getattr(row, self.field), row.pk]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.model is None:
+            self.model = queryset.model
+        limit = self.get_limit(request)
+        position = self.decode_cursor(request)
+
+        order = '-' if self.descending else ''
+        queryset = queryset.order_by(f'{order}{self.field}', f'{order}id')
+        if position is not None:
+            value, last_id = position
+            after = 'lt' if self.descending else 'gt'
+            if self.field == 'id':
+                queryset = queryset.filter(**{f'id__{after}': last_id})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{after}': value}) |
+                    Q(**{self.field: value, f'id__{after}': last_id})
+                )
+
+        rows = list(queryset[:limit + 1])
+        page = rows[:limit]
+        self.next_cursor = self.encode_cursor(self._position(page[-1])) if len(rows) > limit else None
+        return page
+
+    def paginate_sorted(self, entries, request, parse=None):
+        """
+        Paginate an in-memory list of (sort_value, id, item) tuples, sorted
+        ascending by (sort_value, id), with the same cursors as
+        paginate_queryset. `parse` turns a cursor's sort value back into the
+        type stored in `entries` (e.g. parse_datetime).
+        """
+        self.request = request
+        limit = self.get_limit(request)
+        position = self.decode_cursor(request)
+        key = None
+        if position is not None:
+            value, last_id = position
+            try:
+                value = parse(value) if parse else value
+            except (TypeError, ValueError):
+                value = None
+            if value is None or not isinstance(last_id, int):
+                raise ValidationError({'cursor': 'Invalid cursor.'})
+            key = (value, last_id)
+
+        def entry_key(entry):
+            return entry[0], entry[1]
+
+        try:
+            if self.descending:
+                end = len(entries) if key is None else bisect_left(entries, key, key=entry_key)
+                rows = entries[max(end - limit - 1, 0):end][::-1]
+            else:
+                start = 0 if key is None else bisect_right(entries, key, key=entry_key)
+                rows = entries[start:start + limit + 1]
+        except TypeError:  # cursor value not comparable with the entries
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        page = rows[:limit]
+        self.next_cursor = self.encode_cursor(list(entry_key(page[-1]))) if len(rows) > limit else None
+        return [item for _, _, item in page]
+
+    def restore(self, request, next_cursor):
+        """Re-attach a page served from cache so its next link can be built."""
+        self.request = request
+        self.next_cursor = next_cursor
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def add_link_header(self, response):
+        next_link = self.get_next_link()
+        if next_link:
+            response['Link'] = f'<{next_link}>; rel="next"'
+        return response
+
+    def get_paginated_response(self, data):
+        return self.add_link_header(Response(data))
@@ -0,0 +1,70 @@
+"""
+Join planning for model serializers.
+
+A field with a dotted source such as `doctor.hospital.name` reads through
+foreign keys, and without a join each serialized row costs one query per
+hop. JoinPlanningMixin derives the joins a serializer needs from its own
+fields, so listings can be fetched with a constant number of queries:
+
+    queryset = AppointmentSerializer.setup_queryset(Appointment.objects.filter(user=user))
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import BaseSerializer
+
+
+def _relation_paths(model, source):
+    """The relation path `source` reads through, and whether it crosses a to-many relation"""
+    path, prefetch = [], False
+    for attr in source.split('.'):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:  # a property or method; nothing more to plan
+            break
+        if not field.is_relation:
+            break
+        path.append(attr)
+        if field.many_to_many or field.one_to_many:
+            prefetch = True
+        model = field.related_model
+    return '__'.join(path), prefetch
+
+
+class JoinPlanningMixin:
+    """
+    For ModelSerializers. `select_related` and `prefetch_related` on the
+    class add joins that cannot be derived from the field sources.
+    """
+
+    select_related = ()
+    prefetch_related = ()
+
+    @classmethod
+    def required_joins(cls):
+        """(select_related, prefetch_related) paths, each tuple sorted"""
+        return _plan(cls)
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        select, prefetch = cls.required_joins()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def _plan(serializer_class):
+    model = serializer_class.Meta.model
+    select, prefetch = set(serializer_class.select_related), set(serializer_class.prefetch_related)
+    for field in serializer_class().fields.values():
+        if field.source == '*' or ('.' not in field.source and not isinstance(field, BaseSerializer)):
+            continue  # plain columns and FK ids need no join
+        path, many = _relation_paths(model, field.source)
+        if path:
+            (prefetch if many else select).add(path)
+    # A path that is a prefix of a longer one is joined by the longer one
+    select = {path for path in select if not any(other.startswith(path + '__') for other in select)}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
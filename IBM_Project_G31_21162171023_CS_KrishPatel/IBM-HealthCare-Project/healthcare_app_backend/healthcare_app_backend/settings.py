@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -47,11 +48,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be first
+    'healthcare_app_backend.tracing.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'healthcare_app_backend.db_router.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,15 +95,50 @@ WSGI_APPLICATION = "healthcare_app_backend.wsgi.application"
 # }
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # django.db.backends.postgresql plus connection metrics
+        'ENGINE': 'healthcare_app_backend.db_backends.postgresql',
         'NAME': 'Demo',
         'USER': 'postgres',
         'PASSWORD': 'krish1023',
         'HOST': 'localhost',
         'PORT': '5432',
+        # Keep connections open between requests, checking they still work
+        # before reusing them
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
         }
     }
 
+# DB_POOL=1 uses psycopg 3's connection pool (pip install "psycopg[pool]")
+# instead of one persistent connection per worker thread.
+if os.environ.get('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # required by Django when pooling
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+# DB_PGBOUNCER=1 when connecting through PgBouncer in transaction pooling
+# mode, which cannot keep server-side cursors open across transactions
+if os.environ.get('DB_PGBOUNCER') == '1':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Read replicas, as comma separated hosts reached with the default database's
+# credentials. Views marked @read_from_replica send their reads there; see
+# healthcare_app_backend/db_router.py.
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{_index}'] = {**DATABASES['default'], 'HOST': _host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['healthcare_app_backend.db_router.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write, and after a
+# listing's generation moves (covers replication lag)
+REPLICA_PIN_SECONDS = 5
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -159,6 +197,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing runs in a process pool (see user_management/hashing.py).
+# Argon2 is preferred when argon2-cffi is installed; older hashes are
+# upgraded on the next successful login.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "user_management.hashing.TunedArgon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+try:
+    import argon2  # noqa: F401
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(2))
+except ImportError:
+    pass
+
+PASSWORD_HASHING = {
+    'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', min(4, os.cpu_count() or 1))),
+    'MAX_QUEUE': int(os.environ.get('PASSWORD_HASHING_MAX_QUEUE', 32)),  # beyond this, 503
+    'RETRY_AFTER': 1,
+}
+
+# Measure with `manage.py tune_password_hasher`
+PASSWORD_ARGON2 = {
+    'TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),  # KiB
+    'PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 8)),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -212,12 +279,15 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Paginated endpoints advertise the next page in a Link header
+CORS_EXPOSE_HEADERS = ['Link']
+
 AUTH_USER_MODEL = 'user_management.User'# Update this to your custom user model
 
 # settings.py
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user_management.authentication.CachedJWTAuthentication',
     ),
 }
 FRONTEND_URL = 'http://localhost:3000'
@@ -226,9 +296,24 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
 }
 
+# Seconds an authenticated user stays in the per-process lookup cache
+USER_CACHE_TTL = 60
+
+# Token-bucket limits for the OTP/email endpoints. Switch BACKEND to
+# 'user_management.throttling.CacheBucketStore' to share counters between
+# workers through CACHE_ALIAS.
+OTP_THROTTLE = {
+    'BACKEND': 'user_management.throttling.LocalBucketStore',
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        'email': (3, 300),  # burst of 3, refilled over 5 minutes
+        'ip': (20, 60),
+    },
+}
+
 SECRET_KEY = 'x&6yrtrk@!^dp$16zm(!vpaw76genoe%$@@q)vbrz2=h01po$w'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'healthcare_app_backend.tracing.TracedSMTPBackend'  # SMTP, timed as external.smtp
 EMAIL_HOST = 'smtp.gmail.com'         # Replace with your SMTP host
 EMAIL_PORT = 587                        # SMTP port, e.g., 587 for TLS
 EMAIL_USE_TLS = True                    # Use TLS if required by your provider
@@ -241,16 +326,71 @@ CSRF_TRUSTED_ORIGINS = ['http://localhost:3000']
 RECAPTCHA_SECRET_KEY = '6LftjRcrAAAAAMzzz5Mj2AMpGmHhYwUoswKQlvv2'
 
 # Cache settings
+# 'default' keeps a short-lived per-process copy (L1) of values stored in the
+# shared 'shared' alias (L2). Writes and deletes are visible to every worker
+# on its next read. Point REDIS_URL at a Redis server in production; without
+# it the shared tier falls back to a local LocMemCache.
+REDIS_URL = os.environ.get('REDIS_URL')
+
 CACHES = {
     'default': {
+        'BACKEND': 'healthcare_app_backend.cache_backends.TieredCache',
+        'TIMEOUT': 300,  # 5 minutes default timeout
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'L1_TIMEOUT': 5,  # Seconds a value is kept in the per-process tier
+            'L1_MAX_ENTRIES': 1000,
+        }
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': 300,
+    } if REDIS_URL else {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-        'TIMEOUT': 300,  # 5 minutes default timeout
+        'TIMEOUT': 300,
         'OPTIONS': {
             'MAX_ENTRIES': 1000,  # Maximum number of entries in cache
             'CULL_FREQUENCY': 3,  # Fraction of entries to cull when max is reached
         }
-    }
+    },
+}
+
+# Listing caches are keyed on Doctor/Hospital generations (see
+# healthcare_app_backend/cache_generations.py), so writes invalidate them
+# immediately and the TTL only bounds memory use.
+LISTING_CACHE_TIMEOUT = 60 * 60 * 6  # 6 hours
+
+# Rows fetched per database round trip (and encoded per chunk) when a listing
+# endpoint streams its response; see healthcare_app_backend/streaming.py
+STREAM_CHUNK_SIZE = 2000
+
+# How often (at most) each process checks whether the in-memory autocomplete
+# index is stale; see Doctor/autocomplete.py
+AUTOCOMPLETE_REFRESH_SECONDS = 5
+# New searches are read back from this far behind the newest one seen, so
+# events committed late or stamped by a lagging clock are still counted
+AUTOCOMPLETE_SEARCH_OVERLAP_SECONDS = 60
+
+# Search events older than this are rolled up into per-query counts by
+# `manage.py prune_search_events` (see user_management/search_events.py)
+SEARCH_EVENT_RETENTION_DAYS = 90
+
+# Request tracing and /metrics (see healthcare_app_backend/tracing.py)
+TRACING = {
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('TRACING_PROFILE_SAMPLE_RATE', 0)),
+    'PROFILE_DIR': os.environ.get('TRACING_PROFILE_DIR'),  # cProfile dumps go here when set
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Appointment reminder emails, sent by `manage.py send_appointment_reminders`
+# (see user_management/reminders.py)
+APPOINTMENT_REMINDERS = {
+    'LEAD_MINUTES': 24 * 60,      # how long before the appointment to remind
+    'LOOKAHEAD_MINUTES': 15,      # how far ahead of now due reminders are loaded
+    'POLL_SECONDS': 30,
+    'BATCH_SIZE': 500,            # messages per SMTP batch
 }
 
 # import logging
@@ -0,0 +1,63 @@
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+def _orjson_default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+def dumps(obj):
+    """Encode obj to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(obj, cls=DjangoJSONEncoder).encode()
+
+
+def iter_json_array(rows, transform=None, prefix=b'', suffix=b'', batch_size=None):
+    """
+    Yield `rows` as a JSON array in byte chunks of `batch_size` items, so only
+    one batch is held in memory at a time. `prefix`/`suffix` wrap the array,
+    e.g. to stream it as the value of a key in an object.
+    """
+    batch_size = batch_size or settings.STREAM_CHUNK_SIZE
+    yield prefix + b'['
+    batch = []
+    first = True
+    for row in rows:
+        batch.append(dumps(transform(row) if transform else row))
+        if len(batch) >= batch_size:
+            yield (b'' if first else b',') + b','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b'' if first else b',') + b','.join(batch)
+    yield b']' + suffix
+
+
+def wants_stream(request):
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Stream a queryset as a JSON array. Querysets are read with
+    .iterator(chunk_size=STREAM_CHUNK_SIZE), so peak memory stays flat no
+    matter how many rows the table has.
+    """
+
+    def __init__(self, rows, transform=None, prefix=b'', suffix=b'', **kwargs):
+        if hasattr(rows, 'iterator'):
+            rows = rows.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(iter_json_array(rows, transform, prefix, suffix), **kwargs)
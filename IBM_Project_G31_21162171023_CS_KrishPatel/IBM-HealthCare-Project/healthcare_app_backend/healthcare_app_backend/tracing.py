@@ -0,0 +1,338 @@
+"""
+Request tracing and Prometheus metrics.
+
+TracingMiddleware gives every request a Trace that collects its database
+query count and time, cache hits and misses, and the time spent in named
+spans: external calls (geocoder, SMTP) and hot-path stages such as the
+recommenders. Code marks a span with
+
+    with span('recommender.predict'):
+        ...
+
+or `@traced('recommender.load')`. Outside a request, spans still feed the
+process-wide metrics. Per request the totals go out in a Server-Timing
+header and into the metrics served at /metrics in the Prometheus text
+format. Metrics are per process; scrape each worker or aggregate upstream.
+
+TRACING['PROFILE_SAMPLE_RATE'] profiles that fraction of requests with
+cProfile and writes the stats to TRACING['PROFILE_DIR'], one .prof file
+per sampled request. Under ASGI the profile covers the event loop thread
+only, not work handed to sync_to_async.
+"""
+import cProfile
+import inspect
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from .db_metrics import connection_metrics
+
+PREFIX = 'healthcare'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+DEFAULTS = {
+    'PROFILE_SAMPLE_RATE': 0.0,
+    'PROFILE_DIR': None,
+    'METRICS_TOKEN': None,  # when set, /metrics requires "Authorization: Bearer <token>"
+}
+
+
+def tracing_settings():
+    return {**DEFAULTS, **getattr(settings, 'TRACING', {})}
+
+
+class Trace:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache = defaultdict(int)          # 'l1' / 'l2' / 'miss' -> count
+        self.spans = defaultdict(float)        # span name -> seconds
+
+
+_trace = ContextVar('trace', default=None)
+
+
+def current_trace():
+    return _trace.get()
+
+
+# Process-wide registry
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: defaultdict(float))   # name -> labels -> value
+_histograms = {}                                      # name -> (buckets, labels -> [counts..., sum, count])
+_descriptions = {}                                    # name -> HELP text
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, description='', **labels):
+    with _lock:
+        _descriptions.setdefault(name, description)
+        _counters[name][_labels(labels)] += amount
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, description='', **labels):
+    with _lock:
+        _descriptions.setdefault(name, description)
+        bounds, series = _histograms.setdefault(name, (buckets, {}))
+        row = series.setdefault(_labels(labels), [0] * len(bounds) + [0.0, 0])
+        for index, bound in enumerate(bounds):
+            if value <= bound:
+                row[index] += 1
+        row[-2] += value
+        row[-1] += 1
+
+
+def reset():
+    """Forget every recorded metric"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _descriptions.clear()
+
+
+# Instrumentation API
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as stage `name`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('span_duration_seconds', elapsed, description='Time spent in traced stages', span=name)
+        trace = _trace.get()
+        if trace is not None:
+            trace.spans[name] += elapsed
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def external_call(service):
+    """A span for a call to an external service, counting failures"""
+    outcome = 'error'
+    try:
+        with span(f'external.{service}'):
+            yield
+        outcome = 'ok'
+    finally:
+        inc('external_calls_total', description='Calls to external services', service=service, outcome=outcome)
+
+
+def record_cache(result):
+    """Count a cache lookup; `result` is 'l1', 'l2' (hits) or 'miss'"""
+    inc('cache_lookups_total', description='Cache lookups by result', result=result)
+    trace = _trace.get()
+    if trace is not None:
+        trace.cache[result] += 1
+
+
+class TracedSMTPBackend(EmailBackend):
+    """SMTP email backend whose sends show up as external.smtp spans"""
+
+    def send_messages(self, email_messages):
+        with external_call('smtp'):
+            return super().send_messages(email_messages)
+
+
+# Middleware
+
+def _time_query(execute, sql, params, many, context):
+    trace = _trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace.queries += 1
+        trace.query_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """
+    Time queries on every connection, in every thread. Database connections
+    are per thread, so under ASGI a request's queries run on the
+    sync_to_async thread's connection; the timer finds the request's trace
+    through the context that thread inherits.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _server_timing(trace, elapsed):
+    hits = trace.cache['l1'] + trace.cache['l2']
+    entries = [
+        f'total;dur={elapsed * 1000:.1f}',
+        f'db;dur={trace.query_seconds * 1000:.1f};desc="{trace.queries} queries"',
+        f'cache;desc="{hits} hits, {trace.cache["miss"]} misses"',
+    ]
+    for name, seconds in trace.spans.items():
+        entries.append(f'{re.sub(r"[^A-Za-z0-9_-]", "-", name)};dur={seconds * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class TracingMiddleware:
+    """
+    Record per-request timings; goes first so it covers the whole stack.
+    Runs natively under WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _profile_path(self, route):
+        directory = tracing_settings()['PROFILE_DIR']
+        name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        return os.path.join(directory, f"{name}-{int(time.time() * 1000)}-{os.getpid()}.prof")
+
+    @contextmanager
+    def _recording(self, trace):
+        """Make `trace` current and time queries (and maybe profile) inside the block"""
+        config = tracing_settings()
+        profiler = None
+        if config['PROFILE_DIR'] and random.random() < config['PROFILE_SAMPLE_RATE']:
+            profiler = cProfile.Profile()
+
+        for alias in connections:  # Connections opened before the receiver was connected
+            install_query_timer(None, connections[alias])
+        token = _trace.set(trace)
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:  # another request on this process is being profiled
+                profiler = None
+        try:
+            yield profiler
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _trace.reset(token)
+
+    def _finish(self, request, response, trace, elapsed, profiler):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        labels = {'method': request.method, 'route': route}
+        inc('http_requests_total', description='Requests served', status=response.status_code, **labels)
+        observe('http_request_duration_seconds', elapsed, description='Time to produce a response', **labels)
+        observe('http_request_db_queries', trace.queries, buckets=COUNT_BUCKETS,
+                description='Database queries per request', **labels)
+        inc('http_request_db_seconds_total', trace.query_seconds,
+            description='Time spent in database queries', **labels)
+        response['Server-Timing'] = _server_timing(trace, elapsed)
+
+        if profiler is not None:
+            profiler.dump_stats(self._profile_path(route))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace = Trace()
+        started = time.perf_counter()
+        with self._recording(trace) as profiler:
+            response = self.get_response(request)
+        return self._finish(request, response, trace, time.perf_counter() - started, profiler)
+
+    async def __acall__(self, request):
+        trace = Trace()
+        started = time.perf_counter()
+        with self._recording(trace) as profiler:
+            response = await self.get_response(request)
+        return self._finish(request, response, trace, time.perf_counter() - started, profiler)
+
+
+# Exposition
+
+def _escape(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _sample(name, labels, value, extra=()):
+    pairs = [*labels, *extra]
+    label_text = '{' + ','.join(f'{key}="{_escape(val)}"' for key, val in pairs) + '}' if pairs else ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f'{PREFIX}_{name}{label_text} {value}'
+
+
+def _header(name, kind):
+    return [f'# HELP {PREFIX}_{name} {_descriptions.get(name, "")}', f'# TYPE {PREFIX}_{name} {kind}']
+
+
+def render_metrics():
+    lines = []
+    with _lock:
+        for name, series in _counters.items():
+            lines += _header(name, 'counter')
+            lines += [_sample(name, labels, value) for labels, value in series.items()]
+        for name, (bounds, series) in _histograms.items():
+            lines += _header(name, 'histogram')
+            for labels, row in series.items():
+                for bound, count in zip(bounds, row):
+                    lines.append(_sample(f'{name}_bucket', labels, count, [('le', f'{bound:g}')]))
+                lines.append(_sample(f'{name}_bucket', labels, row[-1], [('le', '+Inf')]))
+                lines.append(_sample(f'{name}_sum', labels, row[-2]))
+                lines.append(_sample(f'{name}_count', labels, row[-1]))
+
+    # Connection totals from db_metrics
+    fields = {'db_connections_opened_total': 'opened', 'db_connection_wait_seconds_total': 'wait_seconds_total'}
+    metrics = connection_metrics()
+    for name, field in fields.items():
+        lines.append(f'# TYPE {PREFIX}_{name} counter')
+        for alias, stats in metrics.items():
+            if field in stats:
+                lines.append(_sample(name, (('alias', alias),), stats[field]))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    token = tracing_settings()['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include 
 
+from .tracing import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('user_management.urls')),
     path('api/', include('hospital.urls')),
     path('api/', include('Doctor.urls')),
     path('api/admin/', include('user_management.admin_urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
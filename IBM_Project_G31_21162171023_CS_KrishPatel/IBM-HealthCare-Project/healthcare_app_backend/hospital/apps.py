@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class HospitalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "hospital"
+
+    def ready(self):
+        from . import signals  # noqa: F401  Registers cache invalidation and denormalization receivers
+        from .conditions import sync_condition_catalog
+        post_migrate.connect(sync_condition_catalog, sender=self)
@@ -0,0 +1,136 @@
+"""
+Exact condition matching for doctors and hospitals.
+
+Doctor.conditions_treated and Hospital.diseases_treated are JSON lists of
+lowercase names. Where the database supports JSON containment (PostgreSQL
+jsonb, with the GIN indexes created by migration hospital 0003) a filter
+is `column @> '["asthma"]'`. Elsewhere it goes through the Condition table,
+a B-tree lookup on Condition.name joined through the M2M. Either way
+"ulcer" no longer matches "ulcerative colitis".
+"""
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Condition, Hospital
+
+
+def normalize_conditions(values):
+    if isinstance(values, str):
+        values = values.split(',')
+    names = (str(value).strip().lower() for value in values or [])
+    return sorted({name for name in names if name})
+
+
+def _count_field(instance):
+    return 'hospital_count' if isinstance(instance, Hospital) else 'doctor_count'
+
+
+def sync_conditions(instance, values):
+    """
+    Point instance.conditions at the Condition rows named in `values`,
+    adjusting the catalog usage counts of only the names that changed.
+    """
+    conditions = Condition.objects.using(instance._state.db or DEFAULT_DB_ALIAS)
+    names = set(normalize_conditions(values))
+    current = set(instance.conditions.values_list('name', flat=True))
+    added, removed = names - current, current - names
+    count_field = _count_field(instance)
+
+    if added:
+        conditions.bulk_create([Condition(name=name) for name in added], ignore_conflicts=True)
+        added_rows = conditions.filter(name__in=added)
+        instance.conditions.add(*added_rows)
+        added_rows.update(**{count_field: F(count_field) + 1})
+    if removed:
+        removed_rows = conditions.filter(name__in=removed)
+        instance.conditions.remove(*removed_rows)
+        removed_rows.update(**{count_field: F(count_field) - 1})
+
+
+def release_conditions(instance):
+    """Decrement catalog counts for a doctor or hospital about to be deleted"""
+    count_field = _count_field(instance)
+    instance.conditions.all().update(**{count_field: F(count_field) - 1})
+
+
+def refresh_condition_counts(using=DEFAULT_DB_ALIAS):
+    """Recompute every condition's usage counts from the M2M links"""
+    Condition.objects.using(using).update(
+        doctor_count=Coalesce(Subquery(_link_counts('doctors', using)), 0),
+        hospital_count=Coalesce(Subquery(_link_counts('hospitals', using)), 0),
+    )
+
+
+def _link_counts(relation, using):
+    through = getattr(Condition, relation).through
+    return (
+        through.objects.using(using).filter(condition=OuterRef('pk'))
+        .order_by()
+        .values('condition')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+
+
+def condition_catalog(kind='hospital'):
+    """Condition names used by doctors or hospitals, most used first"""
+    count_field = f'{kind}_count'
+    return list(
+        Condition.objects.filter(**{f'{count_field}__gt': 0})
+        .order_by(f'-{count_field}', 'name')
+        .values_list('name', flat=True)
+    )
+
+
+def condition_filter(json_field, conditions, match='all'):
+    """
+    Q object matching rows whose `json_field` list contains the given
+    conditions, all of them (match='all') or at least one (match='any').
+    """
+    names = normalize_conditions(conditions)
+    if not names:
+        return Q()
+
+    if connection.features.supports_json_field_contains:
+        if match == 'all':
+            return Q(**{f'{json_field}__contains': names})
+        query = Q()
+        for name in names:
+            query |= Q(**{f'{json_field}__contains': [name]})
+        return query
+
+    if match == 'all':
+        query = Q()
+        for name in names:
+            query &= Q(pk__in=Condition.objects.filter(name=name).values(_reverse_name(json_field)))
+        return query
+    return Q(pk__in=Condition.objects.filter(name__in=names).values(_reverse_name(json_field)))
+
+
+def _reverse_name(json_field):
+    return 'hospitals' if json_field == 'diseases_treated' else 'doctors'
+
+
+def doctors_treating(conditions, match='all'):
+    from Doctor.models import Doctor
+
+    return Doctor.objects.filter(condition_filter('conditions_treated', conditions, match))
+
+
+def hospitals_treating(conditions, match='all'):
+    return Hospital.objects.filter(condition_filter('diseases_treated', conditions, match))
+
+
+def sync_condition_catalog(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate hook. Backfills Condition links for rows saved before the
+    table existed and recounts the catalog.
+    """
+    from Doctor.models import Doctor
+
+    for model, column in ((Doctor, 'conditions_treated'), (Hospital, 'diseases_treated')):
+        unsynced = model.objects.using(using).filter(conditions__isnull=True).exclude(**{column: []})
+        for instance in unsynced.only('pk', column).iterator():
+            sync_conditions(instance, getattr(instance, column))
+    refresh_condition_counts(using=using)
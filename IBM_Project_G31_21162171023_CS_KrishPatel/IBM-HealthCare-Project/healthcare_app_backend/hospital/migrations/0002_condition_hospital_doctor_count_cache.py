@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 07:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_doctor_counts(apps, schema_editor):
+    Doctor = apps.get_model('Doctor', 'Doctor')
+    Hospital = apps.get_model('hospital', 'Hospital')
+    doctors = (
+        Doctor.objects.filter(hospital=OuterRef('pk'))
+        .order_by()
+        .values('hospital')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Hospital.objects.update(doctor_count_cache=Coalesce(Subquery(doctors), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '0001_initial'),
+        ('hospital', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Condition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('doctor_count', models.PositiveIntegerField(default=0)),
+                ('hospital_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-doctor_count', 'name'], name='hospital_co_doctor__9596f0_idx'), models.Index(fields=['-hospital_count', 'name'], name='hospital_co_hospita_91484a_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='hospital',
+            name='conditions',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='hospitals', to='hospital.condition'),
+        ),
+        migrations.AddField(
+            model_name='hospital',
+            name='doctor_count_cache',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Condition links and counts are backfilled by the post_migrate hook
+        # hospital.conditions.sync_condition_catalog
+        migrations.RunPython(backfill_doctor_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# jsonb_path_ops indexes only support @>, which is the one operator
+# hospital.conditions.condition_filter uses
+CONDITION_INDEXES = (
+    ('doctors', 'conditions_treated'),
+    ('hospital_hospital', 'diseases_treated'),
+)
+
+
+def create_condition_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in CONDITION_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{column}_gin ON {table} USING gin ({column} jsonb_path_ops)"
+        )
+
+
+def drop_condition_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in CONDITION_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '0001_initial'),
+        ('hospital', '0002_condition_hospital_doctor_count_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_condition_indexes, drop_condition_indexes),
+    ]
@@ -1,6 +1,66 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from user_management.utils import get_coordinates_from_address
 
+
+class Condition(models.Model):
+    """
+    A normalized condition/disease name shared by doctors and hospitals.
+    Mirrors the JSON lists on Doctor and Hospital (kept in sync by
+    hospital.signals) so condition filters are B-tree index lookups, and
+    doubles as the condition catalog with per-condition usage counts.
+    """
+    name = models.CharField(max_length=200, unique=True)
+    # Usage counts, maintained incrementally by hospital.conditions.sync_conditions
+    doctor_count = models.PositiveIntegerField(default=0)
+    hospital_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-doctor_count', 'name']),  # Catalog reads by frequency
+            models.Index(fields=['-hospital_count', 'name']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class HospitalQuerySet(models.QuerySet):
+    def with_doctor_counts(self):
+        """Annotate a live `doctor_count` computed in the same query"""
+        return self.annotate(doctor_count=Count('doctors'))
+
+    def specialization_counts(self):
+        """Return {hospital_id: {specialization: doctors}} from a single GROUP BY query"""
+        from Doctor.models import Doctor
+
+        rows = (
+            Doctor.objects.filter(hospital__in=self.values('pk'))
+            .values('hospital_id', 'specialization')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        counts = {}
+        for row in rows:
+            counts.setdefault(row['hospital_id'], {})[row['specialization']] = row['count']
+        return counts
+
+    def refresh_doctor_counts(self):
+        """Recompute the denormalized doctor counter with one UPDATE"""
+        from Doctor.models import Doctor
+
+        doctors = (
+            Doctor.objects.filter(hospital=OuterRef('pk'))
+            .order_by()
+            .values('hospital')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return self.update(doctor_count_cache=Coalesce(Subquery(doctors), 0))
+
+
 class Hospital(models.Model):
     name = models.CharField(max_length=200)
     specialization = models.CharField(max_length=200)
@@ -9,6 +69,10 @@ class Hospital(models.Model):
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
     available_beds = models.IntegerField()
     diseases_treated = models.JSONField(default=list)  # Store related diseases as a list
+    doctor_count_cache = models.PositiveIntegerField(default=0, editable=False)  # Maintained by hospital.signals
+    conditions = models.ManyToManyField(Condition, related_name='hospitals', blank=True, editable=False)
+
+    objects = HospitalQuerySet.as_manager()
 
     class Meta:
         indexes = [
@@ -16,6 +80,11 @@ class Hospital(models.Model):
         ]
 
     def save(self, *args, **kwargs):
+        # Keep diseases_treated a list of lowercase strings so exact matches work
+        if isinstance(self.diseases_treated, str):
+            self.diseases_treated = self.diseases_treated.split(',')
+        self.diseases_treated = [str(d).strip().lower() for d in self.diseases_treated or [] if str(d).strip()]
+
         # Update coordinates if address has changed
         if self.address:
             lat, lon = get_coordinates_from_address(self.address)
@@ -13,5 +13,5 @@ class HospitalSerializer(serializers.ModelSerializer):
         ]
         
     def get_doctor_count(self, obj):
-        """Get count of doctors associated with this hospital"""
-        return obj.doctors.count()
\ No newline at end of file
+        """Prefer a live count annotated by with_doctor_counts(), else the denormalized counter"""
+        return getattr(obj, 'doctor_count', obj.doctor_count_cache)
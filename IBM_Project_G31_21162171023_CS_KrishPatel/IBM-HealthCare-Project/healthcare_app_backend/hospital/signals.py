@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from Doctor.models import Doctor
+from healthcare_app_backend.cache_generations import HOSPITAL, bump_generation
+from .conditions import release_conditions, sync_conditions
+from .models import Hospital
+
+
+@receiver(post_save, sender=Hospital)
+@receiver(post_delete, sender=Hospital)
+def invalidate_hospital_listings(sender, instance, **kwargs):
+    bump_generation(HOSPITAL)
+
+
+# Hospital.doctor_count_cache is kept in step with Doctor rows here. Bulk
+# QuerySet.update()/bulk_create() on doctors skip these receivers and must
+# call Hospital.objects.refresh_doctor_counts() themselves. The previous
+# hospital is snapshotted by Doctor.signals.remember_previous_values.
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def refresh_hospital_doctor_counts(sender, instance, **kwargs):
+    hospital_ids = {instance.hospital_id, getattr(instance, '_previous_hospital_id', None)}
+    hospital_ids.discard(None)
+    Hospital.objects.filter(pk__in=hospital_ids).refresh_doctor_counts()
+
+
+@receiver(post_save, sender=Hospital)
+def sync_hospital_conditions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_conditions(instance, instance.diseases_treated)
+
+
+@receiver(post_save, sender=Doctor)
+def sync_doctor_conditions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_conditions(instance, instance.conditions_treated)
+
+
+@receiver(pre_delete, sender=Hospital)
+@receiver(pre_delete, sender=Doctor)
+def release_catalog_conditions(sender, instance, **kwargs):
+    release_conditions(instance)
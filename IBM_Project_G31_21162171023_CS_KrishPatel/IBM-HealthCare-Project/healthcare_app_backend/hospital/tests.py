@@ -1,3 +1,139 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from Doctor.models import Doctor
+from healthcare_app_backend.pagination import KeysetPagination
+
+from .conditions import doctors_treating, hospitals_treating
+from .models import Hospital
+from .serializers import HospitalSerializer
+
+
+@mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None))
+class ListingInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_hospital_save_invalidates_disease_options(self, _geocode):
+        hospital = Hospital.objects.create(
+            name='City Hospital', specialization='General', address='Ahmedabad',
+            latitude=23.02, longitude=72.57, available_beds=10,
+            diseases_treated=['asthma']
+        )
+        self.assertEqual(self.client.get('/api/disease-options/').json(), ['asthma'])
+
+        hospital.diseases_treated = ['asthma', 'diabetes']
+        hospital.save()
+        self.assertEqual(self.client.get('/api/disease-options/').json(), ['asthma', 'diabetes'])
+
+
+@mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None))
+class HospitalDoctorCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def create_hospital(self, name):
+        return Hospital.objects.create(
+            name=name, specialization='General', address='Ahmedabad',
+            latitude=23.02, longitude=72.57, available_beds=10
+        )
+
+    def test_cursor_with_wrong_value_types_is_rejected(self, _geocode):
+        cursor = KeysetPagination().encode_cursor(['x', 'y'])
+        response = self.client.get('/api/hospitals/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+    def test_counter_follows_doctor_changes(self, _geocode):
+        first = self.create_hospital('First')
+        second = self.create_hospital('Second')
+        doctor = Doctor.objects.create(name='A', mobile_number='9999999999', hospital=first)
+        Doctor.objects.create(name='B', mobile_number='9999999998', hospital=first)
+
+        doctor.hospital = second
+        doctor.save()
+        counts = dict(Hospital.objects.values_list('name', 'doctor_count_cache'))
+        self.assertEqual(counts, {'First': 1, 'Second': 1})
+
+        doctor.delete()
+        self.assertEqual(Hospital.objects.get(pk=second.pk).doctor_count_cache, 0)
+
+    def test_hospital_list_is_one_query(self, _geocode):
+        for i in range(3):
+            hospital = self.create_hospital(f'Hospital {i}')
+            Doctor.objects.create(
+                name=f'Doctor {i}', mobile_number='9999999999',
+                specialization='Cardiology', hospital=hospital
+            )
+
+        with self.assertNumQueries(1):
+            hospitals = HospitalSerializer(Hospital.objects.all(), many=True).data
+        self.assertEqual([h['doctor_count'] for h in hospitals], [1, 1, 1])
+
+        response = self.client.get('/api/hospitals/?by_specialization=1')
+        self.assertEqual(response.json()[0]['doctors_by_specialization'], {'Cardiology': 1})
+
+
+@mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None))
+class ConditionMatchingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_condition_match_is_exact(self, _geocode):
+        hospital = Hospital.objects.create(
+            name='City Hospital', specialization='General', address='Ahmedabad',
+            latitude=23.02, longitude=72.57, available_beds=10,
+            diseases_treated=['Ulcerative Colitis', 'asthma']
+        )
+        gastro = Doctor.objects.create(
+            name='A', mobile_number='9999999999', hospital=hospital,
+            conditions_treated=['ulcer', 'gerd']
+        )
+        Doctor.objects.create(
+            name='B', mobile_number='9999999998', hospital=hospital,
+            conditions_treated=['ulcerative colitis']
+        )
+
+        self.assertEqual(list(doctors_treating(['Ulcer'])), [gastro])
+        self.assertEqual(list(doctors_treating(['ulcer', 'gerd'])), [gastro])
+        self.assertEqual(doctors_treating(['ulcer', 'colitis'], match='any').count(), 1)
+        self.assertFalse(hospitals_treating(['ulcer']).exists())
+        self.assertEqual(list(hospitals_treating(['ulcerative colitis'])), [hospital])
+
+        response = APIClient().get('/api/hospitals/?disease=asthma')
+        self.assertEqual([h['id'] for h in response.json()], [hospital.id])
+
+
+class DoctorCountMigrationTests(TransactionTestCase):
+    before = [('hospital', '0001_initial'), ('Doctor', '0001_initial')]
+    after = [('hospital', '0002_condition_hospital_doctor_count_cache')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_counter_is_backfilled_for_existing_hospitals(self):
+        apps = self.migrate(self.before)
+        OldHospital = apps.get_model('hospital', 'Hospital')
+        OldDoctor = apps.get_model('Doctor', 'Doctor')
+        fields = dict(specialization='General', address='Ahmedabad', latitude=23.02, longitude=72.57, available_beds=10)
+        busy = OldHospital.objects.create(name='Busy', **fields)
+        OldHospital.objects.create(name='Empty', **fields)
+        for i in range(2):
+            OldDoctor.objects.create(name=f'D{i}', mobile_number=f'900000000{i}', hospital=busy)
+
+        apps = self.migrate(self.after)
+        counts = dict(apps.get_model('hospital', 'Hospital').objects.values_list('name', 'doctor_count_cache'))
+        self.assertEqual(counts, {'Busy': 2, 'Empty': 0})
@@ -1,9 +1,20 @@
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.cache import cache
+from django.conf import settings
 
+from django.db.models import F
+
+from healthcare_app_backend.async_views import async_api_view
+from healthcare_app_backend.cache_generations import DOCTOR, HOSPITAL, versioned_key
+from healthcare_app_backend.db_router import read_from_replica
+from healthcare_app_backend.pagination import KeysetPagination
+from healthcare_app_backend.streaming import StreamingJSONResponse, wants_stream
+
+from .conditions import condition_catalog, condition_filter, normalize_conditions
 from .models import Hospital
 from .serializers import HospitalSerializer
 from Doctor.models import Doctor
@@ -15,24 +26,57 @@ import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-@api_view(['GET'])
-def get_hospitals(request):
-    """Get all hospitals or filter by specialization"""
+def _hospital_page(paginator, request, disease_filter, by_specialization):
+    # doctor_count comes from the denormalized counter, so a page is one query
+    hospitals = paginator.paginate_queryset(Hospital.objects.filter(disease_filter), request)
+    hospital_list = HospitalSerializer(hospitals, many=True).data
+
+    if by_specialization:
+        counts = Hospital.objects.filter(pk__in=[h.pk for h in hospitals]).specialization_counts()
+        for hospital in hospital_list:
+            hospital['doctors_by_specialization'] = counts.get(hospital['id'], {})
+    return hospital_list
+
+@async_api_view(['GET'])
+@read_from_replica(HOSPITAL, DOCTOR)
+async def get_hospitals(request):
+    """
+    Get hospitals one keyset page at a time (`limit`/`cursor`, next page in
+    the Link header). Pass `stream=1` to stream the full list straight from
+    the database instead, or `by_specialization=1` to add per-specialization
+    doctor counts to each hospital. `disease` filters by exact disease names
+    (comma separated, all must match).
+    """
+    diseases = normalize_conditions(request.GET.get('disease', ''))
+    disease_filter = condition_filter('diseases_treated', diseases)
+    by_specialization = request.GET.get('by_specialization', '').lower() in ('1', 'true', 'yes')
+    paginator = KeysetPagination('id', model=Hospital)
+    page_key = paginator.page_key(request)
+    paginator.decode_cursor(request)
+
     try:
+        if wants_stream(request):
+            fields = [f for f in HospitalSerializer.Meta.fields if f != 'doctor_count']
+            hospitals = Hospital.objects.filter(disease_filter).order_by('id')
+            hospitals = hospitals.values(*fields, doctor_count=F('doctor_count_cache'))
+            return StreamingJSONResponse(hospitals)
+
         # Check cache first
-        cache_key = "all_hospitals"
-        cached_data = cache.get(cache_key)
+        cache_key = await sync_to_async(versioned_key)(
+            f"all_hospitals:{','.join(diseases)}:{page_key}:{int(by_specialization)}", HOSPITAL, DOCTOR
+        )
+        cached_data = await cache.aget(cache_key)
         
         if cached_data:
-            return JsonResponse(cached_data, safe=False)
-            
-        hospitals = Hospital.objects.all().select_related('doctors')
-        serializer = HospitalSerializer(hospitals, many=True)
+            hospital_list, next_cursor = cached_data
+            paginator.restore(request, next_cursor)
+            return paginator.add_link_header(JsonResponse(hospital_list, safe=False))
+
+        hospital_list = await sync_to_async(_hospital_page)(paginator, request, disease_filter, by_specialization)
         
-        # Cache the response for 5 minutes
-        cache.set(cache_key, serializer.data, timeout=300)
+        await cache.aset(cache_key, (hospital_list, paginator.next_cursor), timeout=settings.LISTING_CACHE_TIMEOUT)
         
-        return JsonResponse(serializer.data, safe=False)
+        return paginator.add_link_header(JsonResponse(hospital_list, safe=False))
         
     except Exception as e:
         logger.error(f"Error fetching hospitals: {str(e)}")
@@ -42,6 +86,7 @@ def get_hospitals(request):
         )
 
 @api_view(['GET'])
+@read_from_replica()
 def get_nearest_hospitals(request):
     """Get hospitals near a given location"""
     try:
@@ -53,7 +98,7 @@ def get_nearest_hospitals(request):
         recommender = LocationBasedHospitalRecommender()
         
         # Get all hospitals
-        hospitals = Hospital.objects.all().select_related('doctors')
+        hospitals = Hospital.objects.all().prefetch_related('doctors')
         
         # Convert to list of dictionaries for the recommender
         hospital_data = []
@@ -102,31 +147,21 @@ def get_nearest_hospitals(request):
         )
 
 @api_view(['GET'])
+@read_from_replica(HOSPITAL)
 def get_disease_options(request):
-    """Fetches a list of unique diseases treated by hospitals"""
+    """Fetches the diseases treated by hospitals, most common first"""
     try:
         # Check cache first
-        cache_key = "disease_options"
+        cache_key = versioned_key("disease_options", HOSPITAL)
         cached_data = cache.get(cache_key)
         
         if cached_data:
             return JsonResponse(cached_data, safe=False)
         
-        # Get all diseases from all hospitals
-        all_diseases = set()
-        hospitals = Hospital.objects.all()
-        
-        for hospital in hospitals:
-            if hospital.diseases_treated:
-                if isinstance(hospital.diseases_treated, list):
-                    all_diseases.update(hospital.diseases_treated)
-                else:
-                    all_diseases.add(hospital.diseases_treated)
-        
-        diseases_list = sorted(list(all_diseases))
+        # Read from the materialized condition catalog
+        diseases_list = condition_catalog('hospital')
         
-        # Cache for 10 minutes
-        cache.set(cache_key, diseases_list, timeout=600)
+        cache.set(cache_key, diseases_list, timeout=settings.LISTING_CACHE_TIMEOUT)
         
         return JsonResponse(diseases_list, safe=False)
         
@@ -138,6 +173,7 @@ def get_disease_options(request):
         )
 
 @api_view(['GET'])
+@read_from_replica()
 def Hospital_Details_View(request, id):
     """Get detailed information about a specific hospital"""
     try:
@@ -0,0 +1,256 @@
+"""
+Benchmarks for the recommenders.
+
+`generate_catalog` builds a synthetic catalog of doctors and hospitals. It
+has the shapes the app stores:
+
+* specializations are drawn with Zipf-like weights, so a few are common and
+  the rest are rare;
+* each doctor treats every condition of its specialty, as Doctor.save()
+  ensures, plus up to two popular conditions from other specialties;
+* hospitals cluster around large Indian cities, weighted by population,
+  with a share spread uniformly over the country.
+
+`run_benchmarks` measures DoctorRecommender.fit, recommend_doctors,
+save/load and LocationBasedDoctorRecommender.recommend_doctors at each
+catalog size. For every stage it reports latency percentiles, throughput
+and peak RSS, as a JSON-serializable report that `compare` can check
+against a baseline. Run it with `manage.py benchmark_recommenders`.
+"""
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# (name, latitude, longitude, weight by metro population in millions)
+CITIES = [
+    ('Mumbai', 19.076, 72.878, 21), ('Delhi', 28.704, 77.102, 29),
+    ('Bengaluru', 12.972, 77.595, 12), ('Kolkata', 22.573, 88.364, 15),
+    ('Chennai', 13.083, 80.271, 11), ('Hyderabad', 17.385, 78.487, 10),
+    ('Ahmedabad', 23.023, 72.571, 8), ('Pune', 18.520, 73.857, 7),
+    ('Surat', 21.170, 72.831, 7), ('Jaipur', 26.912, 75.787, 4),
+    ('Lucknow', 26.847, 80.947, 4), ('Kanpur', 26.449, 80.331, 3),
+    ('Nagpur', 21.146, 79.088, 3), ('Indore', 22.720, 75.858, 3),
+    ('Bhopal', 23.260, 77.413, 2), ('Patna', 25.594, 85.138, 2),
+    ('Kochi', 9.931, 76.267, 2), ('Guwahati', 26.144, 91.736, 1),
+]
+INDIA_LATITUDE = (8.0, 35.5)
+INDIA_LONGITUDE = (68.0, 97.5)
+RURAL_SHARE = 0.15    # hospitals placed anywhere in the country, not near a city
+CITY_SPREAD = 0.12    # degrees; about 13 km standard deviation
+DOCTORS_PER_HOSPITAL = 20
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def _zipf_weights(count, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def _location(rng):
+    if rng.random() < RURAL_SHARE:
+        return rng.uniform(*INDIA_LATITUDE), rng.uniform(*INDIA_LONGITUDE)
+    _, latitude, longitude, _ = rng.choices(CITIES, weights=[c[3] for c in CITIES])[0]
+    return (
+        min(max(rng.gauss(latitude, CITY_SPREAD), INDIA_LATITUDE[0]), INDIA_LATITUDE[1]),
+        min(max(rng.gauss(longitude, CITY_SPREAD), INDIA_LONGITUDE[0]), INDIA_LONGITUDE[1]),
+    )
+
+
+def generate_catalog(doctor_count, conditions_by_specialty, seed=0):
+    """
+    (doctors, hospitals) as the dicts the recommenders are fitted on.
+    `conditions_by_specialty` maps a specialty to its conditions, e.g.
+    Doctor.models.COMMON_CONDITIONS. The same seed gives the same catalog.
+    """
+    rng = random.Random(seed)
+    specialties = list(conditions_by_specialty)
+    rng.shuffle(specialties)  # which specialty is most common depends on the seed only
+    specialty_weights = _zipf_weights(len(specialties))
+    all_conditions = [c for s in specialties for c in conditions_by_specialty[s]]
+    condition_weights = _zipf_weights(len(all_conditions))
+
+    hospitals = []
+    for hospital_id in range(1, max(1, doctor_count // DOCTORS_PER_HOSPITAL) + 1):
+        latitude, longitude = _location(rng)
+        specialty = rng.choices(specialties, weights=specialty_weights)[0]
+        hospitals.append({
+            'id': hospital_id,
+            'name': f'Hospital {hospital_id}',
+            'address': f'{hospital_id} Main Road',
+            'latitude': latitude,
+            'longitude': longitude,
+            'specialization': specialty.title(),
+            'diseases_treated': sorted(set(
+                rng.choices(all_conditions, weights=condition_weights, k=rng.randint(3, 10))
+            )),
+            'available_beds': rng.randint(0, 500),
+        })
+
+    # Shared between a hospital's doctors, as the recommenders never modify it
+    summaries = [{k: h[k] for k in ('name', 'address', 'latitude', 'longitude')} for h in hospitals]
+    doctors = []
+    for doctor_id in range(1, doctor_count + 1):
+        index = rng.randrange(len(hospitals))
+        hospital = hospitals[index]
+        specialty = rng.choices(specialties, weights=specialty_weights)[0]
+        extra = rng.choices(all_conditions, weights=condition_weights, k=rng.choice((0, 0, 1, 2)))
+        experience = min(int(rng.expovariate(1 / 10)), 45)
+        doctors.append({
+            'id': doctor_id,
+            'name': f'Doctor {doctor_id}',
+            'specialization': specialty.title(),
+            'experience_years': experience,
+            'rating': round(min(5.0, max(1.0, rng.gauss(4.1, 0.5))), 1),
+            'patients_treated': int(experience * rng.uniform(50, 400)),
+            'consultation_fee_inr': rng.choice((200, 300, 500, 700, 1000, 1500, 2000)),
+            'conditions_treated': sorted(set(conditions_by_specialty[specialty]) | set(extra)),
+            'latitude': hospital['latitude'],
+            'longitude': hospital['longitude'],
+            'hospital': summaries[index],
+        })
+    return doctors, hospitals
+
+
+def _current_rss():
+    """Resident set size in bytes, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRSS:
+    """Highest RSS seen while the block runs, sampled every `interval` seconds"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while True:
+            rss = _current_rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        rss = _current_rss()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+
+def summarize(seconds, peak_rss=None):
+    """Latency percentiles (ms), throughput (calls/s) and peak RSS (MB) of a stage"""
+    ordered = sorted(seconds)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'runs': len(ordered),
+        'p50_ms': percentile(50),
+        'p90_ms': percentile(90),
+        'p99_ms': percentile(99),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'throughput_per_s': len(ordered) / sum(ordered) if sum(ordered) else None,
+        'peak_rss_mb': peak_rss / 2 ** 20 if peak_rss is not None else None,
+    }
+
+
+def measure(calls):
+    """Run each zero-argument callable once; returns its summary"""
+    timings = []
+    with PeakRSS() as rss:
+        for call in calls:
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+    return summarize(timings, rss.peak)
+
+
+def benchmark_size(doctor_count, conditions_by_specialty, repeat=50, n_estimators=100, seed=0):
+    """Summaries for every recommender stage on a catalog of `doctor_count` doctors"""
+    from .doctor_recommender import DoctorRecommender
+    from .location_recommender import LocationBasedDoctorRecommender
+
+    rng = random.Random(seed)
+    doctors, _ = generate_catalog(doctor_count, conditions_by_specialty, seed)
+    all_conditions = sorted({c for conditions in conditions_by_specialty.values() for c in conditions})
+    queries = [rng.choice(all_conditions) for _ in range(repeat)]
+    positions = [(rng.uniform(*INDIA_LATITUDE), rng.uniform(*INDIA_LONGITUDE)) for _ in range(repeat)]
+    stages = {}
+
+    recommender = DoctorRecommender(n_estimators=n_estimators)
+    stages['doctor_recommender.fit'] = measure([lambda: recommender.fit(doctors)])
+    stages['doctor_recommender.recommend_doctors'] = measure(
+        [lambda q=q: recommender.recommend_doctors(q) for q in queries]
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'doctor_recommender.pkl')
+        stages['doctor_recommender.save'] = measure([lambda: recommender.save(path)])
+        stages['doctor_recommender.save']['file_mb'] = os.path.getsize(path) / 2 ** 20
+        stages['doctor_recommender.load'] = measure([lambda: DoctorRecommender().load(path)])
+    del recommender
+
+    location = LocationBasedDoctorRecommender()
+    stages['location_recommender.fit'] = measure([lambda: location.fit(doctors)])
+    stages['location_recommender.recommend_doctors'] = measure([
+        lambda q=q, p=p: location.recommend_doctors(p[0], p[1], query=q)
+        for q, p in zip(queries, positions)
+    ])
+    return stages
+
+
+def run_benchmarks(sizes, conditions_by_specialty, repeat=50, n_estimators=100, seed=0, progress=None):
+    report = {
+        'meta': {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'n_estimators': n_estimators,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for size in sizes:
+        if progress:
+            progress(f"{size} doctors")
+        report['results'][str(size)] = benchmark_size(
+            size, conditions_by_specialty, repeat=repeat, n_estimators=n_estimators, seed=seed
+        )
+    return report
+
+
+def compare(baseline, current, max_regression=0.2, metric='p50_ms'):
+    """
+    Stages whose `metric` grew by more than `max_regression` (a fraction)
+    against the baseline report, as (size, stage, baseline, current) tuples.
+    Sizes or stages missing from either report are skipped.
+    """
+    regressions = []
+    for size, stages in current['results'].items():
+        for stage, summary in stages.items():
+            before = baseline['results'].get(size, {}).get(stage, {}).get(metric)
+            after = summary.get(metric)
+            if before and after is not None and after > before * (1 + max_regression):
+                regressions.append((size, stage, before, after))
+    return regressions
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer
+from sklearn.preprocessing import StandardScaler, MultiLabelBinarizer, OneHotEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 import pickle
@@ -13,6 +13,8 @@ from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import os
 
+from healthcare_app_backend.tracing import span, traced
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -48,6 +50,7 @@ class DoctorRecommender:
         tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
         return " ".join(tokens)
 
+    @traced('recommender.fit')
     def fit(self, doctors_data: List[Dict[str, Any]]) -> None:
         """Train the recommendation model using the provided doctors data."""
         try:
@@ -67,9 +70,11 @@ class DoctorRecommender:
                 ('scaler', StandardScaler())
             ])
             
+            # Specialization is text; the classifier only takes numbers
             self.feature_transformer = ColumnTransformer(
                 transformers=[
-                    ('num', numeric_transformer, self.numeric_features)
+                    ('num', numeric_transformer, self.numeric_features),
+                    ('cat', OneHotEncoder(handle_unknown='ignore'), self.categorical_features)
                 ],
                 remainder='passthrough'
             )
@@ -116,14 +121,15 @@ class DoctorRecommender:
                 logger.error("Model not trained")
                 return []
                 
-            # Preprocess query
-            processed_query = self.preprocess_text(query)
-            
-            # Get all conditions
-            all_conditions = self.mlb.classes_
-            
-            # Find matching conditions
-            matching_conditions = [c for c in all_conditions if processed_query in c]
+            with span('recommender.preprocess'):
+                # Preprocess query
+                processed_query = self.preprocess_text(query)
+                
+                # Get all conditions
+                all_conditions = self.mlb.classes_
+                
+                # Find matching conditions
+                matching_conditions = [c for c in all_conditions if processed_query in c]
             if not matching_conditions:
                 logger.info(f"No exact matches found for query: {query}")
                 return []
@@ -131,22 +137,29 @@ class DoctorRecommender:
             # Get condition indices
             condition_indices = [list(all_conditions).index(c) for c in matching_conditions]
             
-            # Get current doctor features
-            X = self.feature_transformer.transform(self.doctors_df[self.numeric_features + self.categorical_features])
-            
-            # Get probability scores for matching conditions
-            proba_scores = self.classifier.predict_proba(X)
-            
-            # Calculate average probability across matching conditions
-            avg_scores = np.mean([proba_scores[i][:, idx] for i, idx in enumerate(condition_indices)], axis=0)
-            
-            # Get doctor indices sorted by probability
-            doctor_indices = np.argsort(avg_scores)[::-1]
-            
-            # Apply specialization filter if provided
-            if specialization:
-                spec_mask = self.doctors_df['specialization'].str.lower() == specialization.lower()
-                doctor_indices = doctor_indices[spec_mask[doctor_indices]]
+            with span('recommender.predict'):
+                # Get current doctor features
+                X = self.feature_transformer.transform(self.doctors_df[self.numeric_features + self.categorical_features])
+                
+                # Get probability scores for matching conditions
+                proba_scores = self.classifier.predict_proba(X)
+            
+            with span('recommender.rank'):
+                # predict_proba gives one (doctors, classes) array per condition;
+                # average the probability of class 1 across matching conditions
+                scores = []
+                for idx in condition_indices:
+                    classes = list(self.classifier.classes_[idx])
+                    scores.append(proba_scores[idx][:, classes.index(1)] if 1 in classes else np.zeros(X.shape[0]))
+                avg_scores = np.mean(scores, axis=0)
+                
+                # Get doctor indices sorted by probability
+                doctor_indices = np.argsort(avg_scores)[::-1]
+                
+                # Apply specialization filter if provided
+                if specialization:
+                    spec_mask = self.doctors_df['specialization'].str.lower() == specialization.lower()
+                    doctor_indices = doctor_indices[spec_mask[doctor_indices]]
             
             # Apply pagination
             start_idx = (page - 1) * limit
@@ -7,6 +7,8 @@ from nltk.tokenize import word_tokenize, RegexpTokenizer
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
+from healthcare_app_backend.tracing import span, traced
+
 # Download required NLTK data
 try:
     nltk.data.find('corpora/stopwords')
@@ -64,35 +66,37 @@ class LocationBasedRecommender:
         try:
             recommendations = []
             
-            for item in self.items:
-                # Calculate distance
-                distance = self.calculate_distance(
-                    user_latitude,
-                    user_longitude,
-                    item['latitude'],
-                    item['longitude']
-                )
-                
-                # Skip if too far
-                if distance > max_distance_km:
-                    continue
+            with span('recommender.score'):
+                for item in self.items:
+                    # Calculate distance
+                    distance = self.calculate_distance(
+                        user_latitude,
+                        user_longitude,
+                        item['latitude'],
+                        item['longitude']
+                    )
+                    
+                    # Skip if too far
+                    if distance > max_distance_km:
+                        continue
+                        
+                    # Calculate similarity score
+                    similarity = self.calculate_similarity_score(item, query)
+                    
+                    # Combine distance and similarity scores
+                    # Distance score decreases with distance (inverse relationship)
+                    distance_score = 1 / (1 + distance)
+                    final_score = 0.7 * similarity + 0.3 * distance_score
                     
-                # Calculate similarity score
-                similarity = self.calculate_similarity_score(item, query)
-                
-                # Combine distance and similarity scores
-                # Distance score decreases with distance (inverse relationship)
-                distance_score = 1 / (1 + distance)
-                final_score = 0.7 * similarity + 0.3 * distance_score
-                
-                recommendations.append({
-                    **item,
-                    'distance_km': round(distance, 2),
-                    'relevance_score': round(final_score, 3)
-                })
+                    recommendations.append({
+                        **item,
+                        'distance_km': round(distance, 2),
+                        'relevance_score': round(final_score, 3)
+                    })
             
-            # Sort by final score descending
-            recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
+            with span('recommender.rank'):
+                # Sort by final score descending
+                recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
             
             return recommendations[:limit]
             
@@ -103,6 +107,7 @@ class LocationBasedRecommender:
 class LocationBasedDoctorRecommender(LocationBasedRecommender):
     """Location-based doctor recommendations."""
     
+    @traced('recommender.fit')
     def fit(self, doctors_data: List[Dict[str, Any]]) -> None:
         """Process doctor data for recommendations."""
         self.items = []
@@ -163,6 +168,7 @@ class LocationBasedDoctorRecommender(LocationBasedRecommender):
 class LocationBasedHospitalRecommender(LocationBasedRecommender):
     """Location-based hospital recommendations."""
     
+    @traced('recommender.fit')
     def fit(self, hospitals_data: List[Dict[str, Any]]) -> None:
         """Process hospital data for recommendations."""
         self.items = []
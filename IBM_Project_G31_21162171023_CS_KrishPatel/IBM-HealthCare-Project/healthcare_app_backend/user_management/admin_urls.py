@@ -3,6 +3,7 @@ from . import admin_views  # Make sure you are importing the admin_views module
 
 urlpatterns = [
     path('overview/', admin_views.admin_dashboard_overview),
+    path('db-metrics/', admin_views.db_connection_metrics, name='db-metrics'),
     path('users/', admin_views.UserListView.as_view(), name='user-list'),
     path('users/<int:id>/', admin_views.UserDetailView.as_view(), name='user-detail'),
     path('users/<int:id>/deactivate/', admin_views.UserDeleteView.as_view(), name='user-deactivate'),
@@ -5,6 +5,7 @@ from .models import User
 from .models import Appointment
 from Doctor.models import Doctor
 from rest_framework.views import APIView
+from healthcare_app_backend.db_metrics import connection_metrics
 
 
 from    .permissions import IsAdminUser
@@ -19,17 +20,38 @@ def admin_dashboard_overview(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def db_connection_metrics(request):
+    """Connections opened and time spent waiting for them, per database alias"""
+    return Response(connection_metrics())
+
+
 
 from .serializers import HealthcareUserSerializer
 from .permissions import IsAdminUser
+from .authentication import invalidate_cached_user
+from healthcare_app_backend.pagination import KeysetPagination
+from healthcare_app_backend.streaming import StreamingJSONResponse, wants_stream
 
 class UserListView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        users = User.objects.all()
-        serializer = HealthcareUserSerializer(users, many=True)
-        return Response(serializer.data)
+        fields = [
+            name for name, field in HealthcareUserSerializer().fields.items()
+            if not field.write_only
+        ]
+        users = User.objects.values(*fields)
+
+        if wants_stream(request):
+            # Full export: rows go out as they are read
+            return StreamingJSONResponse(users.order_by('id'))
+
+        # Unpaginated unless `limit`/`cursor` is passed; the admin table reads the whole list
+        paginator = KeysetPagination('id', model=User)
+        page = paginator.paginate_queryset(users, request)
+        return paginator.get_paginated_response(page)
     
     
     
@@ -41,6 +63,7 @@ class UserDetailView(APIView):
         serializer = HealthcareUserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            invalidate_cached_user(user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
 
@@ -52,4 +75,5 @@ class UserDeleteView(APIView):
         user = User.objects.get(id=id)
         user.is_active = False  # Deactivate user instead of deleting
         user.save()
+        invalidate_cached_user(user.id)
         return Response({"message": "User deactivated"})
@@ -0,0 +1,116 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Per-process cache of authenticated users: {user_id: (expires_at, user)}.
+# Every entry lives USER_CACHE_TTL seconds, so insertion order is expiry
+# order and expired entries are evicted from the front on insert.
+USER_CACHE_TTL = getattr(settings, 'USER_CACHE_TTL', 60)
+USER_CACHE_MAX_ENTRIES = getattr(settings, 'USER_CACHE_MAX_ENTRIES', 10000)
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def get_cached_user(user_id):
+    """Return the cached user for this id, or None if missing or expired."""
+    entry = _user_cache.get(str(user_id))
+    if entry is None:
+        return None
+    expires_at, user = entry
+    if expires_at < time.monotonic():
+        invalidate_cached_user(user_id)
+        return None
+    return user
+
+
+def cache_user(user):
+    now = time.monotonic()
+    key = str(user.pk)
+    with _user_cache_lock:
+        _user_cache.pop(key, None)
+        _user_cache[key] = (now + USER_CACHE_TTL, user)
+        while _user_cache:
+            oldest_key, (expires_at, _) = next(iter(_user_cache.items()))
+            if expires_at >= now and len(_user_cache) <= USER_CACHE_MAX_ENTRIES:
+                break
+            del _user_cache[oldest_key]
+
+
+def invalidate_cached_user(user_id):
+    """Drop a user from this process's cache after it has been modified."""
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+
+
+def tokens_for_user(user):
+    """
+    Issue a refresh token carrying the claims needed to authorize requests
+    without loading the user (role, is_active). Access tokens derived from it,
+    including refreshed ones, inherit these claims.
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh['role'] = user.role
+    refresh['is_active'] = user.is_active
+    return refresh
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user through a short-TTL per-process
+    cache, so repeated requests from the same user skip the primary-key query.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user)
+        elif not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        # Hand each request its own copy so views can't mutate the shared instance
+        return copy.copy(user)
+
+
+class ClaimsUser(TokenUser):
+    """Lightweight user built from token claims (id, role, is_active)."""
+
+    @property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @property
+    def role(self):
+        return self.token.get('role')
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that never touches the database. Only suitable for
+    endpoints that need nothing beyond the user's id and role.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if 'role' not in validated_token:
+            # Tokens issued before role claims existed need the full lookup
+            return CachedJWTAuthentication().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
@@ -0,0 +1,161 @@
+"""
+Password hashing off the request path.
+
+Hashing and verifying a password is tens of milliseconds of CPU that holds
+the GIL, so doing it inline lets a burst of logins stall every other request
+on the worker. `ahash_password` and `averify_password` run it in a small
+process pool instead. The pool is bounded: once WORKERS + MAX_QUEUE calls are
+in flight, new ones fail fast with HashingBusy (503 + Retry-After) rather
+than queueing without limit.
+
+`averify_password` also reports a new hash when the stored one was made
+with an older hasher or weaker parameters, so logins upgrade hashes
+transparently. TunedArgon2PasswordHasher takes its cost from the
+PASSWORD_ARGON2 setting; measure it with `manage.py tune_password_hasher`.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, check_password, make_password
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    'WORKERS': min(4, os.cpu_count() or 1),
+    'MAX_QUEUE': 32,
+    'RETRY_AFTER': 1,
+}
+
+ARGON2_DEFAULTS = {
+    'TIME_COST': Argon2PasswordHasher.time_cost,
+    'MEMORY_COST': Argon2PasswordHasher.memory_cost,
+    'PARALLELISM': Argon2PasswordHasher.parallelism,
+}
+
+
+def hashing_settings():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+def argon2_settings():
+    return {**ARGON2_DEFAULTS, **getattr(settings, 'PASSWORD_ARGON2', {})}
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with the cost from PASSWORD_ARGON2. Raising the cost makes
+    existing hashes report must_update, so they are rehashed on next login.
+    """
+
+    @property
+    def time_cost(self):
+        return argon2_settings()['TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return argon2_settings()['MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return argon2_settings()['PARALLELISM']
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-ins in progress, please retry shortly.'
+    default_code = 'hashing_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+def _init_worker(settings_module):
+    # Spawned workers start from a fresh interpreter
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def _verify(password, encoded):
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, (upgraded[0] if upgraded else None)
+
+
+class HashingPool:
+    def __init__(self, workers, max_queue, retry_after):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self.retry_after = retry_after
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # spawn, not fork: the server process has threads and open sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'healthcare_app_backend.settings'),),
+            )
+        return self._executor
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingBusy(self.retry_after)
+            self._pending += 1
+        try:
+            future = self.executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = hashing_settings()
+            _pool = HashingPool(config['WORKERS'], config['MAX_QUEUE'], config['RETRY_AFTER'])
+        return _pool
+
+
+async def ahash_password(password):
+    """make_password in the hashing pool"""
+    return await asyncio.wrap_future(get_pool().submit(_hash, password))
+
+
+async def averify_password(password, encoded):
+    """
+    check_password in the hashing pool. Returns (valid, new_hash); new_hash
+    is set when the password is valid and the stored hash should be replaced.
+    """
+    return await asyncio.wrap_future(get_pool().submit(_verify, password, encoded))
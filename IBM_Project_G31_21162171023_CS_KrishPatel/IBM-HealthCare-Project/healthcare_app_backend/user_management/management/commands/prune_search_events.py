@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from user_management.search_events import prune_search_events
+
+
+class Command(BaseCommand):
+    help = "Roll up search events older than the retention window and delete them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Retention in days (default SEARCH_EVENT_RETENTION_DAYS)")
+
+    def handle(self, *args, **options):
+        deleted = prune_search_events(options['days'])
+        self.stdout.write(f"Pruned {deleted} search events")
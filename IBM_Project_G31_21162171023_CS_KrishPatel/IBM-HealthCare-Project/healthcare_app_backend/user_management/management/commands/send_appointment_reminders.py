@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from user_management.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Send appointment reminder emails as they fall due"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single tick and exit")
+        parser.add_argument('--poll', type=int, help="Seconds between ticks")
+
+    def handle(self, *args, **options):
+        scheduler = ReminderScheduler()
+        if options['once']:
+            try:
+                sent = scheduler.tick()
+            finally:
+                scheduler.close()
+            self.stdout.write(f"Sent {sent} reminders")
+        else:
+            scheduler.run(options['poll'])
@@ -0,0 +1,51 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+
+class Command(BaseCommand):
+    help = "Measure Argon2 parameters that hash in about --target-ms on this machine"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=50, help="Time one hash should take")
+        parser.add_argument('--memory-cost', type=int, default=102400, help="KiB of memory per hash")
+        parser.add_argument('--parallelism', type=int, default=8)
+        parser.add_argument('--samples', type=int, default=5)
+        parser.add_argument('--max-time-cost', type=int, default=20)
+
+    def _measure(self, time_cost, memory_cost, parallelism, samples):
+        hasher = argon2.PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+        )
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.hash('correct horse battery staple')
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        if argon2 is None:
+            raise CommandError("argon2-cffi is not installed")
+
+        memory_cost, parallelism = options['memory_cost'], options['parallelism']
+        time_cost, elapsed = 1, 0
+        while time_cost <= options['max_time_cost']:
+            elapsed = self._measure(time_cost, memory_cost, parallelism, options['samples'])
+            self.stdout.write(f"time_cost={time_cost}: {elapsed:.1f} ms")
+            if elapsed >= options['target_ms']:
+                break
+            time_cost += 1
+        else:
+            time_cost -= 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"ARGON2_TIME_COST={time_cost} ARGON2_MEMORY_COST={memory_cost} "
+            f"ARGON2_PARALLELISM={parallelism}  (~{elapsed:.0f} ms per hash)"
+        ))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '__first__'),
+        ('user_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'appointment_date', 'id'], name='user_manage_user_id_4f9746_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saveddoctor',
+            index=models.Index(fields=['user', 'timestamp', 'id'], name='user_manage_user_id_15a903_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '__first__'),
+        ('user_management', '0002_appointment_user_manage_user_id_4f9746_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'appointment_date'], name='user_manage_doctor__a625eb_idx'),
+        ),
+    ]
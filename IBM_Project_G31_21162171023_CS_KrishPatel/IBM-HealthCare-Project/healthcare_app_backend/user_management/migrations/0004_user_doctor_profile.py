@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-19 06:37
+
+import logging
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def link_doctor_profiles(apps, schema_editor):
+    """
+    Link existing doctor users to the Doctor row sharing their mobile number.
+    Doctor mobile numbers are not unique, so a number shared by several
+    doctors is skipped and logged for an admin to link by hand.
+    """
+    User = apps.get_model('user_management', 'User')
+    Doctor = apps.get_model('Doctor', 'Doctor')
+    doctors = defaultdict(list)
+    for mobile_number, doctor_id in Doctor.objects.values_list('mobile_number', 'id'):
+        doctors[mobile_number].append(doctor_id)
+    for user in User.objects.filter(role='doctor', doctor_profile__isnull=True).exclude(mobile_number=None):
+        doctor_ids = doctors.get(user.mobile_number, [])
+        if len(doctor_ids) > 1:
+            logger.warning(
+                "Not linking doctor user %s: mobile number %s is shared by doctors %s",
+                user.pk, user.mobile_number, doctor_ids
+            )
+        elif doctor_ids:
+            user.doctor_profile_id = doctor_ids[0]
+            user.save(update_fields=['doctor_profile'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Doctor', '__first__'),
+        ('user_management', '0003_appointment_user_manage_doctor__a625eb_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='doctor_profile',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='user_account', to='Doctor.doctor'),
+        ),
+        migrations.RunPython(link_doctor_profiles, migrations.RunPython.noop),
+    ]
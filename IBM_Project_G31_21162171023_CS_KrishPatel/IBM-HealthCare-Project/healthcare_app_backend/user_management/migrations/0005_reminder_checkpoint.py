@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0004_user_doctor_profile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('due_until', models.DateTimeField()),
+                ('last_appointment_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
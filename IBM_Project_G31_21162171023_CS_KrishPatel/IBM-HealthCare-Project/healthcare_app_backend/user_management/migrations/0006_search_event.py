@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 07:14
+
+from django.db import migrations, models
+
+
+def backfill_search_events(apps, schema_editor):
+    # One event per saved search, so popularity starts where it was
+    UserSearch = apps.get_model('user_management', 'UserSearch')
+    SearchEvent = apps.get_model('user_management', 'SearchEvent')
+    rows = UserSearch.objects.order_by('id').values_list('query', 'timestamp')
+    batch = []
+    for query, timestamp in rows.iterator():
+        batch.append(SearchEvent(query=query, timestamp=timestamp))
+        if len(batch) == 1000:
+            SearchEvent.objects.bulk_create(batch)
+            batch = []
+    SearchEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_management', '0005_reminder_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=100)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_search_events, migrations.RunPython.noop),
+    ]
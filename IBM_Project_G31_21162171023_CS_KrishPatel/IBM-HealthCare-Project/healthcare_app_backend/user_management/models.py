@@ -66,6 +66,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
+    # Doctor profile of a 'doctor' user; unique, so lookups are an index probe
+    doctor_profile = models.OneToOneField(
+        'Doctor.Doctor',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='user_account'
+    )
 
     email_otp = models.CharField(max_length=6, null=True, blank=True)
     otp_expiry = models.DateTimeField(null=True, blank=True)
@@ -114,6 +122,24 @@ class UserSearch(models.Model):
     class Meta:
         ordering = ['-timestamp']  # Latest searches first
 
+
+class SearchEvent(models.Model):
+    """
+    One row per search, including repeats of a query the user already saved
+    (those reuse their UserSearch row). Search popularity counts these.
+    """
+    query = models.CharField(max_length=100)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class SearchQueryCount(models.Model):
+    """
+    Search counts per query for SearchEvent rows older than the retention
+    window, rolled up by `manage.py prune_search_events`.
+    """
+    query = models.CharField(max_length=100, unique=True)
+    count = models.PositiveIntegerField(default=0)
+
 class SavedDoctor(models.Model):
     user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='saved_doctors')
     doctor = models.ForeignKey('Doctor.Doctor', on_delete=models.CASCADE)  # Using string reference
@@ -122,6 +148,9 @@ class SavedDoctor(models.Model):
     class Meta:
         unique_together = ['user', 'doctor']  # A user can save a doctor only once
         ordering = ['-timestamp']  # Latest saved first
+        indexes = [
+            models.Index(fields=['user', 'timestamp', 'id']),  # Keyset pagination
+        ]
 
 class PasswordResetToken(models.Model):
     email = models.EmailField(unique=True)
@@ -141,6 +170,21 @@ class Appointment(models.Model):
 
     class Meta:
         ordering = ['-appointment_date']
+        indexes = [
+            models.Index(fields=['user', 'appointment_date', 'id']),  # Keyset pagination
+            models.Index(fields=['doctor', 'appointment_date']),  # Conflict range scans
+        ]
 
     def __str__(self):
         return f"Appointment for {self.user.email} on {self.appointment_date}"
+
+
+class ReminderCheckpoint(models.Model):
+    """How far the reminder scheduler got, so a restart resumes from here"""
+    name = models.CharField(max_length=50, unique=True)
+    due_until = models.DateTimeField()  # every reminder due at or before this was handled
+    last_appointment_id = models.BigIntegerField(default=0)  # newest booking seen
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.due_until}"
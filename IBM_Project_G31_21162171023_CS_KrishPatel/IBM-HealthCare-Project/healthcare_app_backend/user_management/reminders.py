@@ -0,0 +1,192 @@
+"""
+Appointment reminder emails.
+
+ReminderScheduler keeps upcoming reminders in a min-heap ordered by due time
+(appointment date minus LEAD_MINUTES). Every tick it:
+
+* loads the reminders falling due in the next LOOKAHEAD_MINUTES, a range
+  scan on appointment_date that only covers what has not been loaded yet,
+  plus bookings newer than the last appointment id it has seen;
+* pops everything due and re-reads those rows in one query per batch, so
+  cancelled appointments drop out and rescheduled ones go back on the heap;
+* sends the emails in batches over one SMTP connection kept open between
+  ticks, then stores a ReminderCheckpoint.
+
+A restart resumes from the checkpoint instead of rescanning old
+appointments. Reminders are sent at least once: a crash in the middle of a
+tick can resend that tick's reminders, but never skips them.
+"""
+import heapq
+import logging
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Appointment, ReminderCheckpoint
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'appointment-reminders'
+
+DEFAULTS = {
+    'LEAD_MINUTES': 24 * 60,
+    'LOOKAHEAD_MINUTES': 15,
+    'POLL_SECONDS': 30,
+    'BATCH_SIZE': 500,
+}
+
+
+def reminder_settings():
+    return {**DEFAULTS, **getattr(settings, 'APPOINTMENT_REMINDERS', {})}
+
+
+class ReminderScheduler:
+    def __init__(self, connection=None):
+        config = reminder_settings()
+        self.lead = timedelta(minutes=config['LEAD_MINUTES'])
+        self.lookahead = timedelta(minutes=config['LOOKAHEAD_MINUTES'])
+        self.batch_size = config['BATCH_SIZE']
+        self._connection = connection
+        self._heap = []       # (due, appointment id)
+        self._queued = set()  # appointment ids on the heap
+
+        checkpoint = ReminderCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+        if checkpoint is None:
+            # First run: start from now rather than reminding about the past
+            checkpoint = ReminderCheckpoint.objects.create(
+                name=CHECKPOINT_NAME,
+                due_until=timezone.now(),
+                last_appointment_id=Appointment.objects.aggregate(last=Max('id'))['last'] or 0,
+            )
+        self.last_id = checkpoint.last_appointment_id
+        self.loaded_until = checkpoint.due_until  # reminders due up to here are queued or sent
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = get_connection()
+            self._connection.open()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _push(self, appointment_id, due):
+        if appointment_id not in self._queued:
+            self._queued.add(appointment_id)
+            heapq.heappush(self._heap, (due, appointment_id))
+
+    def load(self, now):
+        horizon = now + self.lookahead
+        if horizon > self.loaded_until:
+            window = Appointment.objects.filter(
+                appointment_date__gt=self.loaded_until + self.lead,
+                appointment_date__lte=horizon + self.lead,
+            ).order_by().values_list('id', 'appointment_date')
+            for appointment_id, appointment_date in window:
+                self._push(appointment_id, appointment_date - self.lead)
+            self.loaded_until = horizon
+
+        # Bookings made after the window covering them was loaded; later
+        # ones are picked up by the window scan when their time comes.
+        new_bookings = Appointment.objects.filter(id__gt=self.last_id).order_by('id').values_list(
+            'id', 'appointment_date'
+        )
+        for appointment_id, appointment_date in new_bookings:
+            self.last_id = appointment_id
+            due = appointment_date - self.lead
+            if now < appointment_date and due <= self.loaded_until:
+                self._push(appointment_id, due)
+
+    def _message(self, row):
+        when = timezone.localtime(row['appointment_date']).strftime('%d %b %Y, %I:%M %p')
+        hospital = row['doctor__hospital__name']
+        place = f" at {hospital}, {row['doctor__hospital__address']}" if hospital else ''
+        body = (
+            f"Dear {row['user__name']},\n\n"
+            f"This is a reminder of your appointment with Dr. {row['doctor__name']}{place} on {when}.\n\n"
+            "Best regards,\nHealthcare System Team"
+        )
+        return EmailMessage(
+            subject='Appointment reminder',
+            body=body,
+            from_email=settings.EMAIL_HOST_USER,
+            to=[row['user__email']],
+            connection=self.connection,
+        )
+
+    def _send(self, messages):
+        try:
+            self.connection.send_messages(messages)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle connection; reconnect once
+            self.close()
+            for message in messages:
+                message.connection = self.connection
+            self.connection.send_messages(messages)
+
+    def _send_batch(self, appointment_ids, now):
+        rows = Appointment.objects.filter(id__in=appointment_ids, appointment_date__gt=now).values(
+            'id', 'appointment_date', 'user__email', 'user__name',
+            'doctor__name', 'doctor__hospital__name', 'doctor__hospital__address',
+        )
+        messages = []
+        for row in rows:
+            due = row['appointment_date'] - self.lead
+            if due > now:  # rescheduled to a later date
+                self._push(row['id'], due)
+            else:
+                messages.append(self._message(row))
+        if messages:
+            self._send(messages)
+        return len(messages)
+
+    def dispatch(self, now):
+        """Send every reminder due at or before `now`; returns how many were sent"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, appointment_id = heapq.heappop(self._heap)
+            self._queued.discard(appointment_id)
+            due.append(appointment_id)
+        sent = 0
+        for start in range(0, len(due), self.batch_size):
+            try:
+                sent += self._send_batch(due[start:start + self.batch_size], now)
+            except Exception:
+                # Unsent reminders are retried on the next tick
+                for appointment_id in due[start:]:
+                    self._push(appointment_id, now)
+                raise
+        return sent
+
+    def tick(self, now=None):
+        now = now or timezone.now()
+        self.load(now)
+        sent = self.dispatch(now)
+        ReminderCheckpoint.objects.filter(name=CHECKPOINT_NAME).update(
+            due_until=now, last_appointment_id=self.last_id
+        )
+        return sent
+
+    def run(self, poll_seconds=None):
+        poll_seconds = poll_seconds or reminder_settings()['POLL_SECONDS']
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    sent = self.tick()
+                    if sent:
+                        logger.info(f"Sent {sent} appointment reminders")
+                except Exception as e:
+                    logger.error(f"Reminder tick failed: {str(e)}")
+                    self.close()
+                time.sleep(max(0, poll_seconds - (time.monotonic() - started)))
+        finally:
+            self.close()
@@ -0,0 +1,40 @@
+"""
+Retention for SearchEvent.
+
+Events older than SEARCH_EVENT_RETENTION_DAYS are folded into one
+SearchQueryCount row per query and deleted, so search popularity keeps its
+history while the event table only holds the recent window.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import SearchEvent, SearchQueryCount
+
+logger = logging.getLogger(__name__)
+
+
+def prune_search_events(retention_days=None):
+    """Roll up and delete events older than the retention window; returns the number deleted"""
+    if retention_days is None:
+        retention_days = getattr(settings, 'SEARCH_EVENT_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    with transaction.atomic():
+        expired = SearchEvent.objects.filter(timestamp__lt=cutoff)
+        last_id = expired.aggregate(last_id=Max('id'))['last_id']
+        if last_id is None:
+            return 0
+        expired = expired.filter(id__lte=last_id)
+        counts = dict(expired.order_by().values_list('query').annotate(count=Count('id')))
+        SearchQueryCount.objects.bulk_create(
+            [SearchQueryCount(query=query) for query in counts], ignore_conflicts=True
+        )
+        for query, count in counts.items():
+            SearchQueryCount.objects.filter(query=query).update(count=F('count') + count)
+        deleted, _ = expired.delete()
+    logger.info("Pruned %d search events older than %s", deleted, cutoff)
+    return deleted
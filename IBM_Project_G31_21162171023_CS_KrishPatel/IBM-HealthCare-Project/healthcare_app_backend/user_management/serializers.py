@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.hashers import make_password
+from healthcare_app_backend.serializer_joins import JoinPlanningMixin
 from .models import User, Appointment
 
 class HealthcareUserSerializer(serializers.ModelSerializer):
@@ -76,7 +77,7 @@ class HealthcareUserSerializer(serializers.ModelSerializer):
         validated_data['password'] = make_password(validated_data['password'])
         return User.objects.create(**validated_data)
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(JoinPlanningMixin, serializers.ModelSerializer):
     doctor_name = serializers.CharField(source='doctor.name', read_only=True)
     user_name = serializers.CharField(source='user.name', read_only=True)
     
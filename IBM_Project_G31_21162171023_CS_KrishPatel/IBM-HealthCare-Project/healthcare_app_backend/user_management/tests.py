@@ -1,3 +1,314 @@
-from django.test import TestCase
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core import mail
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from healthcare_app_backend.db_metrics import record_connection
+from healthcare_app_backend.pagination import KeysetPagination
+from .authentication import (
+    CachedJWTAuthentication, StatelessJWTAuthentication,
+    invalidate_cached_user, tokens_for_user
+)
+from . import authentication, hashing, throttling
+from .models import Appointment, SearchEvent, SearchQueryCount, User
+from .reminders import ReminderScheduler
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Test Patient', mobile_number='9999999999', is_active=True
+        )
+        self.access = str(tokens_for_user(self.user).access_token)
+        self.factory = APIRequestFactory()
+        invalidate_cached_user(self.user.id)
+
+    def authenticate(self, backend):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        return backend.authenticate(request)[0]
+
+    def test_second_lookup_skips_database(self):
+        backend = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            self.authenticate(backend)
+        with self.assertNumQueries(0):
+            user = self.authenticate(backend)
+        self.assertEqual(user.role, 'user')
+
+    def test_deactivation_invalidates_cached_user(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', password='secret123', name='Admin',
+            mobile_number='8888888888', role='admin', is_active=True
+        )
+        self.authenticate(CachedJWTAuthentication())
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.delete(f'/api/admin/users/{self.user.id}/deactivate/')
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(CachedJWTAuthentication())
+
+    def test_cache_is_bounded_and_drops_expired_users(self):
+        users = [User(pk=pk, email=f'u{pk}@example.com') for pk in range(1, 6)]
+        self.addCleanup(authentication._user_cache.clear)
+        with mock.patch.object(authentication, 'USER_CACHE_MAX_ENTRIES', 3):
+            for user in users:
+                authentication.cache_user(user)
+        self.assertEqual(list(authentication._user_cache), ['3', '4', '5'])
+
+        with mock.patch.object(authentication.time, 'monotonic', return_value=time.monotonic() + 3600):
+            authentication.cache_user(users[0])
+        self.assertEqual(list(authentication._user_cache), ['1'])
+
+    def test_stateless_user_comes_from_claims(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate(StatelessJWTAuthentication())
+        self.assertEqual(user.role, 'user')
+        self.assertTrue(user.is_active)
+
+
+class OTPRateThrottleTests(TestCase):
+    def setUp(self):
+        throttling._stores.clear()
+
+    def test_login_burst_is_rejected_before_database(self):
+        client = APIClient()
+        payload = {'email': 'bot@example.com', 'password': 'wrong'}
+        for _ in range(3):
+            self.assertEqual(client.post('/api/login/', payload).status_code, 401)
+
+        with self.assertNumQueries(0):
+            response = client.post('/api/login/', payload)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_buckets_are_scoped_per_endpoint(self):
+        client = APIClient()
+        payload = {'email': 'bot@example.com', 'password': 'wrong'}
+        for _ in range(4):
+            client.post('/api/login/', payload)
+
+        response = client.post('/api/resend-login-otp/', {'email': 'bot@example.com'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncLoginTests(TestCase):
+    def setUp(self):
+        throttling._stores.clear()
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Test Patient', mobile_number='9999999999', is_active=True
+        )
+
+    async def test_login_and_otp_verification_run_async(self):
+        client = AsyncClient()
+        response = await client.post(
+            '/api/login/', {'email': 'Patient@example.com', 'password': 'secret123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+
+        await self.user.arefresh_from_db()
+        response = await client.post(
+            '/api/verify-login-otp/', {'email': self.user.email, 'email_otp': self.user.email_otp},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        self.user.password = make_password('secret123', hasher='pbkdf2_sha1')
+        self.user.save(update_fields=['password'])
+
+        response = self.client.post('/api/login/', {'email': self.user.email, 'password': 'secret123'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password.split('$')[0], identify_hasher(make_password('x')).algorithm)
+        self.assertTrue(self.user.check_password('secret123'))
+
+    def test_full_hashing_pool_sheds_load(self):
+        pool = hashing.HashingPool(workers=1, max_queue=0, retry_after=2)
+        pool._pending = pool.max_pending
+        with mock.patch.object(hashing, '_pool', pool):
+            response = self.client.post('/api/login/', {'email': self.user.email, 'password': 'secret123'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+
+class LocalBucketStoreTests(TestCase):
+    def test_each_bucket_expires_on_its_own_schedule(self):
+        store = throttling.LocalBucketStore({})
+        store.MAX_KEYS = 50
+        clock = [1000.0]
+        with mock.patch.object(throttling.time, 'monotonic', side_effect=lambda: clock[0]):
+            for _ in range(3):
+                store.consume('email:a', 3, 3 / 300)
+            self.assertAlmostEqual(store.consume('email:a', 3, 3 / 300), 100)
+
+            # Churn through many short-lived IP buckets
+            clock[0] += 61
+            for i in range(200):
+                store.consume(f'ip:{i}', 20, 20 / 60)
+
+            self.assertLessEqual(len(store._buckets), store.MAX_KEYS)
+            self.assertGreater(store.consume('email:a', 3, 3 / 300), 0)
+
+
+class UserListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='secret123', name='Admin',
+            mobile_number='8888888888', role='admin', is_active=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_user_list_pages_follow_link_header(self):
+        for i in range(4):
+            User.objects.create_user(
+                email=f'user{i}@example.com', password='secret123',
+                name=f'User {i}', mobile_number=f'700000000{i}'
+            )
+
+        seen = []
+        url = '/api/admin/users/?limit=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data), 2)
+            seen.extend(user['id'] for user in response.data)
+            link = response.get('Link')
+            url = link[1:link.index('>')] if link else None
+
+        self.assertEqual(seen, sorted(User.objects.values_list('id', flat=True)))
+
+    def test_user_list_is_paged_by_default_and_links_to_the_rest(self):
+        User.objects.bulk_create(
+            User(email=f'user{i}@example.com', name=f'User {i}', mobile_number=f'7{i:09d}')
+            for i in range(150)
+        )
+        response = self.client.get('/api/admin/users/')
+        self.assertEqual(len(response.data), 100)
+        next_url = response['Link'].split(';')[0].strip('<>')
+        rest = self.client.get(next_url)
+        self.assertEqual(len(response.data) + len(rest.data), User.objects.count())
+        self.assertFalse(rest.has_header('Link'))
+
+    def test_invalid_saved_doctors_cursor_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/saved-doctors/?cursor=garbage!!')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/admin/users/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_with_wrong_value_types_is_rejected(self):
+        cursor = KeysetPagination().encode_cursor(['x', 'y'])
+        response = self.client.get('/api/admin/users/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_saved_doctors_limit_is_rejected(self):
+        response = self.client.get('/api/saved-doctors/', {'limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json())
+
+    def test_saved_doctors_cursor_with_wrong_value_types_is_rejected(self):
+        cursor = KeysetPagination().encode_cursor(['notadate', 1])
+        response = self.client.get('/api/saved-doctors/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_db_connection_metrics(self):
+        with mock.patch('healthcare_app_backend.db_metrics._stats', {}):
+            record_connection('default', 0.25)
+            record_connection('default', 0.05)
+            response = self.client.get('/api/admin/db-metrics/')
+        self.assertEqual(response.data['default']['opened'], 2)
+        self.assertAlmostEqual(response.data['default']['wait_seconds_total'], 0.3)
+        self.assertEqual(response.data['default']['wait_seconds_max'], 0.25)
+
+    def test_admin_user_list_is_streamed(self):
+        response = self.client.get('/api/admin/users/?stream=1')
+        self.assertTrue(response.streaming)
+        users = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(users[0]['email'], 'admin@example.com')
+        self.assertNotIn('password', users[0])
+
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        from Doctor.models import Doctor
+        from hospital.models import Hospital
+
+        with mock.patch('hospital.models.get_coordinates_from_address', return_value=(None, None)):
+            hospital = Hospital.objects.create(
+                name='City Hospital', specialization='General', address='Ahmedabad',
+                latitude=23.02, longitude=72.57, available_beds=10, diseases_treated=[]
+            )
+        self.doctor = Doctor.objects.create(
+            hospital=hospital, name='Shah', mobile_number='9000000000', specialization='Cardiology'
+        )
+        self.user = User.objects.create_user(
+            email='patient@example.com', password='secret123',
+            name='Patient', mobile_number='9999999999', is_active=True
+        )
+
+    def appointment(self, when):
+        return Appointment.objects.create(doctor=self.doctor, user=self.user, appointment_date=parse_datetime(when))
+
+    def test_reminders_are_sent_once_across_restarts(self):
+        first = self.appointment('2030-01-02T10:00:00Z')
+        self.appointment('2030-01-03T10:00:00Z')
+        cancelled = self.appointment('2030-01-02T11:00:00Z')
+        scheduler = ReminderScheduler()
+
+        self.assertEqual(scheduler.tick(parse_datetime('2030-01-01T09:00:00Z')), 0)
+        cancelled.delete()
+        self.assertEqual(scheduler.tick(parse_datetime('2030-01-01T11:00:00Z')), 1)
+        self.assertEqual(mail.outbox[0].to, ['patient@example.com'])
+        self.assertIn('Dr. Shah at City Hospital', mail.outbox[0].body)
+
+        # A restarted scheduler resumes from the checkpoint
+        restarted = ReminderScheduler()
+        late = self.appointment('2030-01-01T20:00:00Z')  # booked inside the lead time
+        with self.assertNumQueries(4):  # window, new bookings, batch, checkpoint
+            self.assertEqual(restarted.tick(parse_datetime('2030-01-01T11:01:00Z')), 1)
+        self.assertEqual(mail.outbox[-1].to, ['patient@example.com'])
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertNotIn(first.id, restarted._queued)
+        self.assertNotIn(late.id, restarted._queued)
+
+        self.assertEqual(restarted.tick(parse_datetime('2030-01-02T09:59:00Z')), 0)
+        self.assertEqual(restarted.tick(parse_datetime('2030-01-02T10:00:00Z')), 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class SearchEventRetentionTests(TestCase):
+    def test_prune_rolls_old_events_into_query_counts(self):
+        SearchQueryCount.objects.create(query='asthma', count=3)
+        for query in ('asthma', 'asthma', 'migraine', 'asthma'):
+            SearchEvent.objects.create(query=query)
+        old = SearchEvent.objects.order_by('id')[:3].values_list('id', flat=True)
+        SearchEvent.objects.filter(id__in=list(old)).update(timestamp=timezone.now() - timedelta(days=40))
+
+        call_command('prune_search_events', days=30, stdout=mock.Mock())
+
+        self.assertEqual(
+            dict(SearchQueryCount.objects.values_list('query', 'count')), {'asthma': 5, 'migraine': 1}
+        )
+        self.assertEqual(list(SearchEvent.objects.values_list('query', flat=True)), ['asthma'])
 
-# Create your tests here.
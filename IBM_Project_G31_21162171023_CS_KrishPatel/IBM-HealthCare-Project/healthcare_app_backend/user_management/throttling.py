@@ -0,0 +1,129 @@
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_OTP_THROTTLE = {
+    'BACKEND': 'user_management.throttling.LocalBucketStore',
+    'CACHE_ALIAS': 'default',
+    # key type -> (burst capacity, seconds to refill the bucket completely)
+    'RATES': {
+        'email': (3, 300),
+        'ip': (20, 60),
+    },
+}
+
+
+def _refill(tokens, last, now, capacity, rate):
+    return min(capacity, tokens + max(0.0, now - last) * rate)
+
+
+class LocalBucketStore:
+    """
+    In-process token buckets. Each worker enforces its own limits.
+
+    Every bucket records when it will be full again; past that it carries no
+    state and is dropped. A heap keeps buckets in that order, so expired ones
+    are evicted cheaply, and beyond MAX_KEYS the buckets closest to full go first.
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(self, options):
+        self._buckets = {}  # key -> (tokens, last, full_at)
+        self._expiry = []   # heap of (full_at, key); stale pairs are skipped
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate):
+        """Take one token from the bucket. Returns seconds to wait, or 0 if allowed."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(lambda full_at: full_at <= now)
+            entry = self._buckets.get(key)
+            tokens = capacity if entry is None else _refill(entry[0], entry[1], now, capacity, rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            full_at = now + (capacity - tokens) / rate
+            self._buckets[key] = (tokens, now, full_at)
+            heapq.heappush(self._expiry, (full_at, key))
+            self._evict(lambda _: len(self._buckets) > self.MAX_KEYS)
+            if len(self._expiry) > 2 * max(len(self._buckets), self.MAX_KEYS):
+                self._expiry = [(entry[2], k) for k, entry in self._buckets.items()]
+                heapq.heapify(self._expiry)
+            return 0 if allowed else (1 - tokens) / rate
+
+    def _evict(self, should_evict):
+        while self._expiry and should_evict(self._expiry[0][0]):
+            full_at, key = heapq.heappop(self._expiry)
+            entry = self._buckets.get(key)
+            if entry is not None and entry[2] == full_at:
+                del self._buckets[key]
+
+
+class CacheBucketStore:
+    """
+    Token buckets kept in a Django cache alias (Redis, database cache table...)
+    so every worker shares the same counters. The read-modify-write is not
+    atomic, so a burst racing across workers may let a request or two through.
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options.get('CACHE_ALIAS', 'default')]
+
+    def consume(self, key, capacity, rate):
+        now = time.time()
+        tokens, last = self.cache.get(key) or (capacity, now)
+        tokens = _refill(tokens, last, now, capacity, rate)
+        # An expired entry is the same as a full bucket
+        timeout = int(capacity / rate) + 1
+        if tokens >= 1:
+            self.cache.set(key, (tokens - 1, now), timeout)
+            return 0
+        self.cache.set(key, (tokens, now), timeout)
+        return (1 - tokens) / rate
+
+
+_stores = {}
+
+
+def get_bucket_store():
+    config = {**DEFAULT_OTP_THROTTLE, **getattr(settings, 'OTP_THROTTLE', {})}
+    path = config['BACKEND']
+    if path not in _stores:
+        _stores[path] = import_string(path)(config)
+    return _stores[path], config['RATES']
+
+
+class OTPRateThrottle(BaseThrottle):
+    """
+    Token-bucket throttle for endpoints that write an OTP and send email.
+    Buckets are keyed by the view's throttle_scope plus the submitted email
+    and the client IP, so rejected requests never reach the DB or SMTP.
+    """
+
+    def allow_request(self, request, view):
+        store, rates = get_bucket_store()
+        scope = getattr(view, 'throttle_scope', view.__class__.__name__)
+        idents = {'ip': self.get_ident(request)}
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if email:
+            idents['email'] = str(email).strip().lower()
+
+        self.wait_seconds = 0
+        for kind, ident in idents.items():
+            if kind not in rates:
+                continue
+            capacity, period = rates[kind]
+            wait = store.consume(f"otp_throttle:{scope}:{kind}:{ident}", capacity, capacity / period)
+            if wait:
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
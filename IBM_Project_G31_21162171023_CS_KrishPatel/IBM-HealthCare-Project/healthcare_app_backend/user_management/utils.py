@@ -1,6 +1,31 @@
+import logging
+
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from healthcare_app_backend.tracing import external_call
+
+try:
+    import httpx
+except ImportError:  # httpx is optional; fall back to requests in a worker thread
+    httpx = None
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {
+    'User-Agent': 'HealthcareApp/1.0'  # Required by Nominatim's terms of use
+}
+GEOCODING_TIMEOUT = 10
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_geocoding_results(results):
+    if results:
+        return float(results[0]['lat']), float(results[0]['lon'])
+    return None, None
+
+
 def get_coordinates_from_address(address):
     """
     Convert an address to latitude and longitude using Nominatim (OpenStreetMap) geocoding service.
@@ -8,24 +33,33 @@ def get_coordinates_from_address(address):
     """
     try:
         # Using Nominatim geocoding service (free, no API key required)
-        base_url = "https://nominatim.openstreetmap.org/search"
         params = {
             'q': address,
             'format': 'json',
             'limit': 1
         }
-        headers = {
-            'User-Agent': 'HealthcareApp/1.0'  # Required by Nominatim's terms of use
-        }
         
-        response = requests.get(base_url, params=params, headers=headers)
-        response.raise_for_status()
+        with external_call('geocoder'):
+            response = requests.get(NOMINATIM_URL, params=params, headers=NOMINATIM_HEADERS, timeout=GEOCODING_TIMEOUT)
+            response.raise_for_status()
         
-        results = response.json()
-        if results:
-            return float(results[0]['lat']), float(results[0]['lon'])
-        return None, None
+        return _parse_geocoding_results(response.json())
         
     except Exception as e:
-        print(f"Geocoding error: {str(e)}")
-        return None, None
\ No newline at end of file
+        logger.warning(f"Geocoding error: {str(e)}")
+        return None, None
+
+
+async def aget_coordinates_from_address(address):
+    """Async get_coordinates_from_address, for async views"""
+    if httpx is None:
+        return await sync_to_async(get_coordinates_from_address, thread_sensitive=False)(address)
+    try:
+        with external_call('geocoder'):
+            async with httpx.AsyncClient(headers=NOMINATIM_HEADERS, timeout=GEOCODING_TIMEOUT) as client:
+                response = await client.get(NOMINATIM_URL, params={'q': address, 'format': 'json', 'limit': 1})
+                response.raise_for_status()
+        return _parse_geocoding_results(response.json())
+    except Exception as e:
+        logger.warning(f"Geocoding error: {str(e)}")
+        return None, None
@@ -2,27 +2,34 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth import authenticate, get_user_model
-from django.contrib.auth.hashers import check_password, make_password
 from django.core.mail import send_mail
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now, timedelta
 from django.utils.crypto import get_random_string
-from django.utils.decorators import method_decorator
-from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from asgiref.sync import sync_to_async
 
 from .serializers import HealthcareUserSerializer, AppointmentSerializer
 from .models import (
-    User, UserSearch, SavedDoctor, Appointment, 
+    User, UserSearch, SearchEvent, SavedDoctor, Appointment, 
     ActivationToken, PasswordResetToken
 )
 from .permissions import IsUser, IsDoctor
-from .utils import get_coordinates_from_address
+from .authentication import (
+    CachedJWTAuthentication, StatelessJWTAuthentication,
+    invalidate_cached_user, tokens_for_user
+)
+from .throttling import OTPRateThrottle
+from .hashing import ahash_password, averify_password
+from .utils import aget_coordinates_from_address
+from healthcare_app_backend.async_views import AsyncAPIView
+from healthcare_app_backend.pagination import KeysetPagination
 
 from Doctor.models import Doctor
 from hospital.models import Hospital
@@ -33,10 +40,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class RegisterUserView(APIView):
-    permission_classes = [AllowAny]
+def in_thread(func):
+    """Run blocking I/O (SMTP) off the event loop"""
+    return sync_to_async(func, thread_sensitive=False)
 
-    def post(self, request):
+
+class RegisterUserView(AsyncAPIView):
+    async def post(self, request):
         email = request.data.get("email", "").lower()
         mobile_number = request.data.get("mobile_number")
         name = request.data.get("name")
@@ -49,17 +59,17 @@ class RegisterUserView(APIView):
         # Get coordinates from address if provided
         latitude, longitude = None, None
         if address:
-            latitude, longitude = get_coordinates_from_address(address)
+            latitude, longitude = await aget_coordinates_from_address(address)
 
         if role not in ["user", "doctor"]:
-            return Response({'error': 'Invalid role selected.'}, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Invalid role selected.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Basic validation
         if not all([email, mobile_number, name, password]):
-            return Response({'error': 'Please provide all required fields.'}, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Please provide all required fields.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if User.objects.filter(email=email).exists() or User.objects.filter(mobile_number=mobile_number).exists():
-            return Response({'error': 'Email or mobile number already registered.'}, status=status.HTTP_400_BAD_REQUEST)
+        if await User.objects.filter(Q(email=email) | Q(mobile_number=mobile_number)).aexists():
+            return JsonResponse({'error': 'Email or mobile number already registered.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Generate OTP and activation token
         email_otp = get_random_string(6, '0123456789')
@@ -69,7 +79,7 @@ class RegisterUserView(APIView):
         user_data = {
             'name': name,
             'mobile_number': mobile_number,
-            'password': make_password(password),
+            'password': await ahash_password(password),
             'role': role,
             'address': address,
             'date_of_birth': date_of_birth,
@@ -98,7 +108,7 @@ class RegisterUserView(APIView):
             user_data.update(doctor_data)
 
         # Save data in ActivationToken
-        ActivationToken.objects.update_or_create(
+        await ActivationToken.objects.aupdate_or_create(
             email=email,
             defaults={
                 'otp': email_otp,
@@ -112,9 +122,9 @@ class RegisterUserView(APIView):
         activation_link = f"{settings.FRONTEND_URL}/activate?token={activation_token}&email={email}"
 
         # Send activation email
-        self.send_activation_email(email_otp, name, activation_link, email)
+        await in_thread(self.send_activation_email)(email_otp, name, activation_link, email)
 
-        return Response({'message': 'OTP sent to email. Please verify to activate your account.'}, status=status.HTTP_201_CREATED)
+        return JsonResponse({'message': 'OTP sent to email. Please verify to activate your account.'}, status=status.HTTP_201_CREATED)
 
     def send_activation_email(self, email_otp, name, activation_link, email):
         email_subject = "🚀 Activate Your Healthcare System Account"
@@ -226,8 +236,8 @@ class ActivationView(APIView):
                             diseases_treated=[]
                         )
 
-                    # Create doctor with the hospital
-                    Doctor.objects.create(
+                    # Create doctor with the hospital and link it to the user
+                    user.doctor_profile = Doctor.objects.create(
                         name=user_data['name'],
                         mobile_number=user_data['mobile_number'],
                         specialization=user_data.get('specialization', 'General'),
@@ -237,6 +247,7 @@ class ActivationView(APIView):
                         consultation_fee_inr=user_data.get('consultation_fee_inr', 0),
                         hospital=hospital
                     )
+                    user.save(update_fields=['doctor_profile'])
 
                 # Clean up the activation entry
                 activation_entry.delete()
@@ -259,34 +270,41 @@ class ActivationView(APIView):
 
 User = get_user_model()
 
-class LoginView(APIView):
-    permission_classes = [AllowAny]
+class LoginView(AsyncAPIView):
+    throttle_classes = [OTPRateThrottle]
+    throttle_scope = 'login'
 
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get("email", "").lower()
         password = request.data.get("password")
 
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
         except User.DoesNotExist:
-            return Response({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
+            return JsonResponse({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        if not check_password(password, user.password):
-            return Response({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
+        valid, rehashed = await averify_password(password, user.password)
+        if not valid:
+            return JsonResponse({'error': 'Invalid credentials.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         if not user.is_active:
-            return Response({'error': 'Account not activated.'}, status=status.HTTP_401_UNAUTHORIZED)
+            return JsonResponse({'error': 'Account not activated.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Generate OTP
         login_otp = get_random_string(6, '0123456789')
         user.email_otp = login_otp
         user.otp_expiry = now() + timedelta(minutes=5)
-        user.save()
+        update_fields = ['email_otp', 'otp_expiry']
+        if rehashed:
+            # Stored hash used an outdated hasher or cost; upgrade it
+            user.password = rehashed
+            update_fields.append('password')
+        await user.asave(update_fields=update_fields)
 
         # Send OTP via email
-        send_login_otp_email(user, login_otp)
+        await in_thread(send_login_otp_email)(user, login_otp)
 
-        return Response({
+        return JsonResponse({
             'message': 'OTP sent to your email. Verify to complete login.',
             'otp_required': True
         }, status=status.HTTP_200_OK)
@@ -327,36 +345,34 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import User  # Ensure correct import for the User model
 
-class LoginOTPVerifyView(APIView):
-    permission_classes = [AllowAny]
-
-    def post(self, request):
+class LoginOTPVerifyView(AsyncAPIView):
+    async def post(self, request):
         email = request.data.get("email")
         otp = request.data.get("email_otp")
 
         if not email or not otp:
-            return Response({'error': 'Email and OTP are required.'}, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse({'error': 'Email and OTP are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         email = email.lower()
 
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
         except User.DoesNotExist:
-            return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+            return JsonResponse({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
 
         # Check OTP validity using email_otp and otp_expiry
         if not user.email_otp or user.email_otp != otp or not user.otp_expiry or user.otp_expiry < now():
-            return Response({'error': 'Invalid or expired OTP.'}, status=status.HTTP_401_UNAUTHORIZED)
+            return JsonResponse({'error': 'Invalid or expired OTP.'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # Clear OTP after successful verification
         user.email_otp = None
         user.otp_expiry = None
-        user.save()
+        await user.asave(update_fields=['email_otp', 'otp_expiry'])
 
         # Generate JWT Token
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
-        return Response({
+        return JsonResponse({
             'message': 'Login successful 🎉',
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -365,6 +381,7 @@ class LoginOTPVerifyView(APIView):
     
     # 🚀 5. Role-Based Access Control
 class RoleBasedAccess(APIView):
+        authentication_classes = [StatelessJWTAuthentication]
         permission_classes = [IsAuthenticated]
 
         def get(self, request):
@@ -379,6 +396,7 @@ class RoleBasedAccess(APIView):
 
     # 🚀 6. Doctor-Only Dashboard
 class DoctorDashboardView(APIView):
+        authentication_classes = [StatelessJWTAuthentication]
         permission_classes = [IsAuthenticated, IsDoctor]
 
         def get(self, request):
@@ -386,6 +404,7 @@ class DoctorDashboardView(APIView):
 
     # 🚀 7. User-Only Dashboard
 class UserDashboardView(APIView):
+        authentication_classes = [StatelessJWTAuthentication]
         permission_classes = [IsAuthenticated, IsUser]
 
         def get(self, request):
@@ -411,24 +430,24 @@ class LogoutView(APIView):
 
 
 
-@method_decorator(csrf_exempt, name='dispatch')  # ✅ CSRF disabled
-class ResendActivationOTPView(APIView):
-        permission_classes = [AllowAny]
+class ResendActivationOTPView(AsyncAPIView):  # CSRF exempt, like every AsyncAPIView
+        throttle_classes = [OTPRateThrottle]
+        throttle_scope = 'resend_activation_otp'
 
-        def post(self, request):
+        async def post(self, request):
             email = request.data.get("email", "").lower()
             if not email:
-                return Response({"error": "Email is required."}, status=400)
+                return JsonResponse({"error": "Email is required."}, status=400)
 
-            activation_entry = ActivationToken.objects.filter(email=email).first()
+            activation_entry = await ActivationToken.objects.filter(email=email).afirst()
             if not activation_entry:
-                return Response({"error": "No pending activation found for this email."}, status=404)
+                return JsonResponse({"error": "No pending activation found for this email."}, status=404)
 
             # Generate new OTP
             new_otp = get_random_string(6, '0123456789')
             activation_entry.otp = new_otp
             activation_entry.created_at = now()
-            activation_entry.save()
+            await activation_entry.asave()
 
             # Prepare email
             activation_link = f"{settings.FRONTEND_URL}/activate?token={activation_entry.token}"
@@ -441,7 +460,7 @@ class ResendActivationOTPView(APIView):
             </body></html>
             """
 
-            send_mail(
+            await in_thread(send_mail)(
                 subject=email_subject,
                 message='',
                 from_email=settings.EMAIL_HOST_USER,
@@ -449,18 +468,19 @@ class ResendActivationOTPView(APIView):
                 html_message=email_body,
             )
 
-            return Response({"message": "New OTP sent."}, status=200)
+            return JsonResponse({"message": "New OTP sent."}, status=200)
 
-class ResendLoginOTPView(APIView):
-        permission_classes = [AllowAny]
+class ResendLoginOTPView(AsyncAPIView):
+        throttle_classes = [OTPRateThrottle]
+        throttle_scope = 'resend_login_otp'
 
-        def post(self, request):
+        async def post(self, request):
             email = request.data.get("email", "").lower()
 
             # Check if user exists
-            user = User.objects.filter(email=email).first()
+            user = await User.objects.filter(email=email).afirst()
             if not user:
-                return Response({'error': 'User not found. Please register first.'}, status=400)
+                return JsonResponse({'error': 'User not found. Please register first.'}, status=400)
 
             # Generate a new OTP
             new_otp = get_random_string(6, '0123456789')
@@ -468,7 +488,7 @@ class ResendLoginOTPView(APIView):
             # ✅ Store OTP and expiry in correct fields
             user.email_otp = new_otp
             user.otp_expiry = now() + timedelta(minutes=5)
-            user.save()
+            await user.asave(update_fields=['email_otp', 'otp_expiry'])
 
             # ✅ Email Content
             email_subject = "🔐 Secure Login OTP - Healthcare System"
@@ -492,7 +512,7 @@ class ResendLoginOTPView(APIView):
             </html>
             """
 
-            send_mail(
+            await in_thread(send_mail)(
                 subject=email_subject,
                 message='',
                 from_email=settings.EMAIL_HOST_USER,
@@ -501,20 +521,21 @@ class ResendLoginOTPView(APIView):
                 fail_silently=False,
             )
 
-            return Response({"message": "New login OTP sent to your email."}, status=200)
-class ForgotPasswordView(APIView):
-        permission_classes = [AllowAny]
+            return JsonResponse({"message": "New login OTP sent to your email."}, status=200)
+class ForgotPasswordView(AsyncAPIView):
+        throttle_classes = [OTPRateThrottle]
+        throttle_scope = 'forgot_password'
 
-        def post(self, request):
-            email = request.data.get("email").lower()
+        async def post(self, request):
+            email = request.data.get("email", "").lower()
 
-            user = User.objects.filter(email=email).first()
+            user = await User.objects.filter(email=email).afirst()
             if not user:
-                return Response({'error': 'Email not registered.'}, status=400)
+                return JsonResponse({'error': 'Email not registered.'}, status=400)
 
             # Generate reset token
             reset_token = get_random_string(64)
-            PasswordResetToken.objects.update_or_create(
+            await PasswordResetToken.objects.aupdate_or_create(
                 email=email, defaults={'token': reset_token, 'created_at': now()}
             )
 
@@ -537,7 +558,7 @@ class ForgotPasswordView(APIView):
             </html>
             """
 
-            send_mail(
+            await in_thread(send_mail)(
                 email_subject,
                 '',
                 settings.EMAIL_HOST_USER,
@@ -546,35 +567,34 @@ class ForgotPasswordView(APIView):
                 fail_silently=False,
             )
 
-            return Response({'message': 'Password reset email sent.'}, status=200)
+            return JsonResponse({'message': 'Password reset email sent.'}, status=200)
         
         
-class ResetPasswordView(APIView):
-        permission_classes = [AllowAny]
-
-        def post(self, request):
+class ResetPasswordView(AsyncAPIView):
+        async def post(self, request):
             token = request.data.get("token")
             new_password = request.data.get("new_password")
 
             if not token or not new_password:
-                return Response({'error': 'Token and new password are required.'}, status=400)
+                return JsonResponse({'error': 'Token and new password are required.'}, status=400)
 
-            reset_entry = PasswordResetToken.objects.filter(token=token).first()
+            reset_entry = await PasswordResetToken.objects.filter(token=token).afirst()
             if not reset_entry or reset_entry.is_expired():
-                return Response({'error': 'Invalid or expired token.'}, status=400)
+                return JsonResponse({'error': 'Invalid or expired token.'}, status=400)
 
             # Update user password
-            user = User.objects.get(email=reset_entry.email)
-            user.password = make_password(new_password)
-            user.save()
+            user = await User.objects.aget(email=reset_entry.email)
+            user.password = await ahash_password(new_password)
+            await user.asave(update_fields=['password'])
+            await sync_to_async(invalidate_cached_user)(user.id)
 
             # Delete token after successful reset
-            reset_entry.delete()
+            await reset_entry.adelete()
 
-            return Response({'message': 'Password reset successfully.'}, status=200)
+            return JsonResponse({'message': 'Password reset successfully.'}, status=200)
 
 class UserProfileView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -586,7 +606,7 @@ class UserProfileView(APIView):
             return Response({"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class UserSearchesView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -610,19 +630,26 @@ class UserSearchesView(APIView):
                 existing_search.save()
             else:
                 UserSearch.objects.create(user=user, query=query)
+            SearchEvent.objects.create(query=query)
 
             return Response({"message": "Search saved"}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class SavedDoctorsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        paginator = KeysetPagination('-timestamp', model=SavedDoctor)
+        # Malformed `limit`/`cursor` values are a 400, not a 500
+        paginator.get_limit(request)
+        paginator.decode_cursor(request)
         try:
             user = request.user
-            saved = SavedDoctor.objects.filter(user=user).select_related('doctor')
+            saved = paginator.paginate_queryset(
+                SavedDoctor.objects.filter(user=user).select_related('doctor'), request
+            )
             doctors = []
 
             for item in saved:
@@ -639,7 +666,9 @@ class SavedDoctorsView(APIView):
                     'conditions_treated': doctor.conditions_treated if hasattr(doctor, 'conditions_treated') else []
                 })
 
-            return Response({"doctors": doctors}, status=status.HTTP_200_OK)
+            return paginator.add_link_header(Response(
+                {"doctors": doctors}, status=status.HTTP_200_OK
+            ))
         except Exception as e:
             return Response({"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -665,7 +694,7 @@ class SavedDoctorsView(APIView):
             return Response({"message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class RecommendedConditionsView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):